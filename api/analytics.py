@@ -0,0 +1,100 @@
+"""Модуль с вычислением аналитики котировок на стороне базы данных."""
+from django.db.models import (
+    BooleanField,
+    Case,
+    CharField,
+    Expression,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    IntegerField,
+    Max,
+    Min,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import Cast, Concat, Round
+
+
+def annotate_analytics(
+    rates: QuerySet, threshold: int, numeric: bool = False
+) -> QuerySet:
+    """Добавить к котировкам поля аналитики за один проход запроса.
+
+    Минимум и максимум считаются по всему периоду запроса независимо от
+    сортировки и страницы, процент от порога - числом или строкой "12.3%".
+    """
+    period = rates.order_by().values("charcode")
+    return rates.annotate(
+        **get_analytics_fields(
+            threshold,
+            Subquery(
+                period.annotate(min_value=Min("value")).values("min_value")
+            ),
+            Subquery(
+                period.annotate(max_value=Max("value")).values("max_value")
+            ),
+            numeric,
+        )
+    )
+
+
+def annotate_batch_analytics(
+    rates: QuerySet, thresholds: dict[int, int], numeric: bool = False
+) -> QuerySet:
+    """Добавить к котировкам нескольких валют поля аналитики.
+
+    Порог - свой у каждой валюты по ее id, минимум и максимум считаются
+    оконными функциями по котировкам валюты за период запроса.
+    """
+    threshold = Case(
+        *(
+            When(currency_id=currency_id, then=Value(value))
+            for currency_id, value in thresholds.items()
+        ),
+        output_field=IntegerField(),
+    )
+    currency = {"partition_by": F("currency_id")}
+    return rates.annotate(
+        **get_analytics_fields(
+            threshold,
+            Window(Min("value"), **currency),
+            Window(Max("value"), **currency),
+            numeric,
+        )
+    )
+
+
+def get_analytics_fields(
+    threshold: int | Expression,
+    min_value: Expression,
+    max_value: Expression,
+    numeric: bool,
+) -> dict[str, Expression]:
+    """Поля аналитики котировки по порогу, минимуму и максимуму периода."""
+    ratio = Round(F("value") * 100 / threshold, 2)
+    return {
+        "percentage_ratio": (
+            Cast(ratio, FloatField())
+            if numeric
+            else Concat(Cast(ratio, CharField()), Value("%"))
+        ),
+        "is_threshold_exceeded": ExpressionWrapper(
+            Q(value__gt=threshold), output_field=BooleanField()
+        ),
+        "threshold_match_type": Case(
+            When(value__gt=threshold, then=Value("exceeded")),
+            When(value__lt=threshold, then=Value("less")),
+            default=Value("equal"),
+        ),
+        "is_min_value": ExpressionWrapper(
+            Q(value=min_value), output_field=BooleanField()
+        ),
+        "is_max_value": ExpressionWrapper(
+            Q(value=max_value), output_field=BooleanField()
+        ),
+    }
@@ -1,8 +1,17 @@
 """Конфиг приложения."""
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     """Регистрация приложения."""
 
     name = "api"
+
+    def ready(self) -> None:
+        """Подключить учет запросов и загрузить справочник валют."""
+        from api.catalog import currency_catalog
+        from api.instrumentation import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
+        currency_catalog.warm_up()
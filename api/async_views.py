@@ -0,0 +1,214 @@
+"""Модуль с асинхронными обработчиками запросов на чтение.
+
+Используются при запуске через ASGI сервер (ASYNC_VIEWS): запросы к базе
+и кэшу не занимают поток на время ожидания ответа.
+"""
+from typing import Any, Callable, Optional
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.cache import LATEST_RATES_VERSION, aget_or_load, get_user_version
+from api.models import AppUser
+from api.pagination import KeysetPagination
+from api.renderers import encoded_response
+from api.repository import (
+    get_all_currencies,
+    get_currency,
+    get_latest_rates,
+    get_user_latest_rates,
+)
+from api.streaming import STREAM_QUERY_PARAM, aiter_queryset, astream_json
+from api.views import (
+    ANALYTICS_CACHE_SCOPE,
+    CURRENCY_NOT_FOUND_ERROR,
+    TRACKED_RATES_CACHE_SCOPE,
+    AnaliticsView,
+    CurrencyView,
+    RatesView,
+    add_statistics,
+    get_analytics_params,
+    get_analytics_rates,
+    get_order_by,
+    get_page_params,
+    get_statistics_windows,
+    is_query_flag_set,
+)
+
+
+class AsyncView(View):
+    """Базовый класс асинхронных обработчиков.
+
+    Как и APIView, не проверяет CSRF: пользователь определяется по JWT.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs: Any) -> Callable:
+        """Обработчик запросов без проверки CSRF."""
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+
+class AsyncRatesView(AsyncView):
+    """Класс для работы с котировками."""
+
+    query_budget = RatesView.query_budget
+
+    async def get(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        """Получение списка последних котировок валют."""
+        try:
+            user = await aauthenticate(request)
+        except AuthenticationFailed as exc:
+            return get_authentication_failed_response(request, exc)
+
+        order_by = get_order_by(request.GET.get("order_by"))
+        paginator = KeysetPagination()
+        if not user:
+            rates = await paginator.apaginate_queryset(
+                get_latest_rates(order_by), request
+            )
+            return encoded_response(
+                request, paginator.get_paginated_data("rates", rates)
+            )
+
+        async def get_rates_page() -> dict:
+            """Страница котировок отслеживаемых пользователем валют."""
+            trackable_rates = await paginator.apaginate_queryset(
+                get_user_latest_rates(user.id, order_by), request
+            )
+            return paginator.get_paginated_data("rates", trackable_rates)
+
+        return encoded_response(
+            request,
+            await aget_or_load(
+                TRACKED_RATES_CACHE_SCOPE,
+                [get_user_version(user.id), LATEST_RATES_VERSION],
+                {
+                    "user_id": user.id,
+                    "order_by": order_by,
+                    **get_page_params(paginator, request),
+                },
+                get_rates_page,
+            ),
+        )
+
+    async def post(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        """Добавление котируемой валюты в список отслеживаемых."""
+        return await sync_to_async(RatesView.as_view())(
+            request, *args, **kwargs
+        )
+
+
+class AsyncAnaliticsView(AsyncView):
+    """Класс для работы с аналитикой котировок."""
+
+    query_budget = AnaliticsView.query_budget
+
+    async def get(
+        self,
+        request: HttpRequest,
+        id: int,  # noqa A002
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        """Получение аналитических данных по котирумой валюте за период."""
+        if not (target_currency := await sync_to_async(get_currency)(id)):
+            return encoded_response(
+                request,
+                {"errors": CURRENCY_NOT_FOUND_ERROR},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        try:
+            params = get_analytics_params(request)
+            windows = get_statistics_windows(request)
+        except ValueError as exc:
+            return encoded_response(
+                request,
+                {"errors": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if is_query_flag_set(request, STREAM_QUERY_PARAM):
+            return astream_json(
+                "rates",
+                aiter_queryset(
+                    get_analytics_rates(target_currency.charcode, **params)
+                ),
+            )
+
+        paginator = KeysetPagination()
+
+        async def get_rates_page() -> dict:
+            """Страница аналитики с курсорами соседних страниц."""
+            target_rates = await paginator.apaginate_queryset(
+                get_analytics_rates(target_currency.charcode, **params),
+                request,
+            )
+            data = paginator.get_paginated_data("rates", target_rates)
+            if windows is None:
+                return data
+            return await sync_to_async(add_statistics)(
+                data, target_currency.charcode, params, windows
+            )
+
+        return encoded_response(
+            request,
+            await aget_or_load(
+                ANALYTICS_CACHE_SCOPE,
+                [target_currency.charcode],
+                {
+                    **params,
+                    **get_page_params(paginator, request),
+                    "windows": windows,
+                },
+                get_rates_page,
+            ),
+        )
+
+
+class AsyncCurrencyView(AsyncView):
+    """Класс для работы с валютами."""
+
+    query_budget = CurrencyView.query_budget
+
+    async def get(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        """Получение всех валют."""
+        return encoded_response(
+            request,
+            {
+                "currencies": {
+                    str(currency.id): currency.charcode
+                    for currency in await sync_to_async(get_all_currencies)()
+                }
+            },
+        )
+
+
+async def aauthenticate(request: HttpRequest) -> Optional[AppUser]:
+    """Определить пользователя по JWT из заголовка Authorization."""
+    authenticate = sync_to_async(JWTAuthentication().authenticate)
+    if not (result := await authenticate(request)):
+        return None
+    return result[0]
+
+
+def get_authentication_failed_response(
+    request: HttpRequest, exc: AuthenticationFailed
+) -> HttpResponse:
+    """Ответ на неверный токен в формате ошибок DRF."""
+    return encoded_response(
+        request,
+        exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail},
+        status=exc.status_code,
+    )
@@ -0,0 +1,55 @@
+"""Модуль с массовой загрузкой строк в базу данных через COPY."""
+import csv
+import io
+from typing import Iterable, Iterator, Sequence
+
+from django.db import connection
+
+
+class RowsFile:
+    """Файловый объект с CSV строками для COPY.
+
+    Строки формируются по мере чтения, поэтому память не зависит от их
+    количества.
+    """
+
+    def __init__(self, rows: Iterable[Sequence]) -> None:
+        """Инициализация файла по итератору строк."""
+        self.rows_count = 0
+        self._rows: Iterator[Sequence] = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def read(self, size: int = -1) -> str:
+        """Прочитать не более size символов, при size < 0 - все строки."""
+        while size < 0 or self._buffer.tell() < size:
+            try:
+                row = next(self._rows)
+            except StopIteration:
+                break
+            self._writer.writerow(row)
+            self.rows_count += 1
+
+        data = self._buffer.getvalue()
+        if size < 0:
+            size = len(data)
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._buffer.write(data[size:])
+        return data[:size]
+
+
+def copy_rows(table: str, columns: Sequence[str], rows: Iterable) -> int:
+    """Загрузить строки в таблицу через COPY, вернуть их количество.
+
+    Пустые значения (None) загружаются как NULL, ошибки базы данных
+    приводятся к исключениям Django, как и для остальных запросов.
+    """
+    rows_file = RowsFile(rows)
+    with connection.cursor() as cursor, connection.wrap_database_errors:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) "  # noqa S608
+            "FROM STDIN WITH (FORMAT csv)",
+            rows_file,
+        )
+    return rows_file.rows_count
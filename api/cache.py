@@ -0,0 +1,135 @@
+"""Модуль с кэшированием данных по версиям их изменения."""
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Iterable
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.metrics import CACHE_REQUESTS
+from rates.settings import CACHE_TIMEOUT
+
+DATA_VERSION_KEY = "rates:version:{name}"
+CACHE_KEY = "rates:{scope}:{key}"
+CACHE_STATS_KEY = "rates:stats:{scope}:{result}"
+CACHE_RESULTS = ("hits", "misses")
+LATEST_RATES_VERSION = "latest"
+MISSING = object()
+
+
+def get_user_version(user_id: int) -> str:
+    """Имя версии данных пользователя."""
+    return f"user:{user_id}"
+
+
+def get_data_versions(names: Iterable[str]) -> dict[str, int]:
+    """Получить версии данных: котировок валюты, пользователя и т.п.
+
+    Начальная версия - текущее время, поэтому после вытеснения ключа
+    версии из кэша старые записи не становятся снова актуальными.
+    """
+    keys = {DATA_VERSION_KEY.format(name=name): name for name in names}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, time.time_ns(), None)
+        versions[key] = cache.get(key)
+    return {name: versions[key] for key, name in keys.items()}
+
+
+async def aget_data_versions(names: Iterable[str]) -> dict[str, int]:
+    """Асинхронно получить версии данных."""
+    keys = {DATA_VERSION_KEY.format(name=name): name for name in names}
+    versions = await cache.aget_many(keys)
+    for key in keys.keys() - versions.keys():
+        await cache.aadd(key, time.time_ns(), None)
+        versions[key] = await cache.aget(key)
+    return {name: versions[key] for key, name in keys.items()}
+
+
+def bump_data_versions(names: Iterable[str]) -> None:
+    """Сменить версии данных, сделав неактуальными зависящие записи."""
+    for name in names:
+        key = DATA_VERSION_KEY.format(name=name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def get_or_load(
+    scope: str,
+    versions: Iterable[str],
+    params: dict,
+    loader: Callable[[], Any],
+) -> Any:
+    """Получить данные из кэша или загрузить и сохранить их.
+
+    Ключ включает версии данных, от которых зависит результат, поэтому
+    записи актуальны до смены любой из этих версий.
+    """
+    key = get_cache_key(scope, get_data_versions(versions), params)
+    if (data := cache.get(key, MISSING)) is not MISSING:
+        count_cache_result(scope, "hits")
+        return data
+
+    count_cache_result(scope, "misses")
+    data = loader()
+    cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+async def aget_or_load(
+    scope: str,
+    versions: Iterable[str],
+    params: dict,
+    loader: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Асинхронно получить данные из кэша или загрузить и сохранить их."""
+    key = get_cache_key(scope, await aget_data_versions(versions), params)
+    if (data := await cache.aget(key, MISSING)) is not MISSING:
+        await acount_cache_result(scope, "hits")
+        return data
+
+    await acount_cache_result(scope, "misses")
+    data = await loader()
+    await cache.aset(key, data, CACHE_TIMEOUT)
+    return data
+
+
+def get_cache_key(scope: str, versions: dict[str, int], params: dict) -> str:
+    """Ключ кэша по версиям данных и параметрам запроса."""
+    return CACHE_KEY.format(
+        scope=scope,
+        key=hashlib.md5(
+            json.dumps(
+                [versions, params], sort_keys=True, cls=DjangoJSONEncoder
+            ).encode()
+        ).hexdigest(),
+    )
+
+
+def count_cache_result(scope: str, result: str) -> None:
+    """Увеличить счетчик попаданий или промахов кэша."""
+    key = CACHE_STATS_KEY.format(scope=scope, result=result)
+    cache.add(key, 0, None)
+    cache.incr(key)
+    CACHE_REQUESTS.labels(scope, result).inc()
+
+
+async def acount_cache_result(scope: str, result: str) -> None:
+    """Асинхронно увеличить счетчик попаданий или промахов кэша."""
+    key = CACHE_STATS_KEY.format(scope=scope, result=result)
+    await cache.aadd(key, 0, None)
+    await cache.aincr(key)
+    CACHE_REQUESTS.labels(scope, result).inc()
+
+
+def get_cache_stats(scope: str) -> dict[str, int]:
+    """Получить счетчики попаданий и промахов кэша."""
+    keys = {
+        CACHE_STATS_KEY.format(scope=scope, result=result): result
+        for result in CACHE_RESULTS
+    }
+    stats = cache.get_many(keys)
+    return {result: stats.get(key, 0) for key, result in keys.items()}
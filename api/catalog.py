@@ -0,0 +1,126 @@
+"""Модуль со справочником валют в памяти процесса."""
+import os
+import threading
+import time
+from typing import Optional
+
+import redis
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import DatabaseError
+from loguru import logger
+
+from api.models import Currency
+from rates.settings import REDIS_HOST, REDIS_PORT
+
+CATALOG_CHANNEL = "rates:currency_catalog"
+RECONNECT_DELAY = 5
+
+
+class CurrencyCatalog:
+    """Справочник валют id -> charcode и charcode -> id.
+
+    Загружается один раз на процесс и сбрасывается по сообщению в канал
+    Redis, которое публикует любой процесс, изменивший валюты. После
+    fork процесс заново подписывается на канал и загружает справочник.
+    """
+
+    def __init__(self) -> None:
+        """Инициализация справочника."""
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._generation = 0
+        self._data: Optional[tuple[dict[int, str], dict[str, int]]] = None
+
+    def warm_up(self) -> None:
+        """Загрузить справочник, если база данных уже доступна."""
+        try:
+            self.get_charcodes()
+        except SynchronousOnlyOperation:
+            # приложение загружается в цикле событий ASGI сервера,
+            # справочник будет загружен при первом запросе
+            return
+        except DatabaseError as exc:
+            logger.warning("currency catalog is not warmed up: {}", exc)
+
+    def get_charcodes(self) -> dict[int, str]:
+        """Коды валют по id."""
+        return self._get_data()[0]
+
+    def get_charcode(self, currency_id: int) -> Optional[str]:
+        """Код валюты по id."""
+        return self._get_data()[0].get(currency_id)
+
+    def get_id(self, charcode: str) -> Optional[int]:
+        """Id валюты по коду."""
+        return self._get_data()[1].get(charcode)
+
+    def invalidate(self) -> None:
+        """Сбросить справочник текущего процесса."""
+        with self._lock:
+            self._generation += 1
+            self._data = None
+
+    def publish_change(self) -> None:
+        """Сбросить справочник во всех процессах."""
+        self.invalidate()
+        try:
+            get_redis().publish(CATALOG_CHANNEL, os.getpid())
+        except redis.RedisError as exc:
+            logger.error("currency catalog change is not published: {}", exc)
+
+    def _get_data(self) -> tuple[dict[int, str], dict[str, int]]:
+        """Справочник, загружаемый при первом обращении."""
+        self._ensure_listener()
+        if (data := self._data) is not None:
+            return data
+
+        generation = self._generation
+        by_id = dict(
+            Currency.objects.order_by("id").values_list("id", "charcode")
+        )
+        data = by_id, {charcode: id_ for id_, charcode in by_id.items()}
+        with self._lock:
+            # справочник не сохраняется, если был сброшен во время загрузки
+            if generation == self._generation:
+                self._data = data
+        return data
+
+    def _ensure_listener(self) -> None:
+        """Подписаться на изменения валют в текущем процессе."""
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._generation += 1
+            self._data = None
+        threading.Thread(
+            target=self._listen, name="currency-catalog", daemon=True
+        ).start()
+
+    def _listen(self) -> None:
+        """Сбрасывать справочник по сообщениям об изменении валют.
+
+        Справочник сбрасывается и по подтверждению подписки: сообщения,
+        опубликованные до него - при запуске процесса или пока не было
+        соединения - теряются, а справочник мог быть загружен раньше.
+        """
+        while True:
+            try:
+                pubsub = get_redis().pubsub()
+                pubsub.subscribe(CATALOG_CHANNEL)
+                for _ in pubsub.listen():
+                    self.invalidate()
+            except redis.RedisError as exc:
+                logger.warning("currency catalog listener failed: {}", exc)
+                time.sleep(RECONNECT_DELAY)
+
+
+def get_redis() -> redis.Redis:
+    """Клиент Redis."""
+    return redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+
+
+currency_catalog = CurrencyCatalog()
@@ -0,0 +1,119 @@
+"""Модуль клиента API ЦБ РФ."""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http import HTTPStatus
+from typing import Iterable, Optional
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from api.metrics import FETCH_DURATION
+from rates.settings import (
+    API_FETCH_CONCURRENCY,
+    API_REQUEST_RETRIES,
+    API_REQUEST_TIMEOUT,
+    API_RETRY_BACKOFF,
+    API_RETRY_STATUSES,
+    URL_ARCHIVE_RATES_BASE,
+    URL_ARCHIVE_RATES_SUFFIX,
+    URL_DAILY_RATES,
+)
+
+
+def get_session(pool_size: int = API_FETCH_CONCURRENCY) -> requests.Session:
+    """Создать сессию с пулом keep-alive соединений и повтором запросов."""
+    retry = Retry(
+        total=API_REQUEST_RETRIES,
+        backoff_factor=API_RETRY_BACKOFF,
+        status_forcelist=API_RETRY_STATUSES,
+        allowed_methods=["GET"],
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_rates_url(target_date: date, current_date: date) -> str:
+    """Получить адрес котировок ЦБ РФ за дату."""
+    if target_date == current_date:
+        return URL_DAILY_RATES
+
+    day = datetime.strftime(target_date, "%Y/%m/%d")
+    return f"{URL_ARCHIVE_RATES_BASE}/{day}/{URL_ARCHIVE_RATES_SUFFIX}"
+
+
+def get_content_from_api(
+    url: str, session: Optional[requests.Session] = None
+) -> Optional[bytes]:
+    """Получить тело ответа API ЦБ РФ.
+
+    None означает, что котировки на дату не устанавливались.
+    """
+    source = "daily" if url == URL_DAILY_RATES else "archive"
+    with FETCH_DURATION.labels(source).time():
+        response = (session or requests).get(url, timeout=API_REQUEST_TIMEOUT)
+    if response.status_code == HTTPStatus.NOT_FOUND:
+        return None
+
+    response.raise_for_status()
+    return response.content
+
+
+def get_timed_content_from_api(
+    url: str, session: Optional[requests.Session] = None
+) -> tuple[Optional[bytes], float]:
+    """Получить тело ответа API ЦБ РФ и время запроса в секундах."""
+    started = time.perf_counter()
+    content = get_content_from_api(url, session)
+    return content, time.perf_counter() - started
+
+
+def parse_rates(content: Optional[bytes]) -> dict:
+    """Разобрать котировки из тела ответа API ЦБ РФ.
+
+    Пустой словарь означает, что котировки на дату не устанавливались.
+    """
+    if content is None:
+        return {}
+    return json.loads(content)
+
+
+def fetch_contents(
+    dates: Iterable[date], concurrency: int = API_FETCH_CONCURRENCY
+) -> tuple[dict[date, Optional[bytes]], dict[date, str], dict[date, float]]:
+    """Параллельно загрузить ответы API ЦБ РФ за даты без разбора.
+
+    Возвращает тела ответов, ошибки загрузки и время запросов по датам.
+    """
+    current_date = date.today()
+    with get_session(concurrency) as session, ThreadPoolExecutor(
+        max_workers=concurrency
+    ) as executor:
+        futures = {
+            target_date: executor.submit(
+                get_timed_content_from_api,
+                get_rates_url(target_date, current_date),
+                session,
+            )
+            for target_date in dates
+        }
+
+    contents, errors, durations = {}, {}, {}
+    for target_date, future in futures.items():
+        try:
+            contents[target_date], durations[target_date] = future.result()
+        except Exception as exc:
+            logger.error(
+                f"failed to load rates from url "
+                f"{get_rates_url(target_date, current_date)} for date "
+                f"{str(target_date)}: {exc}"
+            )
+            errors[target_date] = str(exc)
+
+    return contents, errors, durations
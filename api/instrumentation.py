@@ -0,0 +1,106 @@
+"""Модуль со сбором статистики запросов к базе данных.
+
+Обертка выполнения запросов устанавливается на каждое соединение с базой
+данных и учитывает запросы в текущем сборщике. Сборщик хранится в
+переменной контекста, поэтому учитываются и запросы асинхронных
+обработчиков, выполняемые в потоках sync_to_async.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+
+class QueriesStats:
+    """Статистика запросов к базе данных.
+
+    Запросы учитываются и во внешнем сборщике, поэтому сборщики могут
+    быть вложенными.
+    """
+
+    def __init__(self, parent: Optional["QueriesStats"] = None) -> None:
+        """Инициализация пустой статистики."""
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        # текст запроса с параметрами-заполнителями: количество и время
+        self.statements: dict[str, list] = {}
+
+    def add(self, sql: str, duration: float) -> None:
+        """Учесть выполненный запрос."""
+        self.count += 1
+        self.duration += duration
+        stats = self.statements.setdefault(sql, [0, 0.0])
+        stats[0] += 1
+        stats[1] += duration
+        if self.parent:
+            self.parent.add(sql, duration)
+
+    def get_repeated(self, min_count: int) -> list[tuple[str, int]]:
+        """Одинаковые запросы, выполненные не менее min_count раз (N+1)."""
+        return sorted(
+            (
+                (sql, count)
+                for sql, (count, _) in self.statements.items()
+                if count >= min_count
+            ),
+            key=lambda statement: -statement[1],
+        )
+
+    def get_slowest(self, limit: int) -> list[tuple[str, int, float]]:
+        """Запросы с наибольшим суммарным временем выполнения."""
+        return sorted(
+            (
+                (sql, count, duration)
+                for sql, (count, duration) in self.statements.items()
+            ),
+            key=lambda statement: -statement[2],
+        )[:limit]
+
+
+current_stats: ContextVar[Optional[QueriesStats]] = ContextVar(
+    "current_stats", default=None
+)
+
+
+@contextmanager
+def collect_queries() -> Iterator[QueriesStats]:
+    """Собрать статистику запросов к базе данных внутри блока."""
+    stats = QueriesStats(current_stats.get())
+    token = current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_stats.reset(token)
+
+
+def record_query(
+    execute: Callable,
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict,
+) -> Any:
+    """Обертка выполнения запроса, учитывающая его в текущем сборщике."""
+    if (stats := current_stats.get()) is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(
+    sender: type, connection: BaseDatabaseWrapper, **kwargs: Any
+) -> None:
+    """Установить обертку запросов на новое соединение с базой данных.
+
+    Обработчик сигнала connection_created; обертки хранятся в объекте
+    соединения потока и сохраняются при переподключении.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
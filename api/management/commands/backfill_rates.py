@@ -0,0 +1,45 @@
+"""Модуль с командой исторической загрузки котировок."""
+from datetime import date
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+from api.tasks import resume_backfills, start_backfill
+
+
+class Command(BaseCommand):
+    """Команда исторической загрузки котировок за период."""
+
+    help = "backfill rates for a period"  # noqa A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Аргументы команды."""
+        parser.add_argument("--date-from", type=date.fromisoformat)
+        parser.add_argument(
+            "--date-to", type=date.fromisoformat, help="default: today"
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="continue interrupted backfills",
+        )
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        """Точка входа команды."""
+        if options["resume"]:
+            self.stdout.write("resume backfills...")
+            resume_backfills()
+            return
+
+        date_from = options["date_from"]
+        date_to = options["date_to"] or date.today()
+        if not date_from:
+            raise CommandError("'--date-from' or '--resume' required")
+        if date_from > date_to:
+            raise CommandError("'--date-from' must not exceed '--date-to'")
+
+        self.stdout.write(f"backfill rates from {date_from} to {date_to}...")
+        start_backfill(date_from, date_to)
@@ -0,0 +1,25 @@
+"""Модуль с командой вывода статистики кэша."""
+from django.core.management.base import BaseCommand, CommandParser
+
+from api.cache import get_cache_stats
+from api.views import ANALYTICS_CACHE_SCOPE
+
+
+class Command(BaseCommand):
+    """Команда вывода счетчиков попаданий и промахов кэша."""
+
+    help = "show cache hit/miss counters"  # noqa A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Аргументы команды."""
+        parser.add_argument("--scope", default=ANALYTICS_CACHE_SCOPE)
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        """Точка входа команды."""
+        stats = get_cache_stats(options["scope"])
+        total = sum(stats.values())
+        ratio = stats["hits"] / total if total else 0
+        self.stdout.write(
+            f"{options['scope']}: hits={stats['hits']} "
+            f"misses={stats['misses']} hit_ratio={ratio:.2%}"
+        )
@@ -7,6 +7,12 @@ from rates.settings import (
     MINUTE_TO_RUN_PERIODIC_TASK,
 )
 
+PERIODIC_TASKS = [
+    "download_rates",
+    "retry_failed_rates",
+    "create_rates_partitions",
+]
+
 
 class Command(BaseCommand):
     """Команда генерации периодических задач."""
@@ -16,16 +22,13 @@ class Command(BaseCommand):
     def handle(self, *args: tuple, **options: dict) -> None:
         """Точка входа команды."""
         self.stdout.write("generate periodic tasks...")
-        self.task_download_rates()
+        for task in PERIODIC_TASKS:
+            self.create_periodic_task(task)
 
-    def task_download_rates(self) -> None:
-        """Создать периодическую задачу загрузки курсов валют."""
+    def create_periodic_task(self, task: str) -> None:
+        """Создать ежедневную периодическую задачу, если её ещё нет."""
         schedule, _ = CrontabSchedule.objects.get_or_create(
             hour=HOUR_TO_RUN_PERIODIC_TASK, minute=MINUTE_TO_RUN_PERIODIC_TASK
         )
-        if not PeriodicTask.objects.filter(name="download_rates"):
-            PeriodicTask.objects.create(
-                crontab=schedule,
-                name="download_rates",
-                task="download_rates",
-            )
+        if not PeriodicTask.objects.filter(name=task):
+            PeriodicTask.objects.create(crontab=schedule, name=task, task=task)
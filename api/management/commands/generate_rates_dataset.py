@@ -0,0 +1,169 @@
+"""Модуль с командой генерации синтетического набора котировок."""
+import random
+import uuid
+from datetime import date, timedelta
+from typing import Iterator
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.db import connection
+
+from api.repository import (
+    copy_rates,
+    copy_user_currencies,
+    create_or_update_currency,
+    create_users,
+    get_all_currencies,
+    get_latest_values,
+    refresh_latest_rates,
+    refresh_rates_rollups_by_years,
+)
+
+# валюты ЦБ РФ на случай пустого справочника
+DEFAULT_CHARCODES = (
+    "AUD",
+    "AZN",
+    "GBP",
+    "AMD",
+    "BYN",
+    "BGN",
+    "BRL",
+    "HUF",
+    "VND",
+    "HKD",
+    "GEL",
+    "DKK",
+    "AED",
+    "USD",
+    "EUR",
+    "EGP",
+    "INR",
+    "IDR",
+    "KZT",
+    "CAD",
+    "QAR",
+    "KGS",
+    "CNY",
+    "MDL",
+    "NZD",
+    "NOK",
+    "PLN",
+    "RON",
+    "XDR",
+    "SGD",
+    "TJS",
+    "THB",
+    "TRY",
+    "TMT",
+    "UZS",
+    "UAH",
+    "CZK",
+    "SEK",
+    "CHF",
+    "RSD",
+    "ZAR",
+    "KRW",
+    "JPY",
+)
+USER_PASSWORD = "password"  # noqa S105
+
+
+class Command(BaseCommand):
+    """Команда генерации котировок за годы и пользователей с валютами.
+
+    Котировки - случайное блуждание по рабочим дням для каждой валюты
+    справочника, загружаются через COPY. Уже загруженные котировки не
+    перезаписываются.
+    """
+
+    help = "generate rates, users and tracked currencies"  # noqa A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Аргументы команды."""
+        parser.add_argument("--years", type=int, default=10)
+        parser.add_argument(
+            "--date-to", type=date.fromisoformat, help="default: today"
+        )
+        parser.add_argument(
+            "--currencies",
+            type=int,
+            help="use only first n currencies of catalog",
+        )
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--currencies-per-user", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        """Точка входа команды."""
+        if options["years"] < 1:
+            raise CommandError("'--years' must be positive")
+
+        if not get_all_currencies():
+            for charcode in DEFAULT_CHARCODES:
+                create_or_update_currency(charcode)
+        charcodes = sorted(
+            currency.charcode for currency in get_all_currencies()
+        )[: options["currencies"]]
+        per_user = min(options["currencies_per_user"], len(charcodes))
+        date_to = options["date_to"] or date.today()
+        date_from = date_to - timedelta(days=round(365.25 * options["years"]))
+        rng = random.Random(options["seed"])
+
+        self.stdout.write(
+            f"generate rates of {len(charcodes)} currencies "
+            f"from {date_from} to {date_to}..."
+        )
+        created = copy_rates(
+            generate_rates(charcodes, date_from, date_to, rng)
+        )
+        self.stdout.write(f"created {created} rates")
+
+        refresh_latest_rates(charcodes)
+        latest_values = get_latest_values(charcodes)
+        refresh_rates_rollups_by_years(charcodes, date_from, date_to)
+
+        self.stdout.write(f"generate {options['users']} users...")
+        user_ids = create_users(
+            (
+                f"user-{uuid.uuid4().hex[:12]}@example.com"
+                for _ in range(options["users"])
+            ),
+            make_password(USER_PASSWORD),
+        )
+        created = copy_user_currencies(
+            (
+                user_id,
+                charcode,
+                round(float(latest_values[charcode]) * rng.uniform(0.8, 1.2)),
+            )
+            for user_id in user_ids
+            for charcode in rng.sample(charcodes, per_user)
+        )
+        self.stdout.write(f"created {created} tracked currencies")
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+
+def generate_rates(
+    charcodes: list[str],
+    date_from: date,
+    date_to: date,
+    rng: random.Random,
+) -> Iterator[tuple]:
+    """Котировки валют по рабочим дням периода.
+
+    Значения меняются за день в среднем на полпроцента.
+    """
+    for charcode in charcodes:
+        value = rng.uniform(1, 100)
+        day = date_from
+        while day <= date_to:
+            if day.weekday() < 5:
+                value *= 1 + rng.gauss(0, 0.005)
+                yield charcode, day, f"{value:.4f}"
+            day += timedelta(days=1)
@@ -0,0 +1,225 @@
+"""Модуль с командой импорта исторических котировок из файлов."""
+import csv
+import gzip
+import json
+import os
+import time
+from datetime import date
+from decimal import Decimal
+from itertools import chain, islice
+from typing import IO, Callable, Iterable, Iterator
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.db import DataError
+
+from api.cache import LATEST_RATES_VERSION, bump_data_versions
+from api.repository import (
+    copy_rates,
+    refresh_latest_rates,
+    refresh_rates_rollups_by_years,
+)
+from api.tasks import get_rates_date
+from rates.settings import CURRENCY_KEY_IN_API
+
+BATCH_SIZE = 50_000
+READ_CHUNK_SIZE = 64 * 1024
+# ответ ЦБ РФ за день - десятки килобайт, больший остаток - ошибка формата
+MAX_DOCUMENT_SIZE = 1024 * 1024
+
+
+def read_cbr_rates(file: IO[str]) -> Iterator[tuple]:
+    """Котировки из ответов API ЦБ РФ за дни, записанных подряд.
+
+    Ответы читаются по одному, поэтому в памяти только текущий ответ.
+    """
+    decoder = json.JSONDecoder(parse_float=Decimal)
+    buffer = ""
+    for chunk in iter(lambda: file.read(READ_CHUNK_SIZE), ""):
+        buffer += chunk
+        while buffer := buffer.lstrip():
+            try:
+                rates, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                break
+            buffer = buffer[end:]
+            if not (rates_date := get_rates_date(rates)):
+                raise CommandError("CBR rates document without Date")
+            for charcode, currency in rates.get(
+                CURRENCY_KEY_IN_API, {}
+            ).items():
+                yield (
+                    charcode,
+                    rates_date,
+                    currency["Value"],
+                    currency.get("Nominal"),
+                )
+        if len(buffer) > MAX_DOCUMENT_SIZE:
+            raise CommandError("invalid CBR rates document")
+    if buffer:
+        raise CommandError("invalid CBR rates document at the end of file")
+
+
+def read_csv_rates(file: IO[str]) -> Iterator[tuple]:
+    """Котировки из CSV со столбцами charcode, date, value и nominal."""
+    for line, row in enumerate(csv.DictReader(file), start=2):
+        yield parse_row(row, line)
+
+
+def read_jsonl_rates(file: IO[str]) -> Iterator[tuple]:
+    """Котировки из JSON Lines с полями charcode, date, value и nominal."""
+    for line, content in enumerate(file, start=1):
+        if not content.strip():
+            continue
+        try:
+            row = json.loads(content, parse_float=Decimal)
+        except ValueError as exc:
+            raise CommandError(f"invalid JSON at line {line}: {exc}") from exc
+        yield parse_row(row, line)
+
+
+def parse_row(row: dict, line: int) -> tuple:
+    """Котировка (charcode, date, value, nominal) из строки файла."""
+    try:
+        return (
+            row["charcode"],
+            date.fromisoformat(row["date"][:10]),
+            row["value"],
+            row.get("nominal") or None,
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        raise CommandError(f"invalid rate at line {line}: {exc!r}") from exc
+
+
+READERS: dict[str, Callable[[IO[str]], Iterator[tuple]]] = {
+    "cbr": read_cbr_rates,
+    "csv": read_csv_rates,
+    "jsonl": read_jsonl_rates,
+}
+SUFFIXES = {".json": "cbr", ".js": "cbr", ".csv": "csv", ".jsonl": "jsonl"}
+
+
+def get_files(paths: Iterable[str]) -> Iterator[str]:
+    """Файлы по путям, файлы каталога - по порядку имен."""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from (
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if os.path.isfile(os.path.join(path, name))
+            )
+        else:
+            yield path
+
+
+def get_format(path: str) -> str:
+    """Формат файла по расширению, сжатые gzip файлы - по предыдущему."""
+    name = path.removesuffix(".gz")
+    suffix = os.path.splitext(name)[1].lower()
+    if suffix not in SUFFIXES:
+        raise CommandError(f"unknown format of {path}, use '--format'")
+    return SUFFIXES[suffix]
+
+
+def open_file(path: str) -> IO[str]:
+    """Открыть файл на чтение, сжатый gzip - с распаковкой на лету."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")  # noqa SIM115
+
+
+def split_batches(rows: Iterable, size: int) -> Iterator[Iterator]:
+    """Разбить поток строк на порции без их накопления в памяти.
+
+    Порция должна быть прочитана до получения следующей.
+    """
+    rows = iter(rows)
+    for first in rows:
+        yield chain([first], islice(rows, size - 1))
+
+
+class ImportStats:
+    """Прочитанные котировки: количество, валюты и период."""
+
+    def __init__(self) -> None:
+        """Инициализация пустой статистики."""
+        self.rows = 0
+        self.charcodes: set[str] = set()
+        self.date_from: date = date.max
+        self.date_to: date = date.min
+
+    def track(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """Учитывать котировки по мере чтения."""
+        for row in rows:
+            charcode, rates_date = row[:2]
+            self.rows += 1
+            self.charcodes.add(charcode)
+            self.date_from = min(self.date_from, rates_date)
+            self.date_to = max(self.date_to, rates_date)
+            yield row
+
+
+class Command(BaseCommand):
+    """Команда импорта исторических котировок через COPY.
+
+    Файлы читаются потоком и загружаются порциями, поэтому память не
+    зависит от размера файлов. Повторы (charcode, date) в файлах и уже
+    загруженные котировки пропускаются.
+    """
+
+    help = "import rates from CBR JSON, CSV or JSONL files"  # noqa A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Аргументы команды."""
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            help="files or directories, gzip files are supported",
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="format of all files instead of detection by extension",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        """Точка входа команды."""
+        if options["batch_size"] < 1:
+            raise CommandError("'--batch-size' must be positive")
+
+        stats = ImportStats()
+        created = 0
+        started = time.perf_counter()
+        for path in get_files(options["paths"]):
+            reader = READERS[options["format"] or get_format(path)]
+            self.stdout.write(f"import rates from {path}...")
+            with open_file(path) as file:
+                for batch in split_batches(
+                    stats.track(reader(file)), options["batch_size"]
+                ):
+                    try:
+                        created += copy_rates(batch)
+                    except DataError as exc:
+                        raise CommandError(f"invalid rates: {exc}") from exc
+        seconds = time.perf_counter() - started
+        rows_per_second = stats.rows / seconds if seconds else 0
+
+        if stats.rows:
+            self.refresh(stats)
+        self.stdout.write(
+            f"read {stats.rows} rates, created {created}, "
+            f"skipped {stats.rows - created} duplicates "
+            f"in {seconds:.1f} s ({rows_per_second:.0f} rows/s)"
+        )
+
+    def refresh(self, stats: ImportStats) -> None:
+        """Обновить последние котировки, агрегаты и версии кэша."""
+        refresh_latest_rates(stats.charcodes)
+        refresh_rates_rollups_by_years(
+            stats.charcodes, stats.date_from, stats.date_to
+        )
+        bump_data_versions([*stats.charcodes, LATEST_RATES_VERSION])
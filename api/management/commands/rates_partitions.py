@@ -0,0 +1,66 @@
+"""Модуль с командой обслуживания секций котировок."""
+from datetime import date
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+
+from api.partitions import (
+    create_rates_partitions,
+    create_upcoming_rates_partitions,
+    detach_rates_partition,
+    get_rates_partitions,
+)
+from rates.settings import RATES_PARTITIONS_AHEAD
+
+
+class Command(BaseCommand):
+    """Команда создания и отсоединения годовых секций котировок."""
+
+    help = "create or detach yearly rates partitions"  # noqa A003
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Аргументы команды."""
+        parser.add_argument(
+            "--years-ahead",
+            type=int,
+            default=RATES_PARTITIONS_AHEAD,
+            help="create partitions for the current and next years",
+        )
+        parser.add_argument(
+            "--year-from",
+            type=int,
+            help="also create partitions since this year",
+        )
+        parser.add_argument(
+            "--detach",
+            type=int,
+            metavar="YEAR",
+            help="detach the partition of a past year for archiving",
+        )
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        """Точка входа команды."""
+        if year := options["detach"]:
+            if year >= date.today().year:
+                raise CommandError("only past years can be detached")
+            if year not in get_rates_partitions():
+                raise CommandError(f"no rates partition for {year}")
+            name = detach_rates_partition(year)
+            self.stdout.write(f"detached {name}")
+            return
+
+        if options["years_ahead"] < 0:
+            raise CommandError("'--years-ahead' must not be negative")
+        created = create_upcoming_rates_partitions(options["years_ahead"])
+        if year_from := options["year_from"]:
+            created += create_rates_partitions(
+                range(year_from, date.today().year)
+            )
+        for name in created:
+            self.stdout.write(f"created {name}")
+        self.stdout.write(
+            f"rates partitions: {', '.join(get_rates_partitions().values())}"
+        )
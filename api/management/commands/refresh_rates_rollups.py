@@ -0,0 +1,25 @@
+"""Модуль с командой пересчета агрегатов котировок."""
+from django.core.management.base import BaseCommand
+
+from api.repository import (
+    get_rates_charcodes_period,
+    refresh_rates_rollups_by_years,
+)
+
+
+class Command(BaseCommand):
+    """Команда пересчета агрегатов котировок за всю историю."""
+
+    help = "refresh weekly, monthly and yearly rates rollups"  # noqa A003
+
+    def handle(self, *args: tuple, **options: dict) -> None:
+        """Точка входа команды."""
+        charcodes, date_from, date_to = get_rates_charcodes_period()
+        if not charcodes:
+            self.stdout.write("no rates to aggregate")
+            return
+
+        self.stdout.write(
+            f"refresh rates rollups from {date_from} to {date_to}..."
+        )
+        refresh_rates_rollups_by_years(charcodes, date_from, date_to)
@@ -0,0 +1,94 @@
+"""Модуль с метриками API и загрузки котировок в формате Prometheus.
+
+При запуске в нескольких процессах (gunicorn, uvicorn, Celery) задается
+общий каталог PROMETHEUS_MULTIPROC_DIR: процессы пишут в него значения
+метрик, а обработчик /metrics суммирует их по всем процессам.
+"""
+import os
+from typing import Iterator
+
+from django.db import DatabaseError, connection
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+REQUEST_DURATION = Histogram(
+    "rates_http_request_duration_seconds",
+    "API request duration",
+    ["view", "method", "status"],
+)
+RESPONSE_SIZE = Histogram(
+    "rates_http_response_size_bytes",
+    "API response size, streaming responses are not counted",
+    ["view"],
+    buckets=[4**power * 256 for power in range(8)],
+)
+CACHE_REQUESTS = Counter(
+    "rates_cache_requests", "Response cache lookups", ["scope", "result"]
+)
+DOWNLOAD_DURATION = Histogram(
+    "rates_download_duration_seconds",
+    "Duration of download_rates task",
+    buckets=[1, 2.5, 5, 10, 30, 60, 120, 300],
+)
+FETCH_DURATION = Histogram(
+    "rates_fetch_duration_seconds",
+    "CBR API request duration by source: daily or archive",
+    ["source"],
+)
+INGEST_ROWS = Counter("rates_ingest_rows", "Saved rates rows")
+INGEST_FAILURES = Counter("rates_ingest_failures", "Dates failed to load")
+
+
+class DatabaseConnectionsCollector:
+    """Соединения с базой данных приложения по состояниям.
+
+    Считаются при выдаче метрик по pg_stat_activity, поэтому включают
+    соединения всех процессов.
+    """
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        """Получить количество соединений в каждом состоянии."""
+        gauge = GaugeMetricFamily(
+            "rates_db_connections",
+            "Database connections by state",
+            labels=["state"],
+        )
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT coalesce(state, 'unknown'), count(*) "
+                    "FROM pg_stat_activity WHERE datname = current_database() "
+                    "GROUP BY 1"
+                )
+                for state, count in cursor.fetchall():
+                    gauge.add_metric([state], count)
+        except DatabaseError:
+            return
+        yield gauge
+
+
+def get_registry() -> CollectorRegistry:
+    """Реестр метрик процесса или всех процессов общего каталога."""
+    registry = CollectorRegistry()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        MultiProcessCollector(registry)
+    else:
+        registry.register(REGISTRY)
+    registry.register(DatabaseConnectionsCollector())
+    return registry
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Выдать метрики в текстовом формате Prometheus."""
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,160 @@
+"""Модуль с промежуточными обработчиками запросов."""
+import time
+from typing import Callable, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.deprecation import MiddlewareMixin
+from loguru import logger
+
+from api.instrumentation import QueriesStats, collect_queries
+from api.metrics import REQUEST_DURATION, RESPONSE_SIZE
+from rates.settings import (
+    REPEATED_QUERY_THRESHOLD,
+    SLOW_QUERIES_TO_LOG,
+    SLOW_REQUEST_MS,
+)
+
+
+class QueriesMiddleware:
+    """Учет запросов к базе данных в каждом запросе к API.
+
+    Добавляет заголовок Server-Timing со временем запросов к базе данных
+    и всего запроса, пишет в лог повторяющиеся одинаковые запросы (N+1),
+    превышение бюджета запросов обработчика (атрибут query_budget) и
+    медленные запросы к API с самыми долгими запросами к базе данных.
+    Для потоковых ответов учитываются запросы до начала передачи.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        """Инициализация с обработчиком следующего уровня."""
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        """Обработать запрос с учетом запросов к базе данных."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with collect_queries() as stats:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            self.process_stats(
+                request, response, stats, time.perf_counter() - started
+            )
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        """Асинхронно обработать запрос с учетом запросов к базе данных."""
+        with collect_queries() as stats:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            self.process_stats(
+                request, response, stats, time.perf_counter() - started
+            )
+        return response
+
+    def process_stats(
+        self,
+        request: HttpRequest,
+        response: HttpResponseBase,
+        stats: QueriesStats,
+        duration: float,
+    ) -> None:
+        """Добавить Server-Timing и записать в лог проблемные запросы."""
+        response["Server-Timing"] = ", ".join(
+            filter(
+                None,
+                [
+                    response.get("Server-Timing"),
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} '
+                    'queries"',
+                    f"total;dur={duration * 1000:.1f}",
+                ],
+            )
+        )
+
+        for sql, count in stats.get_repeated(REPEATED_QUERY_THRESHOLD):
+            logger.warning(
+                "{} {}: query repeated {} times: {}",
+                request.method,
+                request.path,
+                count,
+                sql,
+            )
+        budget = get_query_budget(request)
+        if budget is not None and stats.count > budget:
+            logger.warning(
+                "{} {}: {} queries exceed budget {}",
+                request.method,
+                request.path,
+                stats.count,
+                budget,
+            )
+        if duration * 1000 >= SLOW_REQUEST_MS:
+            logger.warning(
+                "{} {}: slow request {:.1f} ms, {} queries {:.1f} ms, "
+                "slowest:\n{}",
+                request.method,
+                request.path,
+                duration * 1000,
+                stats.count,
+                stats.duration * 1000,
+                "\n".join(
+                    f"{sql_duration * 1000:.1f} ms x{count}: {sql}"
+                    for sql, count, sql_duration in stats.get_slowest(
+                        SLOW_QUERIES_TO_LOG
+                    )
+                ),
+            )
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """Метрики длительности запросов к API и размера ответов."""
+
+    def process_request(self, request: HttpRequest) -> None:
+        """Запомнить время начала запроса."""
+        request.metrics_started = time.perf_counter()
+
+    def process_response(
+        self, request: HttpRequest, response: HttpResponseBase
+    ) -> HttpResponseBase:
+        """Учесть длительность запроса и размер ответа."""
+        view = get_view_name(request)
+        REQUEST_DURATION.labels(
+            view, request.method, response.status_code
+        ).observe(time.perf_counter() - request.metrics_started)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
+        return response
+
+
+def get_view_class(request: HttpRequest) -> Optional[type]:
+    """Класс обработчика запроса, если запрос сопоставлен с адресом."""
+    if not (resolver_match := getattr(request, "resolver_match", None)):
+        return None
+    return getattr(resolver_match.func, "view_class", None)
+
+
+def get_view_name(request: HttpRequest) -> str:
+    """Имя обработчика запроса для меток метрик."""
+    if view_class := get_view_class(request):
+        return view_class.__name__
+    if resolver_match := getattr(request, "resolver_match", None):
+        return resolver_match.url_name or resolver_match.view_name
+    return "unresolved"
+
+
+def get_query_budget(request: HttpRequest) -> Optional[int]:
+    """Бюджет запросов к базе данных обработчика запроса, если объявлен.
+
+    Атрибут query_budget обработчика - число или словарь по методам HTTP.
+    """
+    budget = getattr(get_view_class(request), "query_budget", None)
+    if isinstance(budget, dict):
+        return budget.get(request.method)
+    return budget
@@ -0,0 +1,33 @@
+"""Модуль с миграциями."""
+# Generated by Django 4.2.30 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        # перед созданием ограничения удаляем дубли котировок,
+        # оставляя запись с наименьшим id
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM api_rates AS duplicate
+                USING api_rates AS original
+                WHERE duplicate.charcode = original.charcode
+                AND duplicate.date = original.date
+                AND duplicate.id > original.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name="rates",
+            constraint=models.UniqueConstraint(
+                fields=("charcode", "date"), name="unique_rates_charcode_date"
+            ),
+        ),
+    ]
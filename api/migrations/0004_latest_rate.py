@@ -0,0 +1,45 @@
+"""Модуль с миграциями."""
+# Generated by Django 4.2.30 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    dependencies = [
+        ("api", "0003_rates_download_backfill"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LatestRate",
+            fields=[
+                (
+                    "charcode",
+                    models.CharField(
+                        max_length=5, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "rate_id",
+                    models.BigIntegerField(help_text="id котировки в Rates"),
+                ),
+                ("date", models.DateTimeField(verbose_name="date")),
+                (
+                    "value",
+                    models.DecimalField(decimal_places=10, max_digits=20),
+                ),
+            ],
+        ),
+        # заполняем таблицу последними котировками уже загруженных валют
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO api_latestrate (charcode, rate_id, date, value)
+                SELECT DISTINCT ON (charcode) charcode, id, date, value
+                FROM api_rates
+                ORDER BY charcode, date DESC
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,22 @@
+"""Модуль с миграциями."""
+# Generated by Django 4.2.30 on 2026-10-18 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    dependencies = [
+        ("api", "0004_latest_rate"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="rates",
+            index=models.Index(
+                fields=["charcode", "value", "id"],
+                name="rates_charcode_value_id_idx",
+            ),
+        ),
+    ]
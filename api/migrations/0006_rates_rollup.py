@@ -0,0 +1,64 @@
+"""Модуль с миграциями."""
+# Generated by Django 4.2.30 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    dependencies = [
+        ("api", "0005_rates_keyset_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatesRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("charcode", models.CharField(max_length=5)),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[
+                            ("week", "Week"),
+                            ("month", "Month"),
+                            ("year", "Year"),
+                        ],
+                        max_length=5,
+                    ),
+                ),
+                ("period_start", models.DateField()),
+                (
+                    "open",
+                    models.DecimalField(decimal_places=10, max_digits=20),
+                ),
+                (
+                    "high",
+                    models.DecimalField(decimal_places=10, max_digits=20),
+                ),
+                ("low", models.DecimalField(decimal_places=10, max_digits=20)),
+                (
+                    "close",
+                    models.DecimalField(decimal_places=10, max_digits=20),
+                ),
+                ("avg", models.DecimalField(decimal_places=10, max_digits=20)),
+                ("count", models.IntegerField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="ratesrollup",
+            constraint=models.UniqueConstraint(
+                fields=("charcode", "granularity", "period_start"),
+                name="unique_rates_rollup_period",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+"""Модуль с миграциями."""
+# Generated by Django 4.2.30 on 2026-10-18 08:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    dependencies = [
+        ("api", "0006_rates_rollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usercurrency",
+            name="latest_rate",
+            field=models.ForeignObject(
+                from_fields=("charcode",),
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="user_currencies",
+                to="api.latestrate",
+                to_fields=("charcode",),
+            ),
+        ),
+        # перед созданием ограничения удаляем дубли отслеживаемых валют,
+        # оставляя последнюю добавленную запись
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM api_usercurrency AS duplicate
+                USING api_usercurrency AS latest
+                WHERE duplicate.user_id = latest.user_id
+                AND duplicate.charcode = latest.charcode
+                AND duplicate.id < latest.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name="usercurrency",
+            constraint=models.UniqueConstraint(
+                fields=("user", "charcode"), name="unique_user_currency"
+            ),
+        ),
+    ]
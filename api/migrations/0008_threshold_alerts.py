@@ -0,0 +1,29 @@
+"""Модуль с миграциями."""
+# Generated by Django 4.2.30 on 2026-10-18 08:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    dependencies = [
+        ("api", "0007_user_currency_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appuser",
+            name="phone",
+            field=models.CharField(
+                blank=True, max_length=20, verbose_name="phone number"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usercurrency",
+            index=models.Index(
+                fields=["charcode", "threshold"],
+                name="user_currency_threshold_idx",
+            ),
+        ),
+    ]
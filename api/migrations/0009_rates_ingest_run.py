@@ -0,0 +1,43 @@
+"""Модуль с миграциями."""
+# Generated by Django 4.2.30 on 2026-10-18 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    dependencies = [
+        ("api", "0008_threshold_alerts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatesIngestRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task", models.CharField(max_length=50)),
+                ("started_at", models.DateTimeField()),
+                ("duration", models.FloatField(help_text="seconds")),
+                ("rows", models.IntegerField(help_text="saved rates")),
+                ("failed_dates", models.IntegerField()),
+                (
+                    "stages",
+                    models.JSONField(help_text="seconds and peak_kb by stage"),
+                ),
+                ("dates", models.JSONField(help_text="stages by date")),
+                (
+                    "cprofile_path",
+                    models.CharField(blank=True, max_length=255),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,427 @@
+"""Модуль с миграциями.
+
+Перевод котировок и отслеживаемых валют на компактную схему: ссылка
+smallint на валюту вместо кода, дата котировки без времени, значения
+numeric(12, 4) по точности котировок ЦБ РФ.
+
+Заполненные таблицы перестраиваются без долгих блокировок: новая
+таблица заполняется порциями по id, изменения старой таблицы на время
+заполнения переносятся в новую триггером, индексы строятся CONCURRENTLY,
+а таблицы меняются местами в короткой транзакции. Обратная миграция не
+поддерживается.
+"""
+# Generated by Django 4.2.30 on 2026-10-18 09:35
+
+from contextlib import contextmanager
+from typing import Iterator
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 50_000
+DEFERRED = "DEFERRABLE INITIALLY DEFERRED"
+CURRENCY_REFERENCE = f"REFERENCES api_currency (id) {DEFERRED}"
+# дата котировки - день по московскому времени, на который установлен курс
+RATES_DATE = f"({{row}}.date AT TIME ZONE '{settings.TIME_ZONE}')::date"
+
+
+def compact_table(
+    schema_editor: object,
+    table: str,
+    columns: list[tuple[str, str, str]],
+    unique: dict[str, str],
+    indexes: dict[str, str],
+) -> None:
+    """Перестроить таблицу с кодом валюты в таблицу со ссылкой на валюту.
+
+    Столбцы новой таблицы - (имя, определение, выражение по строке {row}
+    старой таблицы и найденной по коду валюте currency). Строки, повторно
+    нарушающие ограничения уникальности новой таблицы, пропускаются.
+    """
+    connection = schema_editor.connection
+    new_table = f"{table}_compact"
+    names = ", ".join(name for name, _, _ in columns)
+
+    def select(row: str) -> str:
+        return ", ".join(
+            expression.format(row=row) for _, _, expression in columns
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {new_table} ("  # noqa S608
+            + ", ".join(
+                f"{name} {definition}" for name, definition, _ in columns
+            )
+            + ", PRIMARY KEY (id)"
+            + "".join(
+                f", CONSTRAINT {name}_compact UNIQUE ({fields})"
+                for name, fields in unique.items()
+            )
+            + ")"
+        )
+        # изменения старой таблицы до переключения переносятся в новую
+        cursor.execute(
+            f"""
+            CREATE FUNCTION {new_table}_sync() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM {new_table} WHERE id = OLD.id;
+                    RETURN NULL;
+                END IF;
+                INSERT INTO api_currency (charcode) VALUES (NEW.charcode)
+                ON CONFLICT (charcode) DO NOTHING;
+                INSERT INTO {new_table} ({names})
+                SELECT {select("NEW")} FROM api_currency AS currency
+                WHERE currency.charcode = NEW.charcode
+                ON CONFLICT (id) DO UPDATE SET {", ".join(
+                    f"{name} = EXCLUDED.{name}"
+                    for name, _, _ in columns
+                    if name != "id"
+                )};
+                RETURN NULL;
+            END $$
+            """
+        )
+        cursor.execute(
+            f"CREATE TRIGGER {new_table}_sync "
+            f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {new_table}_sync()"
+        )
+        # валюты строк, записанных до создания триггера
+        cursor.execute(
+            "INSERT INTO api_currency (charcode) "  # noqa S608
+            f"SELECT DISTINCT charcode FROM {table} "
+            "ON CONFLICT (charcode) DO NOTHING"
+        )
+        cursor.execute(f"SELECT min(id), max(id) FROM {table}")  # noqa S608
+        min_id, max_id = cursor.fetchone()
+
+    # строки порции блокируются FOR SHARE, поэтому их изменение или
+    # удаление дожидается переноса порции и выполняется триггером после
+    for batch_start in range(min_id or 0, (max_id or -1) + 1, BATCH_SIZE):
+        with atomic_cursor(connection) as cursor:
+            cursor.execute(
+                f"INSERT INTO {new_table} ({names}) "  # noqa S608
+                f"SELECT {select('source')} FROM {table} AS source "
+                "JOIN api_currency AS currency "
+                "ON currency.charcode = source.charcode "
+                "WHERE source.id BETWEEN %s AND %s "
+                "ORDER BY source.id FOR SHARE OF source "
+                "ON CONFLICT DO NOTHING",
+                [batch_start, batch_start + BATCH_SIZE - 1],
+            )
+
+    with connection.cursor() as cursor:
+        for name, fields in indexes.items():
+            cursor.execute(
+                f"CREATE INDEX CONCURRENTLY {name}_compact "
+                f"ON {new_table} ({fields})"
+            )
+    with atomic_cursor(connection) as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            "nextval(pg_get_serial_sequence(%s, 'id')), false)",
+            [new_table, table],
+        )
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"DROP FUNCTION {new_table}_sync()")
+        cursor.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+        cursor.execute(
+            f"ALTER SEQUENCE {new_table}_id_seq RENAME TO {table}_id_seq"
+        )
+        rename_constraints(cursor, table, new_table)
+        for name in unique:
+            cursor.execute(
+                f"ALTER TABLE {table} "
+                f"RENAME CONSTRAINT {name}_compact TO {name}"
+            )
+        for name in indexes:
+            cursor.execute(f"ALTER INDEX {name}_compact RENAME TO {name}")
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {table}")
+
+
+@contextmanager
+def atomic_cursor(connection: object) -> Iterator[object]:
+    """Курсор в отдельной транзакции."""
+    with transaction.atomic(
+        using=connection.alias
+    ), connection.cursor() as cursor:
+        yield cursor
+
+
+def rename_constraints(cursor: object, table: str, new_table: str) -> None:
+    """Переименовать ограничения с именем по новой таблице (pkey, fkey)."""
+    cursor.execute(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND conname LIKE %s",
+        [table, f"{new_table}%"],
+    )
+    for (name,) in cursor.fetchall():
+        cursor.execute(
+            f"ALTER TABLE {table} RENAME CONSTRAINT {name} "
+            f"TO {name.replace(new_table, table, 1)}"
+        )
+
+
+def compact_rates(apps: object, schema_editor: object) -> None:
+    """Перестроить котировки."""
+    compact_table(
+        schema_editor,
+        "api_rates",
+        [
+            ("id", "bigint GENERATED BY DEFAULT AS IDENTITY", "{row}.id"),
+            ("date", "date NOT NULL", RATES_DATE),
+            (
+                "currency_id",
+                f"smallint NOT NULL {CURRENCY_REFERENCE}",
+                "currency.id",
+            ),
+            ("value", "numeric(12, 4) NOT NULL", "{row}.value"),
+        ],
+        unique={"unique_rates_currency_date": "currency_id, date"},
+        indexes={"rates_currency_value_id_idx": "currency_id, value, id"},
+    )
+
+
+def compact_latest_rates(apps: object, schema_editor: object) -> None:
+    """Перестроить последние котировки.
+
+    Строк по одной на валюту, поэтому таблица пересоздается в одной
+    транзакции.
+    """
+    with atomic_cursor(schema_editor.connection) as cursor:
+        cursor.execute(
+            "CREATE TABLE api_latestrate_compact ("
+            f"currency_id smallint PRIMARY KEY {CURRENCY_REFERENCE}, "
+            "rate_id bigint NOT NULL, date date NOT NULL, "
+            "value numeric(12, 4) NOT NULL)"
+        )
+        cursor.execute("LOCK TABLE api_latestrate IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            "INSERT INTO api_latestrate_compact "  # noqa S608
+            "(currency_id, rate_id, date, value) "
+            "SELECT currency.id, latest.rate_id, "
+            f"{RATES_DATE.format(row='latest')}, latest.value "
+            "FROM api_latestrate AS latest "
+            "JOIN api_currency AS currency USING (charcode)"
+        )
+        cursor.execute("DROP TABLE api_latestrate")
+        cursor.execute(
+            "ALTER TABLE api_latestrate_compact RENAME TO api_latestrate"
+        )
+        rename_constraints(cursor, "api_latestrate", "api_latestrate_compact")
+
+
+def compact_user_currencies(apps: object, schema_editor: object) -> None:
+    """Перестроить отслеживаемые валюты пользователей."""
+    compact_table(
+        schema_editor,
+        "api_usercurrency",
+        [
+            ("id", "bigint GENERATED BY DEFAULT AS IDENTITY", "{row}.id"),
+            (
+                "user_id",
+                "bigint NOT NULL " f"REFERENCES api_appuser (id) {DEFERRED}",
+                "{row}.user_id",
+            ),
+            ("threshold", "integer NOT NULL", "{row}.threshold"),
+            (
+                "currency_id",
+                f"smallint NOT NULL {CURRENCY_REFERENCE}",
+                "currency.id",
+            ),
+        ],
+        unique={"unique_user_currency": "user_id, currency_id"},
+        indexes={"user_currency_threshold_idx": "currency_id, threshold"},
+    )
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    atomic = False
+
+    dependencies = [
+        ("api", "0009_rates_ingest_run"),
+    ]
+
+    operations = [
+        # перед созданием ограничения удаляем дубли валют,
+        # оставляя запись с наименьшим id
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM api_currency AS duplicate
+                USING api_currency AS original
+                WHERE duplicate.charcode = original.charcode
+                AND duplicate.id > original.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name="currency",
+            name="charcode",
+            field=models.CharField(max_length=5, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="currency",
+            name="id",
+            field=models.SmallAutoField(primary_key=True, serialize=False),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(compact_rates)],
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name="rates",
+                    name="unique_rates_charcode_date",
+                ),
+                migrations.RemoveIndex(
+                    model_name="rates",
+                    name="rates_charcode_value_id_idx",
+                ),
+                migrations.RemoveField(
+                    model_name="rates",
+                    name="charcode",
+                ),
+                migrations.AddField(
+                    model_name="rates",
+                    name="currency",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="rates",
+                        to="api.currency",
+                    ),
+                    preserve_default=False,
+                ),
+                migrations.AlterField(
+                    model_name="rates",
+                    name="date",
+                    field=models.DateField(verbose_name="date"),
+                ),
+                migrations.AlterField(
+                    model_name="rates",
+                    name="value",
+                    field=models.DecimalField(decimal_places=4, max_digits=12),
+                ),
+                migrations.AddIndex(
+                    model_name="rates",
+                    index=models.Index(
+                        fields=["currency", "value", "id"],
+                        name="rates_currency_value_id_idx",
+                    ),
+                ),
+                migrations.AddConstraint(
+                    model_name="rates",
+                    constraint=models.UniqueConstraint(
+                        fields=("currency", "date"),
+                        name="unique_rates_currency_date",
+                    ),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(compact_latest_rates)],
+            state_operations=[
+                # связь без столбца в базе, восстанавливается ниже по валюте
+                migrations.RemoveField(
+                    model_name="usercurrency",
+                    name="latest_rate",
+                ),
+                migrations.RemoveField(
+                    model_name="latestrate",
+                    name="charcode",
+                ),
+                migrations.AddField(
+                    model_name="latestrate",
+                    name="currency",
+                    field=models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="latest_rate",
+                        serialize=False,
+                        to="api.currency",
+                    ),
+                    preserve_default=False,
+                ),
+                migrations.AlterField(
+                    model_name="latestrate",
+                    name="date",
+                    field=models.DateField(verbose_name="date"),
+                ),
+                migrations.AlterField(
+                    model_name="latestrate",
+                    name="value",
+                    field=models.DecimalField(decimal_places=4, max_digits=12),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(compact_user_currencies)
+            ],
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name="usercurrency",
+                    name="unique_user_currency",
+                ),
+                migrations.RemoveIndex(
+                    model_name="usercurrency",
+                    name="user_currency_threshold_idx",
+                ),
+                migrations.RemoveField(
+                    model_name="usercurrency",
+                    name="charcode",
+                ),
+                migrations.AddField(
+                    model_name="usercurrency",
+                    name="currency",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="api.currency",
+                    ),
+                    preserve_default=False,
+                ),
+                migrations.AlterField(
+                    model_name="usercurrency",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                migrations.AddField(
+                    model_name="usercurrency",
+                    name="latest_rate",
+                    field=models.ForeignObject(
+                        from_fields=("currency",),
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="user_currencies",
+                        to="api.latestrate",
+                        to_fields=("currency",),
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="usercurrency",
+                    index=models.Index(
+                        fields=["currency", "threshold"],
+                        name="user_currency_threshold_idx",
+                    ),
+                ),
+                migrations.AddConstraint(
+                    model_name="usercurrency",
+                    constraint=models.UniqueConstraint(
+                        fields=("user", "currency"),
+                        name="unique_user_currency",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,236 @@
+"""Модуль с миграциями.
+
+Секционирование котировок по годам даты. Секционированную таблицу нельзя
+получить изменением существующей, поэтому котировки переносятся в новую
+таблицу с секциями за годы загруженных котировок и RATES_PARTITIONS_AHEAD
+следующих лет.
+
+Перенос, как и в 0010, выполняется без долгих блокировок: новая таблица
+с индексами и ссылкой на валюту заполняется порциями по id, изменения
+старой таблицы на время заполнения переносятся в новую триггером, а
+таблицы меняются местами в короткой транзакции. Строки за годы без
+секции, записанные во время переноса, триггер откладывает в отдельную
+таблицу; их секции создаются, а строки переносятся при переключении.
+
+Первичный ключ секционированной таблицы обязан включать ключ секций,
+поэтому он составной (id, date); уникальность id обеспечивает
+последовательность.
+"""
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterator
+
+from django.db import migrations, transaction
+
+from rates.settings import RATES_PARTITIONS_AHEAD
+
+BATCH_SIZE = 50_000
+TABLE = "api_rates"
+NEW_TABLE = "api_rates_rebuild"
+# строки за годы без секции, записанные во время переноса
+PENDING_TABLE = "api_rates_rebuild_pending"
+COLUMNS = ["id", "date", "currency_id", "value"]
+UNIQUE = {"unique_rates_currency_date": "currency_id, date"}
+INDEXES = {"rates_currency_value_id_idx": "currency_id, value, id"}
+
+
+def rebuild_rates(schema_editor: object, partitioned: bool) -> None:
+    """Перестроить котировки в секционированную или обычную таблицу."""
+    connection = schema_editor.connection
+    names = ", ".join(COLUMNS)
+    primary_key = ["id", "date"] if partitioned else ["id"]
+
+    with atomic_cursor(connection) as cursor:
+        cursor.execute(
+            f"CREATE TABLE {NEW_TABLE} ("
+            "id bigint NOT NULL, "
+            "date date NOT NULL, "
+            "currency_id smallint NOT NULL REFERENCES api_currency (id) "
+            "DEFERRABLE INITIALLY DEFERRED, "
+            "value numeric(12, 4) NOT NULL, "
+            f"PRIMARY KEY ({', '.join(primary_key)})"
+            + "".join(
+                f", CONSTRAINT {name}_rebuild UNIQUE ({fields})"
+                for name, fields in UNIQUE.items()
+            )
+            + ")"
+            + (" PARTITION BY RANGE (date)" if partitioned else "")
+        )
+        cursor.execute(
+            f"CREATE SEQUENCE {NEW_TABLE}_id_seq OWNED BY {NEW_TABLE}.id"
+        )
+        cursor.execute(
+            f"ALTER TABLE {NEW_TABLE} ALTER COLUMN id "
+            f"SET DEFAULT nextval('{NEW_TABLE}_id_seq')"
+        )
+        # индексы пустой таблицы создаются сразу и пополняются при переносе
+        for name, fields in INDEXES.items():
+            cursor.execute(
+                f"CREATE INDEX {name}_rebuild ON {NEW_TABLE} ({fields})"
+            )
+        cursor.execute(
+            f"CREATE TABLE {PENDING_TABLE} "
+            f"(LIKE {NEW_TABLE} INCLUDING DEFAULTS)"
+        )
+        # изменения старой таблицы до переключения переносятся в новую;
+        # строка за год без секции нарушает ограничение секционирования
+        cursor.execute(
+            f"""
+            CREATE FUNCTION {NEW_TABLE}_sync() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM {NEW_TABLE}
+                    WHERE id = OLD.id AND date = OLD.date;
+                    DELETE FROM {PENDING_TABLE} WHERE id = OLD.id;
+                END IF;
+                IF TG_OP = 'DELETE' THEN
+                    RETURN NULL;
+                END IF;
+                BEGIN
+                    INSERT INTO {NEW_TABLE} ({names})
+                    VALUES ({", ".join(f"NEW.{name}" for name in COLUMNS)})
+                    ON CONFLICT ({", ".join(primary_key)})
+                    DO UPDATE SET {", ".join(
+                        f"{name} = EXCLUDED.{name}"
+                        for name in COLUMNS
+                        if name not in primary_key
+                    )};
+                EXCEPTION WHEN check_violation THEN
+                    INSERT INTO {PENDING_TABLE} ({names})
+                    VALUES ({", ".join(f"NEW.{name}" for name in COLUMNS)});
+                END;
+                RETURN NULL;
+            END $$
+            """
+        )
+        cursor.execute(
+            f"CREATE TRIGGER {NEW_TABLE}_sync "
+            f"AFTER INSERT OR UPDATE OR DELETE ON {TABLE} "
+            f"FOR EACH ROW EXECUTE FUNCTION {NEW_TABLE}_sync()"
+        )
+
+    # строки вне прочитанного здесь периода записаны уже после создания
+    # триггера и переносятся им
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT min(date), max(date), min(id), max(id) "  # noqa S608
+            f"FROM {TABLE}"
+        )
+        date_from, date_to, min_id, max_id = cursor.fetchone()
+    today = date.today()
+    year_from = min(date_from or today, today).year
+    year_to = max(date_to or today, today).year + RATES_PARTITIONS_AHEAD
+    if partitioned:
+        with atomic_cursor(connection) as cursor:
+            for year in range(year_from, year_to + 1):
+                create_partition(cursor, year)
+
+    # строки порции блокируются FOR SHARE, поэтому их изменение или
+    # удаление дожидается переноса порции и выполняется триггером после
+    for batch_start in range(min_id or 0, (max_id or -1) + 1, BATCH_SIZE):
+        with atomic_cursor(connection) as cursor:
+            cursor.execute(
+                f"INSERT INTO {NEW_TABLE} ({names}) "  # noqa S608
+                f"SELECT {names} FROM {TABLE} "
+                "WHERE id BETWEEN %s AND %s AND date BETWEEN %s AND %s "
+                "ORDER BY id FOR SHARE "
+                "ON CONFLICT DO NOTHING",
+                [
+                    batch_start,
+                    batch_start + BATCH_SIZE - 1,
+                    date(year_from, 1, 1),
+                    date(year_to, 12, 31),
+                ],
+            )
+
+    with atomic_cursor(connection) as cursor:
+        cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            "SELECT DISTINCT extract(year FROM date)::integer "  # noqa S608
+            f"FROM {PENDING_TABLE}"
+        )
+        for (year,) in cursor.fetchall():
+            create_partition(cursor, year)
+        cursor.execute(
+            f"INSERT INTO {NEW_TABLE} ({names}) "  # noqa S608
+            f"SELECT {names} FROM {PENDING_TABLE} "
+            "ON CONFLICT DO NOTHING"
+        )
+        cursor.execute(
+            f"SELECT setval('{NEW_TABLE}_id_seq', "
+            f"nextval(pg_get_serial_sequence('{TABLE}', 'id')), false)"
+        )
+        cursor.execute(f"DROP TABLE {TABLE}")
+        cursor.execute(f"DROP TABLE {PENDING_TABLE}")
+        cursor.execute(f"DROP FUNCTION {NEW_TABLE}_sync()")
+        cursor.execute(f"ALTER TABLE {NEW_TABLE} RENAME TO {TABLE}")
+        cursor.execute(
+            f"ALTER SEQUENCE {NEW_TABLE}_id_seq RENAME TO {TABLE}_id_seq"
+        )
+        rename_constraints(cursor, TABLE, NEW_TABLE)
+        for name in UNIQUE:
+            cursor.execute(
+                f"ALTER TABLE {TABLE} RENAME CONSTRAINT {name}_rebuild "
+                f"TO {name}"
+            )
+        for name in INDEXES:
+            cursor.execute(f"ALTER INDEX {name}_rebuild RENAME TO {name}")
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {TABLE}")
+
+
+def create_partition(cursor: object, year: int) -> None:
+    """Создать секцию новой таблицы котировок за год."""
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {TABLE}_{year} PARTITION OF {NEW_TABLE} "
+        "FOR VALUES FROM (%s) TO (%s)",
+        [date(year, 1, 1), date(year + 1, 1, 1)],
+    )
+
+
+@contextmanager
+def atomic_cursor(connection: object) -> Iterator[object]:
+    """Курсор в отдельной транзакции."""
+    with transaction.atomic(
+        using=connection.alias
+    ), connection.cursor() as cursor:
+        yield cursor
+
+
+def rename_constraints(cursor: object, table: str, new_table: str) -> None:
+    """Переименовать ограничения с именем по новой таблице (pkey, fkey)."""
+    cursor.execute(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND conname LIKE %s",
+        [table, f"{new_table}%"],
+    )
+    for (name,) in cursor.fetchall():
+        cursor.execute(
+            f"ALTER TABLE {table} RENAME CONSTRAINT {name} "
+            f"TO {name.replace(new_table, table, 1)}"
+        )
+
+
+def partition_rates(apps: object, schema_editor: object) -> None:
+    """Секционировать котировки по годам."""
+    rebuild_rates(schema_editor, partitioned=True)
+
+
+def unpartition_rates(apps: object, schema_editor: object) -> None:
+    """Вернуть котировки в обычную таблицу."""
+    rebuild_rates(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    atomic = False
+
+    dependencies = [
+        ("api", "0010_compact_rates"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_rates, unpartition_rates),
+    ]
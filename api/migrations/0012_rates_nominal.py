@@ -0,0 +1,41 @@
+"""Модуль с миграциями.
+
+Номинал котировок, загруженных ранее, неизвестен: ЦБ РФ дает курсы
+некоторых валют за 10, 100 и более единиц. Поэтому столбец добавляется
+без значения по умолчанию, и у существующих котировок номинал - NULL.
+Кросс-курсы такие котировки пропускают, а загрузка считает их дни
+незагруженными и запрашивает повторно (download_rates за последние дни,
+backfill_rates за историю).
+"""
+# Generated by Django 4.2.30 on 2026-10-18 10:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    dependencies = [
+        ("api", "0011_rates_partitions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="rates",
+            name="nominal",
+            field=models.PositiveIntegerField(
+                null=True,
+                help_text="количество единиц валюты, за которое дан курс",
+            ),
+        ),
+        # номинал новых котировок по умолчанию - 1
+        migrations.AlterField(
+            model_name="rates",
+            name="nominal",
+            field=models.PositiveIntegerField(
+                null=True,
+                default=1,
+                help_text="количество единиц валюты, за которое дан курс",
+            ),
+        ),
+    ]
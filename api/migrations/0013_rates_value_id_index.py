@@ -0,0 +1,21 @@
+"""Модуль с миграциями."""
+# Generated by Django 4.2.30 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Класс миграций."""
+
+    dependencies = [
+        ("api", "0012_rates_nominal"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="rates",
+            index=models.Index(
+                fields=["value", "id"], name="rates_value_id_idx"
+            ),
+        ),
+    ]
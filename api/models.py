@@ -2,13 +2,23 @@
 from django.contrib.auth.models import AbstractUser, User
 from django.db import models
 
-from rates.settings import DECIMAL_PLACES, MAX_CURRENCY_CHARCODE, MAX_DIGITS
+from rates.settings import (
+    DECIMAL_PLACES,
+    MAX_CURRENCY_CHARCODE,
+    MAX_DIGITS,
+    MAX_PHONE,
+    RATE_DECIMAL_PLACES,
+    RATE_MAX_DIGITS,
+)
 
 
 class AppUser(AbstractUser):
     """Модель пользователя."""
 
     email = models.EmailField(verbose_name="email address", unique=True)
+    phone = models.CharField(
+        verbose_name="phone number", max_length=MAX_PHONE, blank=True
+    )
 
     USERNAME_FIELD = User.EMAIL_FIELD
     REQUIRED_FIELDS = [User.USERNAME_FIELD]
@@ -19,24 +29,199 @@ class AppUser(AbstractUser):
 
 
 class Currency(models.Model):
-    """Модель всех валют."""
+    """Модель всех валют.
 
-    charcode = models.CharField(max_length=MAX_CURRENCY_CHARCODE)
+    Валют несколько десятков, поэтому ключ - smallint: ссылки на валюту
+    в котировках занимают 2 байта вместо кода валюты.
+    """
+
+    id = models.SmallAutoField(primary_key=True)  # noqa A003
+    charcode = models.CharField(max_length=MAX_CURRENCY_CHARCODE, unique=True)
+
+
+class Rates(models.Model):
+    """Модель котировок валют.
+
+    ЦБ РФ устанавливает курсы на день, поэтому котировка хранит дату
+    без времени. Курс - цена nominal единиц валюты в рублях. Номинал
+    котировок, загруженных до его хранения, неизвестен (NULL), такие дни
+    загружаются повторно.
+    """
+
+    date = models.DateField(verbose_name="date")
+    currency = models.ForeignKey(
+        Currency,
+        on_delete=models.PROTECT,
+        related_name="rates",
+        # выборки по валюте используют индекс уникальности
+        db_index=False,
+    )
+    value = models.DecimalField(
+        max_digits=RATE_MAX_DIGITS, decimal_places=RATE_DECIMAL_PLACES
+    )
+    nominal = models.PositiveIntegerField(
+        null=True,
+        default=1,
+        help_text="количество единиц валюты, за которое дан курс",
+    )
+
+    class Meta:
+        """Ограничения и индексы модели."""
+
+        constraints = [
+            # индекс уникальности используется и как составной индекс для
+            # выборок по валюте и дате
+            models.UniqueConstraint(
+                fields=["currency", "date"], name="unique_rates_currency_date"
+            ),
+        ]
+        indexes = [
+            # ключ постраничной выборки котировок валюты по значению
+            models.Index(
+                fields=["currency", "value", "id"],
+                name="rates_currency_value_id_idx",
+            ),
+            # ключ постраничной выборки котировок всех валют по значению
+            models.Index(fields=["value", "id"], name="rates_value_id_idx"),
+        ]
+
+
+class LatestRate(models.Model):
+    """Модель последних котировок валют.
+
+    Обновляется при загрузке котировок, содержит по одной строке на валюту.
+    """
+
+    currency = models.OneToOneField(
+        Currency,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="latest_rate",
+    )
+    rate_id = models.BigIntegerField(help_text="id котировки в Rates")
+    date = models.DateField(verbose_name="date")
+    value = models.DecimalField(
+        max_digits=RATE_MAX_DIGITS, decimal_places=RATE_DECIMAL_PLACES
+    )
 
 
 class UserCurrency(models.Model):
     """Модель валют отслеживаемых пользователем."""
 
-    user = models.ForeignKey(AppUser, on_delete=models.CASCADE)
-    charcode = models.CharField(max_length=MAX_CURRENCY_CHARCODE)
+    user = models.ForeignKey(
+        AppUser,
+        on_delete=models.CASCADE,
+        # выборки по пользователю используют индекс уникальности
+        db_index=False,
+    )
+    currency = models.ForeignKey(
+        Currency, on_delete=models.CASCADE, db_index=False
+    )
     threshold = models.IntegerField()
+    # связь без столбца в базе для соединения с последней котировкой валюты
+    latest_rate = models.ForeignObject(
+        LatestRate,
+        on_delete=models.DO_NOTHING,
+        from_fields=["currency"],
+        to_fields=["currency"],
+        related_name="user_currencies",
+        null=True,
+    )
 
+    class Meta:
+        """Ограничения и индексы модели."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "currency"], name="unique_user_currency"
+            ),
+        ]
+        indexes = [
+            # поиск порогов, пересеченных новой котировкой валюты
+            models.Index(
+                fields=["currency", "threshold"],
+                name="user_currency_threshold_idx",
+            ),
+        ]
 
-class Rates(models.Model):
-    """Модель котировок валют."""
 
-    date = models.DateTimeField(verbose_name="date")
+class RatesRollup(models.Model):
+    """Модель котировок валют, агрегированных за неделю, месяц или год."""
+
+    class Granularity(models.TextChoices):
+        """Длительность периода агрегации."""
+
+        WEEK = "week"
+        MONTH = "month"
+        YEAR = "year"
+
     charcode = models.CharField(max_length=MAX_CURRENCY_CHARCODE)
-    value = models.DecimalField(
+    granularity = models.CharField(max_length=5, choices=Granularity.choices)
+    period_start = models.DateField()
+    open = models.DecimalField(  # noqa A003
         max_digits=MAX_DIGITS, decimal_places=DECIMAL_PLACES
     )
+    high = models.DecimalField(
+        max_digits=MAX_DIGITS, decimal_places=DECIMAL_PLACES
+    )
+    low = models.DecimalField(
+        max_digits=MAX_DIGITS, decimal_places=DECIMAL_PLACES
+    )
+    close = models.DecimalField(
+        max_digits=MAX_DIGITS, decimal_places=DECIMAL_PLACES
+    )
+    avg = models.DecimalField(
+        max_digits=MAX_DIGITS, decimal_places=DECIMAL_PLACES
+    )
+    count = models.IntegerField()
+
+    class Meta:
+        """Ограничения модели."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["charcode", "granularity", "period_start"],
+                name="unique_rates_rollup_period",
+            ),
+        ]
+
+
+class RatesDownload(models.Model):
+    """Модель дней, котировки за которые не были загружены."""
+
+    class Status(models.TextChoices):
+        """Причины отсутствия котировок за день."""
+
+        EMPTY = "empty"  # ЦБ РФ не устанавливал курсы на эту дату
+        FAILED = "failed"  # ошибка загрузки, день нужно загрузить повторно
+
+    date = models.DateField(verbose_name="date", unique=True)
+    status = models.CharField(max_length=10, choices=Status.choices)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class RatesBackfill(models.Model):
+    """Модель исторической загрузки котировок за период."""
+
+    date_from = models.DateField()
+    date_to = models.DateField()
+    checkpoint = models.DateField(
+        null=True, help_text="последний загруженный день периода"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True)
+
+
+class RatesIngestRun(models.Model):
+    """Модель итогов запуска загрузки котировок с профилем этапов."""
+
+    task = models.CharField(max_length=50)
+    started_at = models.DateTimeField()
+    duration = models.FloatField(help_text="seconds")
+    rows = models.IntegerField(help_text="saved rates")
+    failed_dates = models.IntegerField()
+    stages = models.JSONField(help_text="seconds and peak_kb by stage")
+    dates = models.JSONField(help_text="stages by date")
+    cprofile_path = models.CharField(max_length=255, blank=True)
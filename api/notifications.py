@@ -0,0 +1,73 @@
+"""Модуль с отправкой уведомлений пользователям."""
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Iterable, NamedTuple
+
+from django.utils.module_loading import import_string
+from loguru import logger
+from twilio.base.exceptions import TwilioException
+from twilio.rest import Client
+
+from rates.settings import (
+    NOTIFICATION_BACKEND,
+    NOTIFICATION_BATCH_SIZE,
+    TWILIO_ACCOUNT_SID,
+    TWILIO_AUTH_TOKEN,
+    TWILIO_FROM_NUMBER,
+)
+
+
+class Notification(NamedTuple):
+    """Уведомление пользователя."""
+
+    email: str
+    phone: str
+    text: str
+
+
+class BaseSender(ABC):
+    """Базовый класс отправки уведомлений пачками."""
+
+    @abstractmethod
+    def send_messages(self, notifications: list[Notification]) -> int:
+        """Отправить пачку уведомлений, вернуть количество отправленных."""
+
+
+class TwilioSender(BaseSender):
+    """Отправка уведомлений SMS через Twilio.
+
+    Уведомления пользователей без номера телефона пропускаются.
+    """
+
+    def send_messages(self, notifications: list[Notification]) -> int:
+        """Отправить пачку уведомлений через один клиент Twilio."""
+        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        sent = 0
+        for notification in notifications:
+            if not notification.phone:
+                continue
+            try:
+                client.messages.create(
+                    to=notification.phone,
+                    from_=TWILIO_FROM_NUMBER,
+                    body=notification.text,
+                )
+            except TwilioException as exc:
+                logger.error(
+                    "notification to {} is not sent: {}",
+                    notification.phone,
+                    exc,
+                )
+            else:
+                sent += 1
+        return sent
+
+
+def send_notifications(notifications: Iterable[Notification]) -> int:
+    """Отправить уведомления пачками по NOTIFICATION_BATCH_SIZE."""
+    sender = import_string(NOTIFICATION_BACKEND)()
+    notifications = iter(notifications)
+    sent = 0
+    while batch := list(islice(notifications, NOTIFICATION_BATCH_SIZE)):
+        sent += sender.send_messages(batch)
+    return sent
@@ -0,0 +1,209 @@
+"""Модуль с классами пагинации."""
+import base64
+import json
+from functools import reduce
+from typing import Any, Optional
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from rates.settings import MAX_PAGE_SIZE
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу сортировки с непрозрачными курсорами.
+
+    Ключ страницы - поле сортировки запроса (value или date) и id,
+    поэтому стоимость запроса страницы не зависит от ее номера.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self) -> None:
+        """Инициализация пагинации."""
+        self.limit = self.page_size
+        self.ordering: list[str] = []
+        self.cursor: Optional[dict] = None
+        self.is_reversed = False
+        self.first_row: Optional[dict] = None
+        self.last_row: Optional[dict] = None
+        self.has_next = False
+        self.has_previous = False
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: Any = None
+    ) -> list[dict]:
+        """Получить строки страницы, запрошенной курсором."""
+        return self.get_page_rows(
+            list(self.get_page_queryset(queryset, request))
+        )
+
+    async def apaginate_queryset(
+        self, queryset: QuerySet, request: HttpRequest
+    ) -> list[dict]:
+        """Асинхронно получить строки страницы, запрошенной курсором."""
+        return self.get_page_rows(
+            [row async for row in self.get_page_queryset(queryset, request)]
+        )
+
+    def get_page_queryset(
+        self, queryset: QuerySet, request: HttpRequest
+    ) -> QuerySet:
+        """Запрос строк страницы и одной следующей за ней строки."""
+        self.limit = self.get_page_size(request)
+        self.ordering = get_keyset_ordering(queryset.query.order_by)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor:
+            self.cursor["position"] = self.convert_position(
+                queryset, self.cursor["position"]
+            )
+        self.is_reversed = bool(self.cursor and self.cursor["reverse"])
+
+        ordering = (
+            [invert_ordering(field) for field in self.ordering]
+            if self.is_reversed
+            else self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if self.cursor:
+            queryset = queryset.filter(
+                get_keyset_filter(ordering, self.cursor["position"])
+            )
+        return queryset[: self.limit + 1]
+
+    def get_page_rows(self, rows: list[dict]) -> list[dict]:
+        """Строки страницы по результату запроса страницы."""
+        has_more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        if self.is_reversed:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous = self.cursor is not None
+            self.has_next = has_more
+
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_page_size(self, request: HttpRequest) -> int:
+        """Получить размер страницы из параметров запроса."""
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_cursor(self) -> Optional[str]:
+        """Курсор следующей страницы."""
+        if not (self.has_next and self.last_row):
+            return None
+        return self.encode_cursor(self.last_row, reverse=False)
+
+    def get_previous_cursor(self) -> Optional[str]:
+        """Курсор предыдущей страницы."""
+        if not (self.has_previous and self.first_row):
+            return None
+        return self.encode_cursor(self.first_row, reverse=True)
+
+    def get_paginated_data(self, key: str, rows: list) -> dict:
+        """Данные страницы с курсорами соседних страниц."""
+        return {
+            key: rows,
+            "next": self.get_next_cursor(),
+            "previous": self.get_previous_cursor(),
+        }
+
+    def get_paginated_response(self, data: list) -> Response:
+        """Ответ со страницей и курсорами соседних страниц."""
+        return Response(self.get_paginated_data("results", data))
+
+    def encode_cursor(self, row: dict, reverse: bool) -> str:
+        """Закодировать позицию строки в непрозрачный курсор."""
+        position = [row[field.lstrip("-")] for field in self.ordering]
+        cursor = json.dumps([position, reverse], cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def decode_cursor(self, request: HttpRequest) -> Optional[dict]:
+        """Раскодировать курсор из параметров запроса."""
+        if not (encoded := request.GET.get(self.cursor_query_param)):
+            return None
+
+        try:
+            position, reverse = json.loads(
+                base64.urlsafe_b64decode(encoded.encode())
+            )
+        except (TypeError, ValueError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+        if not isinstance(position, list) or len(position) != len(
+            self.ordering
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {"position": position, "reverse": bool(reverse)}
+
+    def convert_position(self, queryset: QuerySet, position: list) -> list:
+        """Привести значения позиции курсора к типам полей сортировки."""
+        try:
+            return [
+                convert_value(queryset, field.lstrip("-"), value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, TypeError, ValueError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+
+def convert_value(queryset: QuerySet, name: str, value: Any) -> Any:
+    """Привести значение к типу поля или аннотации запроса."""
+    if value is None:
+        raise ValueError(f"empty value of {name}")
+    return queryset.query.resolve_ref(name).output_field.to_python(value)
+
+
+def get_keyset_ordering(order_by: tuple) -> list[str]:
+    """Дополнить сортировку запроса полем id для однозначности ключа."""
+    ordering = list(order_by)
+    if not any(field.lstrip("-") == "id" for field in ordering):
+        descending = bool(ordering) and ordering[-1].startswith("-")
+        ordering.append("-id" if descending else "id")
+    return ordering
+
+
+def invert_ordering(field: str) -> str:
+    """Поменять направление сортировки поля."""
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def get_keyset_filter(ordering: list[str], position: list) -> Q:
+    """Условие выборки строк, следующих за позицией в порядке сортировки.
+
+    Для сортировки (a, b) и позиции (x, y): a > x OR (a = x AND b > y).
+    Условие a >= x дублирует первое поле, чтобы оно стало границей
+    просмотра индекса, а не фильтром строк.
+    """
+    conditions = []
+    for num, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        equals = {
+            previous.lstrip("-"): value
+            for previous, value in zip(ordering[:num], position)
+        }
+        conditions.append(Q(**equals, **{f"{name}__{lookup}": position[num]}))
+    first = ordering[0]
+    bound = "lte" if first.startswith("-") else "gte"
+    return Q(**{f"{first.lstrip('-')}__{bound}": position[0]}) & reduce(
+        lambda left, right: left | right, conditions
+    )
@@ -0,0 +1,96 @@
+"""Модуль с годовыми секциями таблицы котировок.
+
+Котировки секционированы по году даты: выборки за период читают только
+секции лет периода. Секция создается отдельной таблицей и присоединяется
+к котировкам (ATTACH PARTITION), что не блокирует чтение и запись
+остальных секций. Старые секции отсоединяются для архивирования
+(DETACH PARTITION CONCURRENTLY) и остаются отдельными таблицами;
+отсоединенная таблица года присоединяется обратно при создании секции.
+
+Годы существующих секций запоминаются в процессе после фиксации
+транзакции, поэтому загрузка котировок за известные годы не обращается к
+каталогу базы данных. Секция, отсоединенная другим процессом, остается в
+памяти процесса до его перезапуска; отсоединяются только секции
+прошедших лет, котировки за которые уже не загружаются.
+"""
+from datetime import date
+from functools import partial
+from typing import Iterable
+
+from django.db import connection, transaction
+
+from api.models import Rates
+from rates.settings import RATES_PARTITIONS_AHEAD
+
+RATES_TABLE = Rates._meta.db_table
+# годы секций, существование которых проверено в текущем процессе
+known_partition_years: set[int] = set()
+
+
+def get_partition_name(year: int) -> str:
+    """Имя таблицы секции котировок за год."""
+    return f"{RATES_TABLE}_{year}"
+
+
+def get_rates_partitions() -> dict[int, str]:
+    """Получить присоединенные секции котировок по годам."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class AS child ON child.oid = inhrelid "
+            "WHERE inhparent = %s::regclass ORDER BY child.relname",
+            [RATES_TABLE],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    return {int(name.rsplit("_", 1)[1]): name for name in names}
+
+
+def create_rates_partitions(years: Iterable[int]) -> list[str]:
+    """Создать отсутствующие секции котировок за годы, вернуть их имена."""
+    years = set(years)
+    if years <= known_partition_years:
+        return []
+
+    partitions = get_rates_partitions()
+    missing = sorted(years - partitions.keys())
+    for year in missing:
+        name = get_partition_name(year)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} (LIKE {RATES_TABLE} "
+                "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            cursor.execute(
+                f"ALTER TABLE {RATES_TABLE} ATTACH PARTITION {name} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                [date(year, 1, 1), date(year + 1, 1, 1)],
+            )
+    transaction.on_commit(
+        partial(known_partition_years.update, partitions, missing)
+    )
+    return [get_partition_name(year) for year in missing]
+
+
+def create_upcoming_rates_partitions(
+    years_ahead: int = RATES_PARTITIONS_AHEAD,
+) -> list[str]:
+    """Создать секции котировок за текущий и years_ahead следующих лет."""
+    current_year = date.today().year
+    return create_rates_partitions(
+        range(current_year, current_year + years_ahead + 1)
+    )
+
+
+def detach_rates_partition(year: int) -> str:
+    """Отсоединить секцию котировок за год, вернуть имя ее таблицы.
+
+    Отсоединение выполняется без блокировки записи в остальные секции,
+    поэтому вызывается вне транзакции.
+    """
+    name = get_partition_name(year)
+    known_partition_years.discard(year)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {RATES_TABLE} DETACH PARTITION {name} CONCURRENTLY"
+        )
+    return name
@@ -0,0 +1,144 @@
+"""Модуль с профилированием загрузки котировок по этапам.
+
+Загрузка делится на этапы: fetch - запросы к API ЦБ РФ, parse - разбор
+ответов, persist - сохранение котировок, refresh - обновление последних
+котировок, агрегатов, уведомлений и версий кэша. Для этапов и для каждой
+даты замеряется время, а при INGEST_TRACEMALLOC - и пиковый прирост памяти
+(tracemalloc заметно замедляет выделение памяти, поэтому по умолчанию
+выключен).
+"""
+import cProfile
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterator, Optional
+
+from django.utils import timezone
+from loguru import logger
+
+from api.repository import create_ingest_run
+from rates.settings import INGEST_CPROFILE_DIR, INGEST_TRACEMALLOC
+
+
+class IngestProfile:
+    """Время и память этапов одного запуска загрузки котировок."""
+
+    def __init__(self, task: str) -> None:
+        """Инициализация профиля запуска задачи."""
+        self.task = task
+        self.started_at = timezone.now()
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.failed_dates = 0
+        self.cprofile_path = ""
+        self.stages: dict[str, dict] = {}
+        self.dates: dict[date, dict[str, dict]] = defaultdict(dict)
+        # открытые замеры: память на начало и пиковый прирост
+        self._frames: list[dict] = []
+
+    @contextmanager
+    def measure(
+        self, stage: str, target_date: Optional[date] = None
+    ) -> Iterator[None]:
+        """Замерить этап целиком или для одной даты.
+
+        Повторные замеры этапа суммируют время и берут наибольший пик.
+        """
+        self._update_peaks()
+        frame = {"base": get_traced_memory(), "peak": 0}
+        self._frames.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self._update_peaks()
+            self._frames.pop()
+            self.add_timing(stage, seconds, frame["peak"], target_date)
+
+    def add_timing(
+        self,
+        stage: str,
+        seconds: float,
+        peak: int = 0,
+        target_date: Optional[date] = None,
+    ) -> None:
+        """Учесть время и пик памяти этапа, измеренные отдельно."""
+        stages = (
+            self.stages if target_date is None else self.dates[target_date]
+        )
+        stats = stages.setdefault(stage, {"seconds": 0.0, "peak_kb": 0.0})
+        stats["seconds"] = round(stats["seconds"] + seconds, 4)
+        stats["peak_kb"] = max(stats["peak_kb"], round(peak / 1024, 1))
+
+    def get_summary(self) -> dict:
+        """Итоги запуска для записи в базу данных и лог."""
+        return {
+            "task": self.task,
+            "started_at": self.started_at,
+            "duration": round(time.perf_counter() - self.started, 4),
+            "rows": self.rows,
+            "failed_dates": self.failed_dates,
+            "stages": self.stages,
+            "dates": {
+                target_date.isoformat(): stages
+                for target_date, stages in sorted(self.dates.items())
+            },
+            "cprofile_path": self.cprofile_path,
+        }
+
+    def _update_peaks(self) -> None:
+        """Учесть пик памяти в открытых замерах и начать отсчет заново."""
+        if not tracemalloc.is_tracing():
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        for frame in self._frames:
+            frame["peak"] = max(frame["peak"], peak - frame["base"])
+        tracemalloc.reset_peak()
+
+
+def get_traced_memory() -> int:
+    """Текущая память, отслеживаемая tracemalloc, если он запущен."""
+    if not tracemalloc.is_tracing():
+        return 0
+    return tracemalloc.get_traced_memory()[0]
+
+
+@contextmanager
+def profile_ingest(task: str) -> Iterator[IngestProfile]:
+    """Профилировать запуск задачи загрузки котировок.
+
+    Итоги успешного запуска сохраняются в базу данных. При заданном
+    INGEST_CPROFILE_DIR вся задача профилируется cProfile, и профиль
+    сохраняется в файл для анализа (pstats, snakeviz).
+    """
+    profile = IngestProfile(task)
+    profiler = cProfile.Profile() if INGEST_CPROFILE_DIR else None
+    start_tracing = INGEST_TRACEMALLOC and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield profile
+    except Exception:
+        logger.error("ingest run failed: {}", profile.get_summary())
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+            profile.cprofile_path = os.path.join(
+                INGEST_CPROFILE_DIR,
+                f"{task}-{profile.started_at:%Y%m%dT%H%M%S}-{os.getpid()}.prof",
+            )
+            os.makedirs(INGEST_CPROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(profile.cprofile_path)
+        if start_tracing:
+            tracemalloc.stop()
+
+    summary = profile.get_summary()
+    create_ingest_run(summary)
+    logger.info("ingest run: {}", summary)
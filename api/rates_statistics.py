@@ -0,0 +1,129 @@
+"""Модуль со статистиками котировок за период.
+
+Статистики считаются векторно по всему ряду котировок в порядке дат:
+скользящие средние (SMA, EMA), дневные логарифмические доходности,
+скользящая волатильность, перцентили и просадка от максимума. Значения
+рядов, для которых не хватает котировок окна, - None.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+from django.db.models import QuerySet
+
+PERCENTILES = (5, 25, 50, 75, 95)
+MAX_WINDOWS_COUNT = 5
+MAX_WINDOW = 365
+# EMA считается блоками: внутри блока - умножением на матрицу весов
+EMA_BLOCK_SIZE = 256
+DECIMAL_PLACES = 6
+
+
+def get_rates_statistics(rates: QuerySet, windows: Iterable[int]) -> dict:
+    """Статистики котировок за период по окнам windows одним запросом."""
+    rows = list(rates.order_by("date").values_list("date", "value"))
+    dates, values = zip(*rows) if rows else ((), ())
+    values = np.asarray(values, dtype=np.float64)
+    log_returns = np.full_like(values, np.nan)
+    log_returns[1:] = np.diff(np.log(values))
+    drawdown = values / np.maximum.accumulate(values) - 1
+
+    percentiles = (
+        np.percentile(values, PERCENTILES)
+        if values.size
+        else np.full(len(PERCENTILES), np.nan)
+    )
+    return {
+        "dates": list(dates),
+        "log_return": to_list(log_returns),
+        "drawdown": to_list(drawdown),
+        "max_drawdown": to_number(drawdown.min() if values.size else np.nan),
+        "percentiles": dict(
+            zip(
+                (f"p{percentile}" for percentile in PERCENTILES),
+                to_list(percentiles),
+            )
+        ),
+        "sma": {
+            str(window): to_list(get_sma(values, window)) for window in windows
+        },
+        "ema": {
+            str(window): to_list(get_ema(values, window)) for window in windows
+        },
+        "volatility": {
+            str(window): to_list(get_volatility(log_returns, window))
+            for window in windows
+        },
+    }
+
+
+def get_sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Простое скользящее среднее за window котировок."""
+    if values.size < window:
+        return np.full_like(values, np.nan)
+    sums = np.cumsum(np.concatenate(([0], values)))
+    return np.concatenate(
+        (
+            np.full(window - 1, np.nan),
+            (sums[window:] - sums[:-window]) / window,
+        )
+    )
+
+
+def get_ema(values: np.ndarray, window: int) -> np.ndarray:
+    """Экспоненциальное скользящее среднее с alpha = 2 / (window + 1).
+
+    Начальное значение - первая котировка. Внутри блока EMA - сумма
+    котировок блока с весами alpha * (1 - alpha) ** lag и затухающего
+    последнего значения предыдущего блока, поэтому цикл - только по блокам.
+    """
+    if not values.size:
+        return np.empty_like(values)
+    alpha = 2 / (window + 1)
+    size = min(EMA_BLOCK_SIZE, values.size)
+    lags = np.subtract.outer(np.arange(size), np.arange(size))
+    weights = np.where(lags >= 0, alpha * (1 - alpha) ** np.abs(lags), 0)
+    carry_weights = (1 - alpha) ** np.arange(1, size + 1)
+
+    ema = np.empty_like(values)
+    previous = values[0]
+    for block, block_ema in zip(
+        np.array_split(values, range(size, values.size, size)),
+        np.array_split(ema, range(size, values.size, size)),
+    ):
+        block_ema[:] = (
+            weights[: block.size, : block.size] @ block
+            + carry_weights[: block.size] * previous
+        )
+        previous = block_ema[-1]
+    return ema
+
+
+def get_volatility(log_returns: np.ndarray, window: int) -> np.ndarray:
+    """Скользящее выборочное стандартное отклонение доходностей за окно.
+
+    Дисперсия окна считается по накопленным суммам доходностей и их
+    квадратов, поэтому время не зависит от размера окна.
+    """
+    returns = log_returns[1:]
+    if returns.size < window:
+        return np.full_like(log_returns, np.nan)
+    sums = np.cumsum(np.concatenate(([0], returns)))
+    squares = np.cumsum(np.concatenate(([0], returns**2)))
+    window_sums = sums[window:] - sums[:-window]
+    variance = (
+        squares[window:] - squares[:-window] - window_sums**2 / window
+    ) / (window - 1)
+    return np.concatenate(
+        (np.full(window, np.nan), np.sqrt(np.maximum(variance, 0)))
+    )
+
+
+def to_list(series: np.ndarray) -> list[Optional[float]]:
+    """Округленный ряд, отсутствующие значения - None."""
+    series = np.round(series, DECIMAL_PLACES)
+    return np.where(np.isnan(series), None, series).tolist()
+
+
+def to_number(value: float) -> Optional[float]:
+    """Округленное значение статистики, отсутствующее - None."""
+    return None if np.isnan(value) else round(float(value), DECIMAL_PLACES)
@@ -0,0 +1,102 @@
+"""Модуль с кодированием ответов API в JSON (orjson) и MessagePack.
+
+Decimal кодируется строкой со всеми знаками, как в DjangoJSONEncoder:
+значения котировок передаются без потери точности. Дата и время - строки
+ISO 8601, время в UTC с суффиксом Z. Формат выбирается по заголовку
+Accept, по умолчанию - JSON.
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Optional
+
+import msgpack
+import orjson
+from django.http import HttpRequest, HttpResponse
+from django.utils.functional import Promise
+from rest_framework import status
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+JSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def encode_default(value: Any) -> Any:
+    """Кодировать значения, не поддерживаемые orjson и MessagePack."""
+    if isinstance(value, (Decimal, Promise)):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return orjson.dumps(value, option=JSON_OPTIONS)[1:-1].decode()
+    raise TypeError(f"{type(value).__name__} is not serializable")
+
+
+def encode_json(data: Any) -> bytes:
+    """Кодировать данные в JSON."""
+    return orjson.dumps(data, default=encode_default, option=JSON_OPTIONS)
+
+
+def encode_msgpack(data: Any) -> bytes:
+    """Кодировать данные в MessagePack."""
+    return msgpack.packb(data, default=encode_default)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Ответы DRF в JSON через orjson."""
+
+    media_type = "application/json"
+    format = "json"  # noqa A003
+    charset = None
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[dict] = None,
+    ) -> bytes:
+        """Кодировать данные ответа."""
+        return b"" if data is None else encode_json(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Ответы DRF в MessagePack."""
+
+    media_type = "application/msgpack"
+    format = "msgpack"  # noqa A003
+    charset = None
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[dict] = None,
+    ) -> bytes:
+        """Кодировать данные ответа."""
+        return b"" if data is None else encode_msgpack(data)
+
+
+def get_renderer(request: HttpRequest) -> BaseRenderer:
+    """Первый из DEFAULT_RENDERER_CLASSES, принимаемый клиентом.
+
+    Типы из Accept перебираются в порядке заголовка; если ни один не
+    поддерживается, используется первый класс.
+    """
+    renderers = [
+        renderer() for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+    ]
+    for accepted in request.accepted_types:
+        for renderer in renderers:
+            if (
+                renderer.media_type
+                == f"{accepted.main_type}/{accepted.sub_type}"
+            ):
+                return renderer
+    return renderers[0]
+
+
+def encoded_response(
+    request: HttpRequest, data: Any, status: int = status.HTTP_200_OK
+) -> HttpResponse:
+    """Ответ в формате из Accept для обработчиков без DRF."""
+    renderer = get_renderer(request)
+    return HttpResponse(
+        renderer.render(data), status=status, content_type=renderer.media_type
+    )
@@ -1,11 +1,46 @@
 """Модуль с запросами в базу данных."""
 import decimal
-from datetime import date
+from datetime import date, timedelta
+from functools import reduce
+from operator import or_
 from typing import Iterable, Optional
 
-from django.db import transaction
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import connection, transaction
+from django.db.models import (
+    Avg,
+    BooleanField,
+    Count,
+    DateField,
+    DecimalField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Value,
+)
+from django.db.models.functions import Round, Trunc
+from django.utils import timezone
 
-from api.models import AppUser, Currency, Rates, UserCurrency
+from api.bulk import copy_rows
+from api.cache import bump_data_versions, get_user_version
+from api.catalog import currency_catalog
+from api.models import (
+    AppUser,
+    Currency,
+    LatestRate,
+    Rates,
+    RatesBackfill,
+    RatesDownload,
+    RatesIngestRun,
+    RatesRollup,
+    UserCurrency,
+)
+from api.partitions import create_rates_partitions
+from rates.settings import BASE_CURRENCY, CROSS_RATE_DECIMAL_PLACES
 
 
 def create_user(data: dict) -> None:
@@ -17,19 +52,68 @@ def create_user(data: dict) -> None:
         user.save(update_fields=["password"])
 
 
+def create_users(emails: Iterable[str], password: str) -> list[int]:
+    """Создать пользователей с общим хэшем пароля, вернуть их id."""
+    return [
+        user.id
+        for user in AppUser.objects.bulk_create(
+            [
+                AppUser(username=email, email=email, password=password)
+                for email in emails
+            ],
+            batch_size=5000,
+        )
+    ]
+
+
 def get_all_currencies() -> Iterable:
-    """Получить все валюты."""
-    return Currency.objects.all()
+    """Получить все валюты из справочника."""
+    return [
+        Currency(id=currency_id, charcode=charcode)
+        for currency_id, charcode in currency_catalog.get_charcodes().items()
+    ]
 
 
 def get_currency(currency_id: int) -> Optional[Currency]:
-    """Получить валюту по id."""
-    return Currency.objects.filter(id=currency_id).first()
+    """Получить валюту по id из справочника."""
+    if not (charcode := currency_catalog.get_charcode(currency_id)):
+        return None
+    return Currency(id=currency_id, charcode=charcode)
+
+
+def get_unknown_charcodes(charcodes: Iterable[str]) -> list[str]:
+    """Получить коды, отсутствующие в справочнике валют."""
+    return [
+        charcode
+        for charcode in charcodes
+        if currency_catalog.get_id(charcode) is None
+    ]
 
 
 def create_or_update_currency(charcode: str) -> None:
-    """Создать или обновить валюту."""
-    Currency.objects.update_or_create(charcode=charcode)
+    """Создать или обновить валюту.
+
+    При появлении новой валюты справочник сбрасывается во всех процессах.
+    """
+    _, created = Currency.objects.update_or_create(charcode=charcode)
+    if created:
+        transaction.on_commit(currency_catalog.publish_change)
+
+
+def get_currency_ids(charcodes: Iterable[str]) -> dict[str, int]:
+    """Получить id валют по кодам, создав отсутствующие валюты."""
+    charcodes = set(charcodes)
+    currencies = Currency.objects.filter(charcode__in=charcodes)
+    currency_ids = dict(currencies.values_list("charcode", "id"))
+    if not (missing := charcodes - currency_ids.keys()):
+        return currency_ids
+
+    Currency.objects.bulk_create(
+        [Currency(charcode=charcode) for charcode in missing],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(currency_catalog.publish_change)
+    return dict(currencies.values_list("charcode", "id"))
 
 
 def create_or_update_user_currency(
@@ -38,9 +122,10 @@ def create_or_update_user_currency(
     """Создать или обновить отслеживаемую валюту пользователя."""
     UserCurrency.objects.update_or_create(
         user=user,
-        charcode=charcode,
-        threshold=threshold,
+        currency_id=currency_catalog.get_id(charcode),
+        defaults={"threshold": threshold},
     )
+    bump_data_versions([get_user_version(user.id)])
 
 
 def get_user_currencies(user_id: int) -> Iterable:
@@ -48,9 +133,122 @@ def get_user_currencies(user_id: int) -> Iterable:
     return UserCurrency.objects.filter(user__id=user_id)
 
 
+def copy_user_currencies(rows: Iterable[tuple]) -> int:
+    """Загрузить отслеживаемые валюты (user_id, charcode, threshold)."""
+    currency_ids = dict(Currency.objects.values_list("charcode", "id"))
+    return copy_rows(
+        UserCurrency._meta.db_table,
+        ["user_id", "currency_id", "threshold"],
+        (
+            (user_id, currency_ids[charcode], threshold)
+            for user_id, charcode, threshold in rows
+        ),
+    )
+
+
+def get_user_latest_rates(user_id: int, order_by: str) -> Iterable:
+    """Получить последние котировки отслеживаемых пользователем валют.
+
+    Превышение порога пользователя вычисляется в том же запросе.
+    """
+    return (
+        LatestRate.objects.filter(user_currencies__user_id=user_id)
+        .annotate(
+            is_threshold_exceeded=ExpressionWrapper(
+                Q(value__gt=F("user_currencies__threshold")),
+                output_field=BooleanField(),
+            )
+        )
+        .order_by(order_by)
+        .values(
+            "date",
+            "value",
+            "is_threshold_exceeded",
+            id=F("rate_id"),
+            charcode=F("currency__charcode"),
+        )
+    )
+
+
 def create_rate(date: date, charcode: str, value: decimal) -> None:
     """Создать котировку валюты."""
-    Rates.objects.create(date=date, charcode=charcode, value=value)
+    create_rates_partitions([date.year])
+    Rates.objects.create(
+        date=date,
+        currency_id=get_currency_ids([charcode])[charcode],
+        value=value,
+    )
+
+
+def upsert_rates(
+    date: date,
+    values: dict[str, decimal.Decimal],
+    nominals: Optional[dict[str, int]] = None,
+) -> None:
+    """Создать или обновить котировки валют за дату одним запросом.
+
+    Номинал валюты, отсутствующей в nominals, равен 1.
+    """
+    currency_ids = get_currency_ids(values)
+    nominals = nominals or {}
+    create_rates_partitions([date.year])
+    Rates.objects.bulk_create(
+        [
+            Rates(
+                date=date,
+                currency_id=currency_ids[charcode],
+                value=value,
+                nominal=nominals.get(charcode, 1),
+            )
+            for charcode, value in values.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["currency", "date"],
+        update_fields=["value", "nominal"],
+    )
+
+
+def copy_rates(rows: Iterable[tuple]) -> int:
+    """Загрузить котировки (charcode, date, value[, nominal]) через COPY.
+
+    Строки копируются во временную таблицу, откуда переносятся в котировки
+    без повторов (charcode, date) и без перезаписи уже загруженных.
+    Номинал по умолчанию - 1. Отсутствующие валюты и секции котировок
+    создаются. Возвращает количество добавленных котировок.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE rates_import "
+            "(charcode varchar, date date, value numeric, nominal integer)"
+        )
+        copy_rows(
+            "rates_import",
+            ["charcode", "date", "value", "nominal"],
+            ((*row, None)[:4] for row in rows),
+        )
+        cursor.execute(
+            "SELECT DISTINCT extract(year FROM date)::integer "
+            "FROM rates_import"
+        )
+        create_rates_partitions(year for (year,) in cursor.fetchall())
+        cursor.execute(
+            "INSERT INTO api_currency (charcode) "
+            "SELECT DISTINCT charcode FROM rates_import "
+            "ON CONFLICT (charcode) DO NOTHING"
+        )
+        if cursor.rowcount:
+            transaction.on_commit(currency_catalog.publish_change)
+        cursor.execute(
+            "INSERT INTO api_rates (currency_id, date, value, nominal) "
+            "SELECT DISTINCT ON (currency.id, date) "
+            "currency.id, date, value, coalesce(nominal, 1) "
+            "FROM rates_import JOIN api_currency AS currency USING (charcode) "
+            "ORDER BY currency.id, date "
+            "ON CONFLICT (currency_id, date) DO NOTHING"
+        )
+        created = cursor.rowcount
+        cursor.execute("DROP TABLE rates_import")
+    return created  # noqa R504
 
 
 def get_all_rates(order_by: str) -> Iterable:
@@ -58,16 +256,95 @@ def get_all_rates(order_by: str) -> Iterable:
     return (
         Rates.objects.order_by(order_by)
         .all()
-        .values("id", "date", "charcode", "value")
+        .values("id", "date", "value", charcode=F("currency__charcode"))
     )
 
 
 def get_filter_by_code_rates(currencies_dict: dict, order_by: str) -> Iterable:
-    """Получить котировки валют отфильтрованные по коду."""
+    """Получить котировки валют отфильтрованные по коду.
+
+    Фильтр по id валют из справочника позволяет использовать индекс
+    (currency, value, id) для постраничной выборки.
+    """
     return (
         Rates.objects.order_by(order_by)
-        .filter(charcode__in=currencies_dict)
-        .values("id", "date", "charcode", "value")
+        .filter(
+            currency_id__in=[
+                currency_catalog.get_id(charcode)
+                for charcode in currencies_dict
+            ]
+        )
+        .values("id", "date", "value", charcode=F("currency__charcode"))
+    )
+
+
+def refresh_latest_rates(charcodes: Iterable[str]) -> None:
+    """Обновить последние котировки валют по загруженным котировкам."""
+    LatestRate.objects.bulk_create(
+        [
+            LatestRate(
+                currency_id=rate.currency_id,
+                rate_id=rate.id,
+                date=rate.date,
+                value=rate.value,
+            )
+            for rate in Rates.objects.filter(currency__charcode__in=charcodes)
+            .order_by("currency", "-date")
+            .distinct("currency")
+        ],
+        update_conflicts=True,
+        unique_fields=["currency"],
+        update_fields=["rate_id", "date", "value"],
+    )
+
+
+def get_latest_values(charcodes: Iterable[str]) -> dict[str, decimal.Decimal]:
+    """Получить значения последних котировок валют."""
+    return dict(
+        LatestRate.objects.filter(
+            currency__charcode__in=charcodes
+        ).values_list("currency__charcode", "value")
+    )
+
+
+def get_crossed_thresholds(
+    changes: dict[str, tuple[decimal.Decimal, decimal.Decimal]]
+) -> Iterable:
+    """Получить пороги, пересеченные сменой котировок валют.
+
+    Признак превышения (value > threshold) меняется для порогов из
+    [min(старая, новая), max(старая, новая)), поэтому выборка идет по
+    диапазону индекса (currency, threshold), а не по всем порогам.
+    """
+    if not changes:
+        return UserCurrency.objects.none()
+    return UserCurrency.objects.filter(
+        reduce(
+            or_,
+            (
+                Q(
+                    currency_id=currency_catalog.get_id(charcode),
+                    threshold__gte=min(values),
+                    threshold__lt=max(values),
+                )
+                for charcode, values in changes.items()
+            ),
+        )
+    ).values(
+        "threshold",
+        charcode=F("currency__charcode"),
+        email=F("user__email"),
+        phone=F("user__phone"),
+    )
+
+
+def get_latest_rates(order_by: str) -> Iterable:
+    """Получить последние котировки всех валют."""
+    return LatestRate.objects.order_by(order_by).values(
+        "date",
+        "value",
+        id=F("rate_id"),
+        charcode=F("currency__charcode"),
     )
 
 
@@ -77,13 +354,320 @@ def get_filter_by_code_and_period_rates(
     """Получить котировки валют отфильтрованные по коду и периоду."""
     return (
         Rates.objects.order_by(order_by)
-        .filter(charcode=charcode)
+        .filter(currency__charcode=charcode)
         .filter(date__gte=date_from)
         .filter(date__lte=date_to)
-        .values("id", "date", "charcode", "value")
+        .values("id", "date", "value", charcode=F("currency__charcode"))
+    )
+
+
+def get_filter_by_codes_and_period_rates(
+    charcodes: Iterable[str], date_from: date, date_to: date
+) -> Iterable:
+    """Получить котировки валют за период в порядке валют и дат.
+
+    Строки - (charcode, date, value), пустой список кодов - все валюты.
+    """
+    rates = Rates.objects.filter(date__range=(date_from, date_to))
+    if charcodes:
+        rates = rates.filter(currency__charcode__in=charcodes)
+    return rates.order_by("currency__charcode", "date").values_list(
+        "currency__charcode", "date", "value"
+    )
+
+
+def get_filter_by_ids_and_period_rates(
+    currency_ids: Iterable[int], date_from: date, date_to: date
+) -> Iterable:
+    """Получить котировки валют по id за период в порядке валют и дат."""
+    return (
+        Rates.objects.filter(
+            currency_id__in=currency_ids, date__range=(date_from, date_to)
+        )
+        .order_by("currency__charcode", "date")
+        .values("id", "date", "value", charcode=F("currency__charcode"))
+    )
+
+
+def get_cross_rates(
+    base: str, quote: str, date_from: date, date_to: date
+) -> Iterable:
+    """Получить кросс-курс base/quote по дням периода.
+
+    Курс ЦБ РФ - цена nominal единиц валюты в рублях, поэтому кросс-курс -
+    отношение цен единицы валют. Котировки обеих валют сопоставляются по
+    дате в одном запросе, дни без котировки одной из валют или с
+    неизвестным номиналом пропускаются. Цена единицы рубля - 1.
+    """
+    prices = {
+        charcode: Value(decimal.Decimal(1))
+        if charcode == BASE_CURRENCY
+        else Max(
+            F("value") / F("nominal"),
+            filter=Q(currency_id=currency_catalog.get_id(charcode)),
+            output_field=DecimalField(),
+        )
+        for charcode in (base, quote)
+    }
+    return (
+        Rates.objects.filter(
+            currency_id__in=[
+                currency_catalog.get_id(charcode)
+                for charcode in prices
+                if charcode != BASE_CURRENCY
+            ],
+            date__range=(date_from, date_to),
+            nominal__isnull=False,
+        )
+        .values("date")
+        .annotate(base_price=prices[base], quote_price=prices[quote])
+        .filter(base_price__isnull=False, quote_price__isnull=False)
+        .values(
+            "date",
+            value=Round(
+                F("base_price") / F("quote_price"),
+                CROSS_RATE_DECIMAL_PLACES,
+                output_field=DecimalField(),
+            ),
+        )
+        .order_by("date")
+    )
+
+
+def refresh_rates_rollups(
+    charcodes: Iterable[str], date_from: date, date_to: date
+) -> None:
+    """Пересчитать агрегаты котировок за периоды, затронутые загрузкой.
+
+    Периоды пересчитываются по всем котировкам периода, в том числе за
+    дни после date_to.
+    """
+    for granularity in RatesRollup.Granularity.values:
+        periods = (
+            Rates.objects.filter(
+                currency__charcode__in=charcodes,
+                date__gte=truncate_date(date_from, granularity),
+                date__lte=get_period_end(date_to, granularity),
+            )
+            .annotate(
+                period_start=Trunc(
+                    "date", granularity, output_field=DateField()
+                )
+            )
+            .values("period_start", charcode=F("currency__charcode"))
+            .annotate(
+                values=ArrayAgg("value", ordering="date"),
+                high=Max("value"),
+                low=Min("value"),
+                avg=Avg("value"),
+                count=Count("id"),
+            )
+            .order_by()
+        )
+        RatesRollup.objects.bulk_create(
+            [
+                RatesRollup(
+                    charcode=period["charcode"],
+                    granularity=granularity,
+                    period_start=period["period_start"],
+                    open=period["values"][0],
+                    high=period["high"],
+                    low=period["low"],
+                    close=period["values"][-1],
+                    avg=period["avg"],
+                    count=period["count"],
+                )
+                for period in periods
+            ],
+            update_conflicts=True,
+            unique_fields=["charcode", "granularity", "period_start"],
+            update_fields=["open", "high", "low", "close", "avg", "count"],
+        )
+
+
+def refresh_rates_rollups_by_years(
+    charcodes: Iterable[str], date_from: date, date_to: date
+) -> None:
+    """Пересчитать агрегаты котировок за период по годам.
+
+    Пересчет по годам ограничивает объем котировок в одном запросе.
+    """
+    for year in range(date_from.year, date_to.year + 1):
+        refresh_rates_rollups(
+            charcodes,
+            max(date_from, date(year, 1, 1)),
+            min(date_to, date(year, 12, 31)),
+        )
+
+
+def get_rates_charcodes_period() -> tuple[list[str], date, date]:
+    """Получить коды валют и период всех загруженных котировок."""
+    period = Rates.objects.aggregate(
+        date_from=Min("date"), date_to=Max("date")
+    )
+    charcodes = list(
+        Currency.objects.filter(
+            Exists(Rates.objects.filter(currency=OuterRef("pk")))
+        ).values_list("charcode", flat=True)
+    )
+    return charcodes, period["date_from"], period["date_to"]
+
+
+def truncate_date(value: date, granularity: str) -> date:
+    """Получить начало недели, месяца или года, содержащего дату."""
+    if granularity == RatesRollup.Granularity.WEEK:
+        return value - timedelta(days=value.weekday())
+    if granularity == RatesRollup.Granularity.MONTH:
+        return value.replace(day=1)
+    return value.replace(month=1, day=1)
+
+
+def get_period_end(value: date, granularity: str) -> date:
+    """Получить конец недели, месяца или года, содержащего дату."""
+    if granularity == RatesRollup.Granularity.WEEK:
+        return truncate_date(value, granularity) + timedelta(days=6)
+    if granularity == RatesRollup.Granularity.MONTH:
+        next_month = value.replace(day=28) + timedelta(days=4)
+        return next_month - timedelta(days=next_month.day)
+    return value.replace(month=12, day=31)
+
+
+def get_filter_by_code_and_period_rollups(
+    charcode: str,
+    granularity: str,
+    date_from: date,
+    date_to: date,
+    order_by: str,
+) -> Iterable:
+    """Получить агрегаты котировок валюты за периоды внутри диапазона дат.
+
+    Значение периода - цена закрытия, дата - начало периода.
+    """
+    return (
+        RatesRollup.objects.filter(
+            charcode=charcode,
+            granularity=granularity,
+            period_start__gte=truncate_date(date_from, granularity),
+            period_start__lte=date_to,
+        )
+        .values(
+            "id",
+            "charcode",
+            "open",
+            "high",
+            "low",
+            "close",
+            "avg",
+            date=F("period_start"),
+            value=F("close"),
+        )
+        .order_by(order_by)
     )
 
 
 def get_filter_by_code_and_date_rates(charcode: str, date: date) -> Iterable:
     """Получить котировки валют отфильтрованные по коду и дате."""
-    return Rates.objects.filter(date=date, charcode=charcode)
+    return Rates.objects.filter(date=date, currency__charcode=charcode)
+
+
+def get_missing_rates_dates(date_from: date, date_to: date) -> list[date]:
+    """Получить даты периода, котировки за которые не загружены.
+
+    Даты котировок с неизвестным номиналом загружаются повторно.
+    """
+    rates = Rates.objects.filter(date__range=(date_from, date_to))
+    known_dates = set(rates.dates("date", "day")) - set(
+        rates.filter(nominal__isnull=True).dates("date", "day")
+    )
+    known_dates.update(
+        RatesDownload.objects.filter(
+            date__range=(date_from, date_to),
+            status=RatesDownload.Status.EMPTY,
+        ).values_list("date", flat=True)
+    )
+    return [
+        date_from + timedelta(days=num_day)
+        for num_day in range((date_to - date_from).days + 1)
+        if date_from + timedelta(days=num_day) not in known_dates
+    ]
+
+
+def get_failed_rates_dates() -> list[date]:
+    """Получить даты, котировки за которые не удалось загрузить."""
+    return list(
+        RatesDownload.objects.filter(
+            status=RatesDownload.Status.FAILED
+        ).values_list("date", flat=True)
+    )
+
+
+def mark_rates_dates_loaded(dates: Iterable[date]) -> None:
+    """Отметить даты как успешно загруженные."""
+    RatesDownload.objects.filter(date__in=dates).delete()
+
+
+def mark_rates_dates_empty(dates: Iterable[date]) -> None:
+    """Отметить даты, на которые ЦБ РФ не устанавливал курсы."""
+    RatesDownload.objects.bulk_create(
+        [
+            RatesDownload(date=target_date, status=RatesDownload.Status.EMPTY)
+            for target_date in dates
+        ],
+        update_conflicts=True,
+        unique_fields=["date"],
+        update_fields=["status", "error", "updated_at"],
+    )
+
+
+def mark_rates_dates_failed(errors: dict[date, str]) -> None:
+    """Отметить даты, котировки за которые не удалось загрузить."""
+    for target_date, error in errors.items():
+        if not RatesDownload.objects.filter(date=target_date).update(
+            status=RatesDownload.Status.FAILED,
+            error=error,
+            attempts=F("attempts") + 1,
+            updated_at=timezone.now(),
+        ):
+            RatesDownload.objects.create(
+                date=target_date,
+                status=RatesDownload.Status.FAILED,
+                error=error,
+                attempts=1,
+            )
+
+
+def create_backfill(date_from: date, date_to: date) -> RatesBackfill:
+    """Создать историческую загрузку котировок за период."""
+    return RatesBackfill.objects.create(date_from=date_from, date_to=date_to)
+
+
+def get_backfill_for_update(backfill_id: int) -> Optional[RatesBackfill]:
+    """Получить незавершенную загрузку с блокировкой строки.
+
+    Если загрузка уже обрабатывается другим воркером, возвращает None.
+    """
+    return (
+        RatesBackfill.objects.select_for_update(skip_locked=True)
+        .filter(id=backfill_id, finished_at__isnull=True)
+        .first()
+    )
+
+
+def update_backfill_checkpoint(
+    backfill: RatesBackfill, checkpoint: date
+) -> None:
+    """Сохранить последний загруженный день исторической загрузки."""
+    backfill.checkpoint = checkpoint
+    if checkpoint >= backfill.date_to:
+        backfill.finished_at = timezone.now()
+    backfill.save(update_fields=["checkpoint", "finished_at"])
+
+
+def get_unfinished_backfills() -> Iterable:
+    """Получить незавершенные исторические загрузки."""
+    return RatesBackfill.objects.filter(finished_at__isnull=True)
+
+
+def create_ingest_run(summary: dict) -> None:
+    """Сохранить итоги запуска загрузки котировок."""
+    RatesIngestRun.objects.create(**summary)
@@ -3,6 +3,8 @@ from django.contrib.auth.models import User
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from rates.settings import MAX_PHONE
+
 
 class RegistrationSerializer(serializers.Serializer):
     """Сериализатор входных данных регистрации."""
@@ -13,6 +15,7 @@ class RegistrationSerializer(serializers.Serializer):
     )
     first_name = serializers.CharField(required=False)
     last_name = serializers.CharField(required=False)
+    phone = serializers.CharField(required=False, max_length=MAX_PHONE)
 
 
 class AuthSerializer(TokenObtainPairSerializer):
@@ -0,0 +1,120 @@
+"""Модуль с потоковой отдачей ответов."""
+import csv
+import io
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, Sequence
+
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+
+from api.renderers import encode_json
+from rates.settings import STREAM_CHUNK_SIZE
+
+STREAM_QUERY_PARAM = "stream"
+
+
+def iter_queryset(queryset: QuerySet) -> Iterator[dict]:
+    """Читать строки запроса порциями через серверный курсор."""
+    return queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+
+def stream_json(key: str, rows: Iterable[dict]) -> StreamingHttpResponse:
+    """Ответ JSON вида {key: [...]}, формируемый по мере чтения строк."""
+    return StreamingHttpResponse(
+        iter_json(key, rows), content_type="application/json"
+    )
+
+
+def iter_json(key: str, rows: Iterable[dict]) -> Iterator[bytes]:
+    """Кодировать строки в JSON порциями по STREAM_CHUNK_SIZE строк."""
+    rows = iter(rows)
+    separator = b""
+    yield b"{" + encode_json(key) + b":["
+    while chunk := list(islice(rows, STREAM_CHUNK_SIZE)):
+        yield separator + encode_rows(chunk)
+        separator = b","
+    yield b"]}"
+
+
+def aiter_queryset(queryset: QuerySet) -> AsyncIterator[dict]:
+    """Асинхронно читать строки запроса порциями."""
+    return queryset.aiterator(chunk_size=STREAM_CHUNK_SIZE)
+
+
+def astream_json(key: str, rows: AsyncIterator[dict]) -> StreamingHttpResponse:
+    """Ответ JSON вида {key: [...]} для асинхронного источника строк."""
+    return StreamingHttpResponse(
+        aiter_json(key, rows), content_type="application/json"
+    )
+
+
+async def aiter_json(
+    key: str, rows: AsyncIterator[dict]
+) -> AsyncIterator[bytes]:
+    """Асинхронно кодировать строки в JSON порциями."""
+    separator, chunk = b"", []
+    yield b"{" + encode_json(key) + b":["
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) == STREAM_CHUNK_SIZE:
+            yield separator + encode_rows(chunk)
+            separator, chunk = b",", []
+    if chunk:
+        yield separator + encode_rows(chunk)
+    yield b"]}"
+
+
+def encode_rows(rows: list[dict]) -> bytes:
+    """Кодировать строки в элементы JSON массива без скобок."""
+    return encode_json(rows)[1:-1]
+
+
+def stream_export(
+    file_format: str,
+    filename: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+) -> StreamingHttpResponse:
+    """Файл CSV или NDJSON, формируемый по мере чтения строк."""
+    content_type, iter_rows = EXPORT_FORMATS[file_format]
+    response = StreamingHttpResponse(
+        iter_rows(columns, rows), content_type=content_type
+    )
+    response[
+        "Content-Disposition"
+    ] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
+
+def iter_csv(
+    columns: Sequence[str], rows: Iterable[Sequence]
+) -> Iterator[bytes]:
+    """Кодировать строки в CSV с заголовком порциями строк."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    rows = iter(rows)
+    while chunk := list(islice(rows, STREAM_CHUNK_SIZE)):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def iter_ndjson(
+    columns: Sequence[str], rows: Iterable[Sequence]
+) -> Iterator[bytes]:
+    """Кодировать строки в объекты JSON по одному на строку порциями."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, STREAM_CHUNK_SIZE)):
+        yield b"".join(
+            encode_json(dict(zip(columns, row))) + b"\n" for row in chunk
+        )
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", iter_csv),
+    "ndjson": ("application/x-ndjson", iter_ndjson),
+}
@@ -1,69 +1,278 @@
 """Модуль с задачами запускаемыми планировщиком."""
 from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Iterable, Optional
 
-import requests
 from celery import shared_task
-from loguru import logger
+from django.db import transaction
 
+from api.cache import LATEST_RATES_VERSION, bump_data_versions
+from api.client import fetch_contents, parse_rates
+from api.metrics import DOWNLOAD_DURATION, INGEST_FAILURES, INGEST_ROWS
+from api.models import RatesBackfill
+from api.notifications import Notification, send_notifications
+from api.partitions import create_upcoming_rates_partitions
+from api.profiling import IngestProfile, profile_ingest
 from api.repository import (
+    create_backfill,
     create_or_update_currency,
-    create_rate,
     get_all_currencies,
-    get_filter_by_code_and_date_rates,
+    get_backfill_for_update,
+    get_crossed_thresholds,
+    get_failed_rates_dates,
+    get_latest_values,
+    get_missing_rates_dates,
+    get_unfinished_backfills,
+    mark_rates_dates_empty,
+    mark_rates_dates_failed,
+    mark_rates_dates_loaded,
+    refresh_latest_rates,
+    refresh_rates_rollups,
+    update_backfill_checkpoint,
+    upsert_rates,
 )
 from rates.settings import (
-    API_REQUEST_TIMEOUT,
+    BACKFILL_CHUNK_DAYS,
     CURRENCY_KEY_IN_API,
     DAYS_TO_LOAD_RATES,
-    URL_ARCHIVE_RATES_BASE,
-    URL_ARCHIVE_RATES_SUFFIX,
-    URL_DAILY_RATES,
 )
 
 
 @shared_task(name="download_rates")
 def download_rates() -> None:
-    """Загрузить дневные котировки ЦБ РФ за последние n дней."""
+    """Загрузить дневные котировки ЦБ РФ за последние n дней.
+
+    Архивные котировки запрашиваются только за отсутствующие в базе дни.
+    """
+    with DOWNLOAD_DURATION.time(), profile_ingest("download_rates") as profile:
+        current_date = date.today()
+        missing_dates = get_missing_rates_dates(
+            current_date - timedelta(days=DAYS_TO_LOAD_RATES - 1),
+            current_date - timedelta(days=1),
+        )
+        rates_by_date = load_rates([current_date, *missing_dates], profile)
+        if CURRENCY_KEY_IN_API in rates_by_date.get(current_date, {}):
+            with profile.measure("persist"):
+                save_currencies(rates_by_date[current_date])
+
+
+@shared_task(name="retry_failed_rates")
+def retry_failed_rates() -> None:
+    """Повторно загрузить котировки за дни с ошибками загрузки."""
+    if failed_dates := get_failed_rates_dates():
+        with profile_ingest("retry_failed_rates") as profile:
+            load_rates(failed_dates, profile)
+
+
+@shared_task(name="create_rates_partitions")
+def create_rates_partitions() -> None:
+    """Заранее создать секции котировок за следующие годы."""
+    create_upcoming_rates_partitions()
+
+
+@shared_task(name="backfill_rates")
+def backfill_rates(backfill_id: int) -> None:
+    """Загрузить очередную порцию дней исторической загрузки котировок.
+
+    Каждая порция сохраняется вместе с контрольной точкой, поэтому
+    прерванная загрузка продолжается с первого незагруженного дня.
+    """
+    with transaction.atomic():
+        if not (backfill := get_backfill_for_update(backfill_id)):
+            return
+        checkpoint = backfill.checkpoint
+        chunk_from = (
+            checkpoint + timedelta(days=1)
+            if checkpoint
+            else backfill.date_from
+        )
+        chunk_to = min(
+            chunk_from + timedelta(days=BACKFILL_CHUNK_DAYS - 1),
+            backfill.date_to,
+        )
+        missing_dates = get_missing_rates_dates(chunk_from, chunk_to)
+
+    # запросы к API ЦБ РФ - без транзакции и блокировки загрузки
+    if missing_dates:
+        with profile_ingest("backfill_rates") as profile:
+            rates_by_date, errors = fetch_dates_rates(missing_dates, profile)
+            backfill = save_backfill_chunk(
+                backfill_id,
+                checkpoint,
+                chunk_to,
+                lambda: persist_rates(rates_by_date, errors, profile),
+            )
+    else:
+        backfill = save_backfill_chunk(
+            backfill_id, checkpoint, chunk_to, lambda: None
+        )
+
+    if backfill and not backfill.finished_at:
+        backfill_rates.delay(backfill_id)
+
+
+def save_backfill_chunk(
+    backfill_id: int,
+    checkpoint: Optional[date],
+    chunk_to: date,
+    save: Callable[[], None],
+) -> Optional[RatesBackfill]:
+    """Сохранить порцию загрузки и контрольную точку под блокировкой.
+
+    Возвращает None, если загрузка с контрольной точки checkpoint уже
+    продвинута или обрабатывается другим воркером.
+    """
+    with transaction.atomic():
+        backfill = get_backfill_for_update(backfill_id)
+        if not backfill or backfill.checkpoint != checkpoint:
+            return None
+        save()
+        update_backfill_checkpoint(backfill, chunk_to)
+    return backfill
+
+
+def start_backfill(date_from: date, date_to: date) -> None:
+    """Запустить историческую загрузку котировок за период."""
+    backfill_rates.delay(create_backfill(date_from, date_to).id)
+
+
+def resume_backfills() -> None:
+    """Продолжить прерванные исторические загрузки котировок."""
+    for backfill in get_unfinished_backfills():
+        backfill_rates.delay(backfill.id)
+
+
+def load_rates(
+    dates: Iterable[date], profile: IngestProfile
+) -> dict[date, dict]:
+    """Загрузить и сохранить котировки за даты по этапам профиля."""
+    rates_by_date, errors = fetch_dates_rates(dates, profile)
+    persist_rates(rates_by_date, errors, profile)
+    return rates_by_date
+
+
+def fetch_dates_rates(
+    dates: Iterable[date], profile: IngestProfile
+) -> tuple[dict[date, dict], dict[date, str]]:
+    """Запросить и разобрать котировки за даты, вернуть их и ошибки."""
+    with profile.measure("fetch"):
+        contents, errors, durations = fetch_contents(dates)
+    for target_date, seconds in durations.items():
+        profile.add_timing("fetch", seconds, target_date=target_date)
+
+    rates_by_date = {}
+    with profile.measure("parse"):
+        for target_date, content in contents.items():
+            with profile.measure("parse", target_date):
+                try:
+                    rates_by_date[target_date] = parse_rates(content)
+                except ValueError as exc:
+                    errors[target_date] = f"invalid response: {exc}"
+    return rates_by_date, errors
+
+
+def persist_rates(
+    rates_by_date: dict[date, dict],
+    errors: dict[date, str],
+    profile: IngestProfile,
+) -> None:
+    """Сохранить котировки за даты и обновить зависящие от них данные.
+
+    Дни без котировок и дни с ошибками загрузки фиксируются в базе.
+    """
     current_date = date.today()
-    todays_rates = get_data_from_api(URL_DAILY_RATES, current_date)
-    if CURRENCY_KEY_IN_API in todays_rates:
-        save_currencies(todays_rates)
-        save_rates(todays_rates)
-
-    for num_day in range(1, DAYS_TO_LOAD_RATES):
-        target_date = current_date - timedelta(days=num_day)
-        day = datetime.strftime(target_date, "%Y/%m/%d")
-        archive_url = (
-            f"{URL_ARCHIVE_RATES_BASE}/{day}/{URL_ARCHIVE_RATES_SUFFIX}"
+    loaded_dates, empty_dates, rates_dates, charcodes = [], [], [], set()
+    with profile.measure("persist"):
+        for target_date, rates in rates_by_date.items():
+            if CURRENCY_KEY_IN_API in rates:
+                with profile.measure("persist", target_date):
+                    save_rates(rates)
+                profile.rows += len(rates[CURRENCY_KEY_IN_API])
+                rates_dates.append(get_rates_date(rates))
+                charcodes.update(rates[CURRENCY_KEY_IN_API])
+            if get_rates_date(rates) == target_date:
+                loaded_dates.append(target_date)
+            elif target_date != current_date:
+                # курсы на дату не устанавливались, архив отдает другой день
+                empty_dates.append(target_date)
+
+        mark_rates_dates_loaded(loaded_dates)
+        mark_rates_dates_empty(empty_dates)
+        mark_rates_dates_failed(errors)
+    INGEST_ROWS.inc(profile.rows)
+    INGEST_FAILURES.inc(len(errors))
+    profile.failed_dates += len(errors)
+
+    with profile.measure("refresh"):
+        previous_values = get_latest_values(charcodes)
+        refresh_latest_rates(charcodes)
+        notify_threshold_crossings(
+            previous_values, get_latest_values(charcodes)
         )
-        archive_rates = get_data_from_api(archive_url, target_date)
-        if CURRENCY_KEY_IN_API in archive_rates:
-            save_rates(archive_rates)
-
-
-def get_data_from_api(url: str, target_date: date) -> dict:
-    """Получить данные из API ЦБ РФ."""
-    try:
-        rates = requests.get(url, timeout=API_REQUEST_TIMEOUT).json()
-    except Exception as exc:
-        logger.error(
-            f"failed to load rates from url {url} for date "
-            f"{str(target_date)}: {exc}"
+        if rates_dates:
+            refresh_rates_rollups(
+                charcodes, min(rates_dates), max(rates_dates)
+            )
+        if charcodes:
+            bump_data_versions([*charcodes, LATEST_RATES_VERSION])
+
+
+def notify_threshold_crossings(
+    previous_values: dict[str, Decimal], values: dict[str, Decimal]
+) -> None:
+    """Уведомить пользователей о пересечении порогов новыми котировками.
+
+    Сравниваются последние котировки валют до и после загрузки, поэтому
+    загрузка архивных дней уведомлений не вызывает.
+    """
+    changes = {
+        charcode: (previous_values[charcode], value)
+        for charcode, value in values.items()
+        if previous_values.get(charcode, value) != value
+    }
+    send_notifications(
+        Notification(
+            email=crossing["email"],
+            phone=crossing["phone"],
+            text=get_threshold_crossing_text(
+                crossing["charcode"],
+                values[crossing["charcode"]],
+                crossing["threshold"],
+            ),
         )
-        rates = {}
+        for crossing in get_crossed_thresholds(changes).iterator()
+    )
+
+
+def get_threshold_crossing_text(
+    charcode: str, value: Decimal, threshold: int
+) -> str:
+    """Текст уведомления о пересечении порога."""
+    if value > threshold:
+        return f"{charcode} rate {value} exceeded your threshold {threshold}"
+    return f"{charcode} rate {value} fell below your threshold {threshold}"
 
-    return rates
+
+def get_rates_date(rates: dict) -> Optional[date]:
+    """Получить дату котировок из ответа API ЦБ РФ."""
+    if "Date" not in rates:
+        return None
+    return datetime.fromisoformat(rates["Date"]).date()
 
 
 def save_rates(rates: dict) -> None:
     """Сохранить котировки валют за конкретную дату."""
-    for currency in rates[CURRENCY_KEY_IN_API]:
-        if not get_filter_by_code_and_date_rates(currency, rates["Date"]):
-            create_rate(
-                rates["Date"],
-                currency,
-                rates[CURRENCY_KEY_IN_API][currency]["Value"],
-            )
+    upsert_rates(
+        get_rates_date(rates),
+        {
+            charcode: currency["Value"]
+            for charcode, currency in rates[CURRENCY_KEY_IN_API].items()
+        },
+        {
+            charcode: currency.get("Nominal", 1)
+            for charcode, currency in rates[CURRENCY_KEY_IN_API].items()
+        },
+    )
 
 
 def save_currencies(rates: dict) -> None:
@@ -1,25 +1,46 @@
 """Модуль путей приложения."""
 from django.urls import path
-from django.views.decorators.cache import cache_page
 
+from api.async_views import (
+    AsyncAnaliticsView,
+    AsyncCurrencyView,
+    AsyncRatesView,
+)
 from api.views import (
     AnaliticsView,
     Auth,
+    BatchAnaliticsView,
+    CrossRatesView,
     CurrencyView,
+    RatesExportView,
+    RatesHistoryView,
     RatesView,
     Registration,
 )
-from rates.settings import CACHE_TIMEOUT
+from rates.settings import ASYNC_VIEWS
+
+# под ASGI сервером запросы на чтение обрабатываются асинхронно
+rates_view = (AsyncRatesView if ASYNC_VIEWS else RatesView).as_view()
+analitics_view = (
+    AsyncAnaliticsView if ASYNC_VIEWS else AnaliticsView
+).as_view()
+currencies_view = (
+    AsyncCurrencyView if ASYNC_VIEWS else CurrencyView
+).as_view()
 
 urlpatterns = [
     path("user/register/", Registration.as_view(), name="registration"),
     path("user/login/", Auth.as_view(), name="auth"),
-    path("currency/user_currency/", RatesView.as_view(), name="user_currency"),
-    path("rates/", RatesView.as_view(), name="rates"),
+    path("currency/user_currency/", rates_view, name="user_currency"),
+    path("rates/", rates_view, name="rates"),
+    path("rates/history/", RatesHistoryView.as_view(), name="rates_history"),
+    path("rates/export/", RatesExportView.as_view(), name="rates_export"),
+    path("rates/cross/", CrossRatesView.as_view(), name="cross_rates"),
+    path("currency/<int:id>/analytics/", analitics_view, name="analitics"),
     path(
-        "currency/<int:id>/analytics/",
-        cache_page(CACHE_TIMEOUT)(AnaliticsView.as_view()),
-        name="analitics",
+        "currency/analytics/",
+        BatchAnaliticsView.as_view(),
+        name="batch_analitics",
     ),
-    path("currency/all/", CurrencyView.as_view(), name="currencies"),
+    path("currency/all/", currencies_view, name="currencies"),
 ]
@@ -1,8 +1,14 @@
 """Модуль с обработчиками запросов."""
-from datetime import datetime
-from typing import Any
-
-from django.http import JsonResponse
+from datetime import date, datetime
+from itertools import groupby
+from operator import attrgetter, itemgetter
+from typing import Any, Optional
+
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     OpenApiParameter,
     extend_schema,
@@ -12,29 +18,92 @@ from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from api.analytics import annotate_analytics, annotate_batch_analytics
+from api.cache import LATEST_RATES_VERSION, get_or_load, get_user_version
+from api.models import Currency, RatesRollup
+from api.pagination import KeysetPagination
+from api.rates_statistics import (
+    MAX_WINDOW,
+    MAX_WINDOWS_COUNT,
+    get_rates_statistics,
+)
 from api.repository import (
     create_or_update_user_currency,
     create_user,
     get_all_currencies,
     get_all_rates,
+    get_cross_rates,
     get_currency,
     get_filter_by_code_and_period_rates,
+    get_filter_by_code_and_period_rollups,
     get_filter_by_code_rates,
-    get_user_currencies,
+    get_filter_by_codes_and_period_rates,
+    get_filter_by_ids_and_period_rates,
+    get_latest_rates,
+    get_unknown_charcodes,
+    get_user_latest_rates,
 )
 from api.serializers import (
     AuthSerializer,
     RatesSerializer,
     RegistrationSerializer,
 )
+from api.streaming import (
+    EXPORT_FORMATS,
+    STREAM_QUERY_PARAM,
+    iter_queryset,
+    stream_export,
+    stream_json,
+)
+from rates.settings import BASE_CURRENCY
+
+NUMERIC_QUERY_PARAM = "numeric"
+STATISTICS_QUERY_PARAM = "statistics"
+DEFAULT_STATISTICS_WINDOWS = "20"
+EXPORT_FORMAT_QUERY_PARAM = "file_format"
+ANALYTICS_CACHE_SCOPE = "analytics"
+BATCH_ANALYTICS_CACHE_SCOPE = "batch_analytics"
+CROSS_RATES_CACHE_SCOPE = "cross_rates"
+CURRENCY_NOT_FOUND_ERROR = (
+    "currency with this ID not found, use endpoint 'currency/all/' to "
+    "obtain all available currencies"
+)
+TRACKED_RATES_CACHE_SCOPE = "tracked_rates"
+PAGINATION_PARAMETERS = [
+    OpenApiParameter(
+        name="limit",
+        description="Количество записей на странице",
+        required=False,
+        type=int,
+    ),
+    OpenApiParameter(
+        name="cursor",
+        description="Курсор страницы из полей next или previous ответа",
+        required=False,
+        type=str,
+    ),
+]
+STREAM_PARAMETER = OpenApiParameter(
+    name=STREAM_QUERY_PARAM,
+    description="Отдать все записи одним потоковым ответом без пагинации",
+    required=False,
+    type=bool,
+)
+PAGINATION_FIELDS = {
+    "next": serializers.CharField(allow_null=True),
+    "previous": serializers.CharField(allow_null=True),
+}
 
 
 class Registration(APIView):
     """Класс регистрации через email."""
 
+    query_budget = 4
+
     @extend_schema(request=RegistrationSerializer, responses={201: None})
     def post(
         self,
@@ -62,6 +131,8 @@ class Registration(APIView):
 class Auth(TokenObtainPairView):
     """Класс авторизации через email."""
 
+    query_budget = 4
+
     def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """Получение токена аутентификации по email и password."""
         serializer = AuthSerializer(data=request.data)
@@ -77,7 +148,11 @@ class Auth(TokenObtainPairView):
 class RatesView(APIView):
     """Класс для работы с котировками."""
 
+    # запросов к базе данных, включая загрузку пользователя по JWT
+    query_budget = {"GET": 2, "POST": 8}
+
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
 
     @extend_schema(
         request=RatesSerializer,
@@ -102,11 +177,7 @@ class RatesView(APIView):
             )
         if not (currency := get_currency(serializer.data["currency"])):
             return Response(
-                {
-                    "errors": "currency with this ID not found, use "
-                    "endpoint 'currency/all/' to obtain all available "
-                    "currencies"
-                },
+                {"errors": CURRENCY_NOT_FOUND_ERROR},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
@@ -124,40 +195,251 @@ class RatesView(APIView):
                 required=False,
                 type=str,
             ),
+            *PAGINATION_PARAMETERS,
         ],
         responses={
             200: inline_serializer(
                 name="TrackableRates",
-                fields={"rates": serializers.ListField()},
+                fields={
+                    "rates": serializers.ListField(),
+                    **PAGINATION_FIELDS,
+                },
             )
         },
     )
-    def get(self, request: Request, *args: Any, **kwargs: Any) -> JsonResponse:
-        """Получение списка актуальных котировок."""
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Получение списка последних котировок валют."""
         order_by = get_order_by(request.GET.get("order_by"))
+        paginator = self.pagination_class()
 
         if not request.user.is_authenticated:
-            return JsonResponse({"rates": list(get_all_rates(order_by))})
+            rates = paginator.paginate_queryset(
+                get_latest_rates(order_by), request
+            )
+            return Response(paginator.get_paginated_data("rates", rates))
 
-        user_currencies = get_user_currencies(request.user.id)
-        user_currencies_dict = {
-            currency.charcode: currency.threshold
-            for currency in user_currencies
-        }
-        trackable_rates = list(
-            get_filter_by_code_rates(user_currencies_dict, order_by)
+        def get_rates_page() -> dict:
+            """Страница котировок отслеживаемых пользователем валют."""
+            trackable_rates = paginator.paginate_queryset(
+                get_user_latest_rates(request.user.id, order_by), request
+            )
+            return paginator.get_paginated_data("rates", trackable_rates)
+
+        return Response(
+            get_or_load(
+                TRACKED_RATES_CACHE_SCOPE,
+                [get_user_version(request.user.id), LATEST_RATES_VERSION],
+                {
+                    "user_id": request.user.id,
+                    "order_by": order_by,
+                    **get_page_params(paginator, request),
+                },
+                get_rates_page,
+            )
         )
-        for rate in trackable_rates:
-            rate["is_threshold_exceeded"] = (
-                rate["value"] > user_currencies_dict[rate["charcode"]]
+
+
+class RatesHistoryView(APIView):
+    """Класс для работы с историей котировок."""
+
+    query_budget = 2
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="charcode",
+                description="Код валюты",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="order_by",
+                description="value или -value",
+                required=False,
+                type=str,
+            ),
+            *PAGINATION_PARAMETERS,
+            STREAM_PARAMETER,
+        ],
+        responses={
+            200: inline_serializer(
+                name="RatesHistory",
+                fields={
+                    "rates": serializers.ListField(),
+                    **PAGINATION_FIELDS,
+                },
+            )
+        },
+    )
+    def get(
+        self, request: Request, *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        """Получение истории котировок постранично или потоком."""
+        order_by = get_order_by(request.GET.get("order_by"))
+        rates = (
+            get_filter_by_code_rates([charcode], order_by)
+            if (charcode := request.GET.get("charcode"))
+            else get_all_rates(order_by)
+        )
+        if is_query_flag_set(request, STREAM_QUERY_PARAM):
+            return stream_json("rates", iter_queryset(rates))
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(rates, request)
+        return Response(paginator.get_paginated_data("rates", page))
+
+
+class CrossRatesView(APIView):
+    """Класс для работы с кросс-курсами валют."""
+
+    query_budget = 2
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="base",
+                description=f"Код базовой валюты, в том числе {BASE_CURRENCY}",
+                required=True,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="quote",
+                description=f"Код валюты котировки, в том числе {BASE_CURRENCY}",
+                required=True,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_from",
+                description="Дата от",
+                required=True,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_to", description="Дата до", required=True, type=str
+            ),
+        ],
+        responses={
+            200: inline_serializer(
+                name="CrossRates",
+                fields={
+                    "base": serializers.CharField(),
+                    "quote": serializers.CharField(),
+                    "rates": serializers.ListField(),
+                },
+            ),
+            400: inline_serializer(
+                name="WrongCrossRatesParams",
+                fields={"errors": serializers.CharField()},
+            ),
+        },
+    )
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Получение кросс-курса пары валют по дням периода."""
+        try:
+            params = get_cross_rates_params(request)
+        except ValueError as exc:
+            return Response(
+                {"errors": str(exc)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            get_or_load(
+                CROSS_RATES_CACHE_SCOPE,
+                [
+                    charcode
+                    for charcode in (params["base"], params["quote"])
+                    if charcode != BASE_CURRENCY
+                ],
+                params,
+                lambda: {
+                    "base": params["base"],
+                    "quote": params["quote"],
+                    "rates": list(get_cross_rates(**params)),
+                },
+            )
+        )
+
+
+@method_decorator(gzip_page, name="dispatch")
+class RatesExportView(APIView):
+    """Класс для выгрузки истории котировок в файл.
+
+    Котировки читаются серверным курсором и отдаются потоком, при
+    Accept-Encoding: gzip ответ сжимается по мере формирования.
+    """
+
+    query_budget = 1
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="charcode",
+                description="Коды валют через запятую, по умолчанию - все",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_from",
+                description="Дата от",
+                required=True,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_to", description="Дата до", required=True, type=str
+            ),
+            OpenApiParameter(
+                name=EXPORT_FORMAT_QUERY_PARAM,
+                description="csv или ndjson, по умолчанию - csv",
+                required=False,
+                type=str,
+            ),
+        ],
+        responses={
+            (200, "text/csv"): OpenApiTypes.STR,
+            (200, "application/x-ndjson"): OpenApiTypes.STR,
+            400: inline_serializer(
+                name="WrongExportParams",
+                fields={"errors": serializers.CharField()},
+            ),
+        },
+    )
+    def get(
+        self, request: Request, *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        """Выгрузка котировок валют за период в CSV или NDJSON."""
+        try:
+            params = get_export_params(request)
+        except ValueError as exc:
+            return Response(
+                {"errors": str(exc)}, status=status.HTTP_400_BAD_REQUEST
             )
-        return JsonResponse({"rates": trackable_rates})
+
+        return stream_export(
+            params["file_format"],
+            f"rates-{params['date_from']}-{params['date_to']}",
+            ["charcode", "date", "value"],
+            iter_queryset(
+                get_filter_by_codes_and_period_rates(
+                    params["charcodes"], params["date_from"], params["date_to"]
+                )
+            ),
+        )
 
 
 class AnaliticsView(APIView):
     """Класс для работы с аналитикой котировок."""
 
+    query_budget = 4
+
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
 
     @extend_schema(
         parameters=[
@@ -182,10 +464,49 @@ class AnaliticsView(APIView):
                 required=False,
                 type=str,
             ),
+            OpenApiParameter(
+                name="granularity",
+                description="day, week, month или year",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name=NUMERIC_QUERY_PARAM,
+                description="Процент от порога числом, а не строкой",
+                required=False,
+                type=bool,
+            ),
+            OpenApiParameter(
+                name=STATISTICS_QUERY_PARAM,
+                description=(
+                    "Добавить статистики за период: SMA, EMA, доходности, "
+                    "волатильность, перцентили и просадку на первой странице"
+                ),
+                required=False,
+                type=bool,
+            ),
+            OpenApiParameter(
+                name="windows",
+                description=(
+                    "Окна SMA, EMA и волатильности через запятую, "
+                    f"по умолчанию {DEFAULT_STATISTICS_WINDOWS}"
+                ),
+                required=False,
+                type=str,
+            ),
+            *PAGINATION_PARAMETERS,
+            STREAM_PARAMETER,
         ],
         responses={
             200: inline_serializer(
-                name="TargetRates", fields={"rates": serializers.ListField()}
+                name="TargetRates",
+                fields={
+                    "rates": serializers.ListField(),
+                    STATISTICS_QUERY_PARAM: serializers.DictField(
+                        required=False
+                    ),
+                    **PAGINATION_FIELDS,
+                },
             ),
             404: inline_serializer(
                 name="CurrencyNotFound",
@@ -203,56 +524,137 @@ class AnaliticsView(APIView):
         id: int,  # noqa A002
         *args: Any,
         **kwargs: Any,
-    ) -> JsonResponse:
+    ) -> HttpResponseBase:
         """Получение аналитических данных по котирумой валюте за период."""
         if not (target_currency := get_currency(id)):
-            return JsonResponse(
-                {
-                    "errors": "currency with this ID not found, use "
-                    "endpoint 'currency/all/' to obtain all available "
-                    "currencies"
-                },
+            return Response(
+                {"errors": CURRENCY_NOT_FOUND_ERROR},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        for query_param in (
-            "threshold",
-            "date_from",
-            "date_to",
-        ):  # обязательные параметры запроса на аналитику
-            if not request.GET.get(query_param):
-                return JsonResponse(
-                    {"errors": f"'{query_param}' required in query params"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
         try:
-            threshold = int(request.GET.get("threshold"))
-            date_from = datetime.fromisoformat(
-                request.GET.get("date_from")
-            ).date()
-            date_to = datetime.fromisoformat(request.GET.get("date_to")).date()
-        except Exception as exc:
-            return JsonResponse(
-                {"errors": f"please check query params: '{exc}'"},
-                status=status.HTTP_400_BAD_REQUEST,
+            params = get_analytics_params(request)
+            windows = get_statistics_windows(request)
+        except ValueError as exc:
+            return Response(
+                {"errors": str(exc)}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        order_by = get_order_by(request.GET.get("order_by"))
+        if is_query_flag_set(request, STREAM_QUERY_PARAM):
+            return stream_json(
+                "rates",
+                iter_queryset(
+                    get_analytics_rates(target_currency.charcode, **params)
+                ),
+            )
 
-        target_rates = list(
-            get_filter_by_code_and_period_rates(
-                target_currency.charcode, date_from, date_to, order_by
+        paginator = self.pagination_class()
+
+        def get_rates_page() -> dict:
+            """Страница аналитики с курсорами соседних страниц."""
+            target_rates = paginator.paginate_queryset(
+                get_analytics_rates(target_currency.charcode, **params),
+                request,
+            )
+            return add_statistics(
+                paginator.get_paginated_data("rates", target_rates),
+                target_currency.charcode,
+                params,
+                windows,
+            )
+
+        return Response(
+            get_or_load(
+                ANALYTICS_CACHE_SCOPE,
+                [target_currency.charcode],
+                {
+                    **params,
+                    **get_page_params(paginator, request),
+                    "windows": windows,
+                },
+                get_rates_page,
             )
         )
 
-        add_analytics_fields(target_rates, threshold, order_by)
 
-        return JsonResponse({"rates": target_rates})
+class BatchAnaliticsView(APIView):
+    """Класс для работы с аналитикой котировок нескольких валют.
+
+    Котировки всех валют получаются одним запросом вместо запроса на
+    аналитику каждой валюты.
+    """
+
+    query_budget = 2
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="currencies",
+                description=(
+                    "Валюты с порогами в виде id:threshold через запятую, "
+                    "например 1:90,2:100"
+                ),
+                required=True,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_from",
+                description="Дата от",
+                required=True,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_to", description="Дата до", required=True, type=str
+            ),
+            OpenApiParameter(
+                name=NUMERIC_QUERY_PARAM,
+                description="Процент от порога числом, а не строкой",
+                required=False,
+                type=bool,
+            ),
+        ],
+        responses={
+            200: inline_serializer(
+                name="BatchTargetRates",
+                fields={"currencies": serializers.ListField()},
+            ),
+            400: inline_serializer(
+                name="WrongBatchQueryParams",
+                fields={"errors": serializers.CharField()},
+            ),
+        },
+    )
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Получение аналитических данных по валютам за период."""
+        try:
+            params = get_batch_analytics_params(request)
+        except ValueError as exc:
+            return Response(
+                {"errors": str(exc)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        currencies = {
+            currency_id: get_currency(currency_id)
+            for currency_id in params["thresholds"]
+        }
+        return Response(
+            get_or_load(
+                BATCH_ANALYTICS_CACHE_SCOPE,
+                [currency.charcode for currency in currencies.values()],
+                params,
+                lambda: {
+                    "currencies": get_batch_analytics(currencies, **params)
+                },
+            )
+        )
 
 
 class CurrencyView(APIView):
     """Класс для работы с валютами."""
 
+    query_budget = 2
+
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     @extend_schema(
@@ -263,48 +665,275 @@ class CurrencyView(APIView):
             )
         }
     )
-    def get(self, request: Request, *args: Any, **kwargs: Any) -> JsonResponse:
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """Получение всех валют."""
-        return JsonResponse(
+        return Response(
             {
                 "currencies": {
-                    currency.id: currency.charcode
+                    str(currency.id): currency.charcode
                     for currency in get_all_currencies()
                 }
             }
         )
 
 
-def add_analytics_fields(
-    target_rates: list, threshold: int, order_by: str
-) -> None:
-    """Добавление полей с аналитикой валют."""
-    for num, rate in enumerate(target_rates, start=1):
-        rate["percentage_ratio"] = (
-            str(round(100 * rate["value"] / threshold, 2)) + "%"
-        )
-        if rate["value"] > threshold:
-            rate["is_threshold_exceeded"] = True
-            rate["threshold_match_type"] = "exceeded"
-        elif rate["value"] < threshold:
-            rate["is_threshold_exceeded"] = False
-            rate["threshold_match_type"] = "less"
-        elif rate["value"] == threshold:
-            rate["is_threshold_exceeded"] = False
-            rate["threshold_match_type"] = "equal"
-
-        rate["is_min_value"] = bool(
-            num == 1
-            and order_by == "value"
-            or num == len(target_rates)
-            and order_by == "-value"
+def is_query_flag_set(request: HttpRequest, name: str) -> bool:
+    """Установлен ли логический параметр запроса."""
+    return request.GET.get(name, "").lower() in ("1", "true")
+
+
+def get_analytics_params(request: HttpRequest) -> dict:
+    """Параметры запроса аналитики, ValueError при неверных параметрах."""
+    for query_param in (
+        "threshold",
+        "date_from",
+        "date_to",
+    ):  # обязательные параметры запроса на аналитику
+        if not request.GET.get(query_param):
+            raise ValueError(f"'{query_param}' required in query params")
+
+    try:
+        return {
+            "threshold": int(request.GET.get("threshold")),
+            "date_from": datetime.fromisoformat(
+                request.GET.get("date_from")
+            ).date(),
+            "date_to": datetime.fromisoformat(
+                request.GET.get("date_to")
+            ).date(),
+            "granularity": get_granularity(request.GET.get("granularity")),
+            "order_by": get_order_by(request.GET.get("order_by")),
+            "numeric": is_query_flag_set(request, NUMERIC_QUERY_PARAM),
+        }
+    except Exception as exc:
+        raise ValueError(f"please check query params: '{exc}'") from exc
+
+
+def get_statistics_windows(request: HttpRequest) -> Optional[list[int]]:
+    """Окна статистик аналитики, None - статистики не запрошены.
+
+    Статистики считаются за весь период, поэтому отдаются только с первой
+    страницей, без курсора.
+    """
+    if not is_query_flag_set(request, STATISTICS_QUERY_PARAM):
+        return None
+    if request.GET.get(KeysetPagination.cursor_query_param):
+        return None
+    try:
+        windows = sorted(
+            {
+                int(window)
+                for window in request.GET.get(
+                    "windows", DEFAULT_STATISTICS_WINDOWS
+                ).split(",")
+            }
         )
-        rate["is_max_value"] = bool(
-            num == len(target_rates)
-            and order_by == "value"
-            or num == 1
-            and order_by == "-value"
+    except ValueError as exc:
+        raise ValueError(f"please check query params: '{exc}'") from exc
+    if not 0 < len(windows) <= MAX_WINDOWS_COUNT:
+        raise ValueError(f"up to {MAX_WINDOWS_COUNT} 'windows' allowed")
+    if not 2 <= windows[0] <= windows[-1] <= MAX_WINDOW:
+        raise ValueError(f"'windows' must be from 2 to {MAX_WINDOW}")
+    return windows
+
+
+def get_batch_analytics_params(request: HttpRequest) -> dict:
+    """Параметры запроса аналитики валют, ValueError при неверных параметрах."""
+    for query_param in ("currencies", "date_from", "date_to"):
+        if not request.GET.get(query_param):
+            raise ValueError(f"'{query_param}' required in query params")
+
+    thresholds = {}
+    try:
+        for value in request.GET.getlist("currencies"):
+            for currency in value.split(","):
+                currency_id, threshold = currency.split(":")
+                thresholds[int(currency_id)] = int(threshold)
+        params = {
+            "thresholds": thresholds,
+            "date_from": datetime.fromisoformat(
+                request.GET.get("date_from")
+            ).date(),
+            "date_to": datetime.fromisoformat(
+                request.GET.get("date_to")
+            ).date(),
+            "numeric": is_query_flag_set(request, NUMERIC_QUERY_PARAM),
+        }
+    except Exception as exc:
+        raise ValueError(f"please check query params: '{exc}'") from exc
+
+    if unknown := [
+        str(currency_id)
+        for currency_id in thresholds
+        if not get_currency(currency_id)
+    ]:
+        raise ValueError(f"unknown currencies {', '.join(unknown)}")
+    return params
+
+
+def get_cross_rates_params(request: HttpRequest) -> dict:
+    """Параметры запроса кросс-курса, ValueError при неверных параметрах."""
+    for query_param in ("base", "quote", "date_from", "date_to"):
+        if not request.GET.get(query_param):
+            raise ValueError(f"'{query_param}' required in query params")
+
+    base = request.GET["base"].upper()
+    quote = request.GET["quote"].upper()
+    if base == quote:
+        raise ValueError("'base' and 'quote' must differ")
+    if unknown := get_unknown_charcodes(
+        charcode for charcode in (base, quote) if charcode != BASE_CURRENCY
+    ):
+        raise ValueError(f"unknown currencies {', '.join(unknown)}")
+
+    try:
+        return {
+            "base": base,
+            "quote": quote,
+            "date_from": datetime.fromisoformat(
+                request.GET.get("date_from")
+            ).date(),
+            "date_to": datetime.fromisoformat(
+                request.GET.get("date_to")
+            ).date(),
+        }
+    except Exception as exc:
+        raise ValueError(f"please check query params: '{exc}'") from exc
+
+
+def get_export_params(request: HttpRequest) -> dict:
+    """Параметры выгрузки котировок, ValueError при неверных параметрах."""
+    for query_param in ("date_from", "date_to"):
+        if not request.GET.get(query_param):
+            raise ValueError(f"'{query_param}' required in query params")
+
+    file_format = request.GET.get(EXPORT_FORMAT_QUERY_PARAM, "csv")
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"unknown {EXPORT_FORMAT_QUERY_PARAM} {file_format}")
+    charcodes = [
+        charcode.strip().upper()
+        for value in request.GET.getlist("charcode")
+        for charcode in value.split(",")
+        if charcode.strip()
+    ]
+    if unknown := get_unknown_charcodes(charcodes):
+        raise ValueError(f"unknown currencies {', '.join(unknown)}")
+
+    try:
+        return {
+            "charcodes": charcodes,
+            "date_from": datetime.fromisoformat(
+                request.GET.get("date_from")
+            ).date(),
+            "date_to": datetime.fromisoformat(
+                request.GET.get("date_to")
+            ).date(),
+            "file_format": file_format,
+        }
+    except Exception as exc:
+        raise ValueError(f"please check query params: '{exc}'") from exc
+
+
+def get_analytics_rates(
+    charcode: str,
+    threshold: int,
+    date_from: date,
+    date_to: date,
+    granularity: Optional[str],
+    order_by: str,
+    numeric: bool,
+) -> QuerySet:
+    """Котировки валюты за период с полями аналитики."""
+    return annotate_analytics(
+        get_period_rates(charcode, date_from, date_to, granularity, order_by),
+        threshold,
+        numeric=numeric,
+    )
+
+
+def get_period_rates(
+    charcode: str,
+    date_from: date,
+    date_to: date,
+    granularity: Optional[str],
+    order_by: str,
+) -> QuerySet:
+    """Котировки валюты за период или их агрегаты по периодам granularity."""
+    if granularity:
+        return get_filter_by_code_and_period_rollups(
+            charcode, granularity, date_from, date_to, order_by
         )
+    return get_filter_by_code_and_period_rates(
+        charcode, date_from, date_to, order_by
+    )
+
+
+def add_statistics(
+    data: dict, charcode: str, params: dict, windows: Optional[list[int]]
+) -> dict:
+    """Добавить к ответу аналитики статистики за весь период запроса."""
+    if windows is None:
+        return data
+    rates = get_period_rates(
+        charcode,
+        params["date_from"],
+        params["date_to"],
+        params["granularity"],
+        "date",
+    )
+    return {
+        **data,
+        STATISTICS_QUERY_PARAM: get_rates_statistics(rates, windows),
+    }
+
+
+def get_batch_analytics(
+    currencies: dict[int, Currency],
+    thresholds: dict[int, int],
+    date_from: date,
+    date_to: date,
+    numeric: bool,
+) -> list[dict]:
+    """Аналитика котировок валют за период, сгруппированная по валютам.
+
+    Котировки всех валют получаются одним запросом в порядке валют и дат,
+    валюты без котировок за период возвращаются с пустым списком.
+    """
+    rates = annotate_batch_analytics(
+        get_filter_by_ids_and_period_rates(thresholds, date_from, date_to),
+        thresholds,
+        numeric=numeric,
+    )
+    rates_by_charcode = {
+        charcode: list(group)
+        for charcode, group in groupby(rates, key=itemgetter("charcode"))
+    }
+    return [
+        {
+            "id": currency.id,
+            "charcode": currency.charcode,
+            "threshold": thresholds[currency.id],
+            "rates": rates_by_charcode.get(currency.charcode, []),
+        }
+        for currency in sorted(currencies.values(), key=attrgetter("charcode"))
+    ]
+
+
+def get_page_params(paginator: KeysetPagination, request: HttpRequest) -> dict:
+    """Параметры запрошенной страницы для ключа кэша."""
+    return {
+        "cursor": request.GET.get(paginator.cursor_query_param),
+        "limit": paginator.get_page_size(request),
+    }
+
+
+def get_granularity(granularity: Optional[str]) -> Optional[str]:
+    """Определить период агрегации котировок, None - по дням."""
+    if not granularity or granularity == "day":
+        return None
+    if granularity not in RatesRollup.Granularity.values:
+        raise ValueError(f"unknown granularity {granularity}")
+    return granularity
 
 
 def get_order_by(order_by: str) -> str:
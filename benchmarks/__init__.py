@@ -0,0 +1,10 @@
+"""Бенчмарки производительности сервиса.
+
+Запуск: python -m benchmarks.<имя модуля>
+"""
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rates.settings")
+django.setup()
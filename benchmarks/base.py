@@ -0,0 +1,69 @@
+"""Общие инструменты бенчмарков."""
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Callable, Iterator
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.catalog import currency_catalog
+from api.models import Currency, Rates
+from api.partitions import create_rates_partitions
+
+DATE_FROM = date(1900, 1, 1)
+
+
+@contextmanager
+def benchmark_database() -> Iterator[None]:
+    """Создать временную тестовую базу данных на время бенчмарка."""
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def create_rates(rows_count: int, charcode: str = "USD") -> None:
+    """Создать котировки валюты за rows_count дней начиная с DATE_FROM."""
+    currency, _ = Currency.objects.get_or_create(charcode=charcode)
+    currency_catalog.invalidate()
+    Rates.objects.filter(currency=currency).delete()
+    date_to = DATE_FROM + timedelta(days=rows_count - 1)
+    create_rates_partitions(range(DATE_FROM.year, date_to.year + 1))
+    Rates.objects.bulk_create(
+        (
+            Rates(
+                currency=currency,
+                date=DATE_FROM + timedelta(days=num_day),
+                value=50 + num_day % 100,
+            )
+            for num_day in range(rows_count)
+        ),
+        batch_size=5000,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE api_rates")
+
+
+def measure(func: Callable[[], Any], repeat: int = 1) -> dict:
+    """Замерить время выполнения и количество запросов к базе данных.
+
+    При нескольких повторах берется лучшее время.
+    """
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+    return {"seconds": round(min(timings), 4), "queries": len(queries)}
+
+
+def print_results(title: str, results: dict[str, dict]) -> None:
+    """Вывести результаты бенчмарка в виде таблицы."""
+    print(f"\n{title}")  # noqa T201
+    for name, result in results.items():
+        row = ", ".join(f"{key}={value}" for key, value in result.items())
+        print(f"  {name:<30} {row}")  # noqa T201
@@ -0,0 +1,97 @@
+"""Бенчмарк аналитики котировок за период в 10 тысяч дней.
+
+Сравнивает прежний построчный проход на Python (add_analytics_fields)
+с вычислением полей аналитики в запросе к базе данных.
+"""
+from datetime import date, timedelta
+
+from api.analytics import annotate_analytics
+from api.repository import get_filter_by_code_and_period_rates
+from benchmarks.base import (
+    DATE_FROM,
+    benchmark_database,
+    create_rates,
+    measure,
+    print_results,
+)
+
+ROWS_COUNT = 10_000
+THRESHOLD = 100
+REPEAT = 5
+
+
+def add_analytics_fields(
+    target_rates: list, threshold: int, order_by: str
+) -> None:
+    """Прежнее добавление полей с аналитикой валют."""
+    for num, rate in enumerate(target_rates, start=1):
+        rate["percentage_ratio"] = (
+            str(round(100 * rate["value"] / threshold, 2)) + "%"
+        )
+        if rate["value"] > threshold:
+            rate["is_threshold_exceeded"] = True
+            rate["threshold_match_type"] = "exceeded"
+        elif rate["value"] < threshold:
+            rate["is_threshold_exceeded"] = False
+            rate["threshold_match_type"] = "less"
+        elif rate["value"] == threshold:
+            rate["is_threshold_exceeded"] = False
+            rate["threshold_match_type"] = "equal"
+
+        rate["is_min_value"] = bool(
+            num == 1
+            and order_by == "value"
+            or num == len(target_rates)
+            and order_by == "-value"
+        )
+        rate["is_max_value"] = bool(
+            num == len(target_rates)
+            and order_by == "value"
+            or num == 1
+            and order_by == "-value"
+        )
+
+
+def get_rates(date_to: date) -> list[dict]:
+    """Прежнее получение аналитики: выборка и проход на Python."""
+    rates = list(
+        get_filter_by_code_and_period_rates("USD", DATE_FROM, date_to, "value")
+    )
+    add_analytics_fields(rates, THRESHOLD, "value")
+    return rates
+
+
+def get_annotated_rates(date_to: date, numeric: bool) -> list[dict]:
+    """Получение аналитики, вычисленной в запросе к базе данных."""
+    return list(
+        annotate_analytics(
+            get_filter_by_code_and_period_rates(
+                "USD", DATE_FROM, date_to, "value"
+            ),
+            THRESHOLD,
+            numeric=numeric,
+        )
+    )
+
+
+def run() -> None:
+    """Запустить бенчмарк."""
+    date_to = DATE_FROM + timedelta(days=ROWS_COUNT)
+    results = {}
+    with benchmark_database():
+        create_rates(ROWS_COUNT)
+        results["python loop"] = measure(
+            lambda: get_rates(date_to), repeat=REPEAT
+        )
+        results["sql, string ratio"] = measure(
+            lambda: get_annotated_rates(date_to, numeric=False), repeat=REPEAT
+        )
+        results["sql, numeric ratio"] = measure(
+            lambda: get_annotated_rates(date_to, numeric=True), repeat=REPEAT
+        )
+
+    print_results(f"analytics over {ROWS_COUNT} rows", results)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,181 @@
+"""Бенчмарк задержек WSGI и ASGI серверов при медленных клиентах.
+
+Клиенты приходят с постоянным интервалом, каждый SLOW_CLIENT_EVERY-й
+отправляет заголовки запроса с паузой, как клиент на медленном канале.
+Синхронный воркер WSGI занят медленным клиентом на все время паузы, и
+быстрые клиенты ждут в очереди; асинхронный ASGI воркер в это время
+обслуживает других клиентов. Оба сервера запускаются с одинаковым
+числом процессов.
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from django.db import connection
+
+from api.models import Currency
+from benchmarks.base import (
+    DATE_FROM,
+    benchmark_database,
+    create_rates,
+    print_results,
+)
+
+WORKERS = 2
+CLIENTS = 200
+ARRIVAL_INTERVAL = 0.02
+SLOW_CLIENT_EVERY = 10
+SLOW_CLIENT_DELAY = 1
+WARM_UP_REQUESTS = 10
+RATES_COUNT = 5_000
+SERVERS = {
+    "wsgi (gunicorn sync)": [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "rates.wsgi:application",
+        f"--workers={WORKERS}",
+        "--bind=127.0.0.1:{port}",
+    ],
+    "asgi (uvicorn)": [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "rates.asgi:application",
+        f"--workers={WORKERS}",
+        "--port={port}",
+    ],
+}
+
+
+def get_free_port() -> int:
+    """Свободный порт для сервера."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def run_server(command: list[str], port: int, is_async: bool) -> Iterator:
+    """Запустить сервер на временной базе данных бенчмарка."""
+    env = {
+        **os.environ,
+        "POSTGRES_DB": connection.settings_dict["NAME"],
+        "ASYNC_VIEWS": str(is_async),
+    }
+    process = subprocess.Popen(  # noqa S603
+        [part.format(port=port) for part in command],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def wait_for_port(port: int, timeout: float = 30) -> None:
+    """Дождаться, пока сервер начнет принимать соединения."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+        except OSError:
+            time.sleep(0.1)
+        else:
+            return
+    raise TimeoutError(f"server on port {port} is not started")
+
+
+async def request(port: int, path: str, delay: float = 0) -> float:
+    """Выполнить запрос с паузой в заголовках, вернуть время ответа."""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n".encode())
+    await writer.drain()
+    await asyncio.sleep(delay)
+    writer.write(b"Connection: close\r\n\r\n")
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    if not response.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(response[:100])
+    return time.perf_counter() - started
+
+
+async def arrive(port: int, path: str, num: int) -> Optional[float]:
+    """Клиент, приходящий через num интервалов после начала нагрузки.
+
+    Возвращает время ответа быстрого клиента, для медленного - None.
+    """
+    await asyncio.sleep(num * ARRIVAL_INTERVAL)
+    if num % SLOW_CLIENT_EVERY == 0:
+        await request(port, path, SLOW_CLIENT_DELAY)
+        return None
+    return await request(port, path)
+
+
+async def run_clients(port: int, path: str) -> dict:
+    """Подать нагрузку после прогрева воркеров.
+
+    Задержки считаются по быстрым клиентам: время медленных клиентов
+    определяется их собственной паузой.
+    """
+    for _ in range(WARM_UP_REQUESTS):
+        await request(port, path)
+
+    started = time.perf_counter()
+    timings = await asyncio.gather(
+        *(arrive(port, path, num) for num in range(CLIENTS))
+    )
+    elapsed = time.perf_counter() - started
+    timings = sorted(timing for timing in timings if timing is not None)
+    return {
+        "rps": round(CLIENTS / elapsed, 1),
+        "p50": round(statistics.median(timings), 3),
+        "p99": round(timings[int(len(timings) * 0.99) - 1], 3),
+        "max": round(timings[-1], 3),
+    }
+
+
+def run() -> None:
+    """Запустить бенчмарк."""
+    results = {}
+    with benchmark_database():
+        currency = Currency.objects.create(charcode="USD")
+        create_rates(RATES_COUNT)
+        paths = {
+            "currencies": "/api/v1/currency/all/",
+            "rates": "/api/v1/rates/",
+            "analytics": (
+                f"/api/v1/currency/{currency.id}/analytics/?threshold=100"
+                f"&date_from={DATE_FROM}&date_to=2100-01-01"
+            ),
+        }
+        for server, command in SERVERS.items():
+            port = get_free_port()
+            with run_server(command, port, is_async="asgi" in server):
+                for name, path in paths.items():
+                    results[f"{server} {name}"] = asyncio.run(
+                        run_clients(port, path)
+                    )
+
+    print_results(
+        f"{CLIENTS} clients every {ARRIVAL_INTERVAL}s, every "
+        f"{SLOW_CLIENT_EVERY}th with {SLOW_CLIENT_DELAY}s header delay, "
+        f"{WORKERS} workers",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    run()
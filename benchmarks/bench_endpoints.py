@@ -0,0 +1,201 @@
+"""Бенчмарк обработчиков API на синтетических наборах котировок.
+
+Для каждого размера набора создается временная база данных с
+котировками всех валют за несколько лет и пользователями с
+отслеживаемыми валютами (команда generate_rates_dataset). Каждый
+обработчик замеряется с холодным кэшем - после смены версий данных, как
+после загрузки котировок, - и с прогретым: время, количество запросов к
+базе данных, пиковая память на запрос и размер ответа.
+
+Результаты выводятся таблицей и сохраняются в JSON для сравнения между
+запусками:
+
+    python -m benchmarks.bench_endpoints --sizes small medium
+"""
+import argparse
+import io
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable
+
+from django.core.management import call_command
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.cache import (
+    LATEST_RATES_VERSION,
+    bump_data_versions,
+    get_user_version,
+)
+from api.catalog import currency_catalog
+from api.models import UserCurrency
+from benchmarks.base import benchmark_database, print_results
+
+SIZES = {
+    "small": {"years": 1, "users": 100},
+    "medium": {"years": 5, "users": 1_000},
+    "large": {"years": 20, "users": 10_000},
+}
+REPEAT = 10
+THRESHOLD = 50
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def get_endpoints() -> dict[str, dict]:
+    """Адреса обработчиков и заголовки запросов к ним."""
+    user_currency = UserCurrency.objects.order_by("id").first()
+    token = AccessToken.for_user(user_currency.user)
+    currency_id = user_currency.currency_id
+    analytics = (
+        f"/api/v1/currency/{currency_id}/analytics/?threshold={THRESHOLD}"
+        f"&date_from=1900-01-01&date_to={date.today()}"
+    )
+    return {
+        "rates": {"path": "/api/v1/rates/"},
+        "user_currency": {
+            "path": "/api/v1/currency/user_currency/",
+            "headers": {"Authorization": f"Bearer {token}"},
+        },
+        "analytics": {"path": analytics},
+        "analytics month": {"path": f"{analytics}&granularity=month"},
+        "currencies": {"path": "/api/v1/currency/all/"},
+    }
+
+
+def invalidate_caches() -> None:
+    """Сделать неактуальными кэш ответов и справочник валют."""
+    bump_data_versions(
+        [
+            *currency_catalog.get_charcodes().values(),
+            LATEST_RATES_VERSION,
+            *(
+                get_user_version(user_id)
+                for user_id in UserCurrency.objects.values_list(
+                    "user_id", flat=True
+                ).distinct()
+            ),
+        ]
+    )
+    currency_catalog.invalidate()
+
+
+def measure_request(request: Callable[[], bytes], cold: bool) -> dict:
+    """Замерить запрос: время, запросы к базе, пиковую память, размер.
+
+    Пиковая память замеряется отдельным запросом, так как tracemalloc
+    замедляет выполнение.
+    """
+    timings = []
+    for _ in range(REPEAT):
+        if cold:
+            invalidate_caches()
+        # журнал запросов очищается в начале запроса (request_started)
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            content = request()
+            timings.append(time.perf_counter() - started)
+
+    if cold:
+        invalidate_caches()
+    tracemalloc.start()
+    request()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 2),
+        "min_ms": round(min(timings) * 1000, 2),
+        "queries": len(queries),
+        "peak_kb": round(peak / 1024, 1),
+        "bytes": len(content),
+    }
+
+
+def run_size(years: int, users: int) -> dict[str, dict]:
+    """Замерить обработчики на наборе котировок за years лет."""
+    results = {}
+    with benchmark_database():
+        # справочник мог остаться от базы данных предыдущего размера
+        currency_catalog.invalidate()
+        call_command(
+            "generate_rates_dataset",
+            years=years,
+            users=users,
+            stdout=io.StringIO(),
+        )
+        client = Client()
+        for name, endpoint in get_endpoints().items():
+
+            def request(endpoint: dict = endpoint) -> bytes:
+                """Выполнить запрос к обработчику и прочитать ответ."""
+                response = client.get(
+                    endpoint["path"], headers=endpoint.get("headers")
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"{endpoint['path']}: {response}")
+                return response.getvalue()
+
+            for cache_state, cold in (("cold", True), ("warm", False)):
+                results[f"{name} {cache_state}"] = measure_request(
+                    request, cold
+                )
+    return results
+
+
+def get_revision() -> str:
+    """Текущая ревизия репозитория для сопоставления результатов."""
+    try:
+        return subprocess.run(  # noqa S603
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa S607
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run() -> None:
+    """Запустить бенчмарк."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", nargs="+", choices=SIZES, default=list(SIZES)
+    )
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    # как в тестах: соединение с базой данных не закрывается после
+    # запроса, и его запросы видны CaptureQueriesContext
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    started = datetime.now()
+    report = {
+        "started": started.isoformat(timespec="seconds"),
+        "revision": get_revision(),
+        "repeat": REPEAT,
+        "sizes": {},
+    }
+    for size in args.sizes:
+        results = run_size(**SIZES[size])
+        report["sizes"][size] = {**SIZES[size], "endpoints": results}
+        print_results(f"{size}: {SIZES[size]}", results)
+
+    output = args.output or RESULTS_DIR / (
+        f"endpoints-{started:%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nresults saved to {output}")  # noqa T201
+
+
+if __name__ == "__main__":
+    run()
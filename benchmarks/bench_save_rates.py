@@ -0,0 +1,72 @@
+"""Бенчмарк сохранения котировок задачей download_rates.
+
+Сравнивает построчную запись (проверка существования и INSERT на каждую
+валюту) с пакетной записью через upsert_rates.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+from api.models import Rates
+from api.repository import create_rate, get_filter_by_code_and_date_rates
+from api.tasks import get_rates_date, save_rates
+from benchmarks.base import benchmark_database, measure, print_results
+from rates.settings import CURRENCY_KEY_IN_API, DAYS_TO_LOAD_RATES
+
+CURRENCIES_COUNT = 45
+
+
+def generate_payloads() -> list[dict]:
+    """Сгенерировать ответы API ЦБ РФ за DAYS_TO_LOAD_RATES дней."""
+    today = datetime.now(timezone.utc).replace(
+        hour=8, minute=30, second=0, microsecond=0
+    )
+    return [
+        {
+            "Date": (today - timedelta(days=num_day)).isoformat(),
+            CURRENCY_KEY_IN_API: {
+                f"C{num:02d}": {"Value": round(random.uniform(1, 200), 4)}
+                for num in range(CURRENCIES_COUNT)
+            },
+        }
+        for num_day in range(DAYS_TO_LOAD_RATES)
+    ]
+
+
+def save_rates_row_by_row(rates: dict) -> None:
+    """Прежняя построчная запись котировок за дату."""
+    rates_date = get_rates_date(rates)
+    for currency in rates[CURRENCY_KEY_IN_API]:
+        if not get_filter_by_code_and_date_rates(currency, rates_date):
+            create_rate(
+                rates_date,
+                currency,
+                rates[CURRENCY_KEY_IN_API][currency]["Value"],
+            )
+
+
+def run() -> None:
+    """Запустить бенчмарк."""
+    payloads = generate_payloads()
+    results = {}
+    with benchmark_database():
+        for name, save in (
+            ("row by row", save_rates_row_by_row),
+            ("bulk upsert", save_rates),
+        ):
+            Rates.objects.all().delete()
+            results[f"{name}: empty table"] = measure(
+                lambda save=save: [save(payload) for payload in payloads]
+            )
+            results[f"{name}: repeated run"] = measure(
+                lambda save=save: [save(payload) for payload in payloads]
+            )
+
+    print_results(
+        f"save_rates, {DAYS_TO_LOAD_RATES} days x {CURRENCIES_COUNT} "
+        "currencies",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,78 @@
+"""Бенчмарк кодирования больших ответов аналитики.
+
+Сравнивает время кодирования и размер ответа (без сжатия и в gzip)
+для прежнего JSON через DjangoJSONEncoder, orjson и MessagePack.
+"""
+import gzip
+import json
+from datetime import timedelta
+from functools import partial
+from typing import Any, Callable
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.renderers import encode_json, encode_msgpack
+from api.views import get_analytics_rates
+from benchmarks.base import (
+    DATE_FROM,
+    benchmark_database,
+    create_rates,
+    measure,
+    print_results,
+)
+
+ROWS_COUNTS = (10_000, 100_000)
+THRESHOLD = 100
+REPEAT = 5
+ENCODERS: dict[str, Callable[[Any], bytes]] = {
+    "json, DjangoJSONEncoder": lambda data: json.dumps(
+        data, cls=DjangoJSONEncoder
+    ).encode(),
+    "orjson": encode_json,
+    "msgpack": encode_msgpack,
+}
+
+
+def get_response_data(rows_count: int, numeric: bool) -> dict:
+    """Данные ответа аналитики за весь период без пагинации."""
+    return {
+        "rates": list(
+            get_analytics_rates(
+                "USD",
+                threshold=THRESHOLD,
+                date_from=DATE_FROM,
+                date_to=DATE_FROM + timedelta(days=rows_count),
+                granularity=None,
+                order_by="value",
+                numeric=numeric,
+            )
+        ),
+        "next": None,
+        "previous": None,
+    }
+
+
+def run() -> None:
+    """Запустить бенчмарк."""
+    with benchmark_database():
+        create_rates(max(ROWS_COUNTS))
+        for rows_count in ROWS_COUNTS:
+            for numeric in (False, True):
+                data = get_response_data(rows_count, numeric)
+                results = {}
+                for name, encode in ENCODERS.items():
+                    content = encode(data)
+                    results[name] = {
+                        **measure(partial(encode, data), repeat=REPEAT),
+                        "bytes": len(content),
+                        "gzip_bytes": len(gzip.compress(content)),
+                    }
+                print_results(
+                    f"encode analytics of {rows_count} rows, "
+                    f"{'numeric' if numeric else 'string'} ratio",
+                    results,
+                )
+
+
+if __name__ == "__main__":
+    run()
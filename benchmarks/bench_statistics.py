@@ -0,0 +1,89 @@
+"""Бенчмарк статистик котировок за 20 лет.
+
+Сравнивает построчный проход на Python с векторным вычислением статистик
+и проверяет, что статистики за период укладываются в бюджет задержки.
+"""
+import math
+import statistics
+import sys
+from datetime import timedelta
+
+from api.rates_statistics import PERCENTILES, get_rates_statistics
+from api.repository import get_filter_by_code_and_period_rates
+from benchmarks.base import (
+    DATE_FROM,
+    benchmark_database,
+    create_rates,
+    measure,
+    print_results,
+)
+
+ROWS_COUNT = 20 * 365
+WINDOWS = [20, 50, 200]
+REPEAT = 5
+LATENCY_BUDGET = 0.1
+
+
+def get_python_statistics(rates: list[tuple]) -> dict:
+    """Статистики построчным проходом на Python."""
+    values = [float(value) for _, value in rates]
+    log_returns = [None] + [
+        math.log(value / previous)
+        for previous, value in zip(values, values[1:])
+    ]
+    drawdown, peak = [], values[0]
+    for value in values:
+        peak = max(peak, value)
+        drawdown.append(value / peak - 1)
+    result = {"log_return": log_returns, "drawdown": drawdown}
+    for window in WINDOWS:
+        alpha, ema = 2 / (window + 1), [values[0]]
+        for value in values[1:]:
+            ema.append(alpha * value + (1 - alpha) * ema[-1])
+        result[f"ema_{window}"] = ema
+        result[f"sma_{window}"] = [
+            statistics.fmean(values[start:end])
+            for start, end in zip(
+                range(len(values)), range(window, len(values) + 1)
+            )
+        ]
+        result[f"volatility_{window}"] = [
+            statistics.stdev(log_returns[start:end])
+            for start, end in zip(
+                range(1, len(values)), range(window + 1, len(values) + 1)
+            )
+        ]
+    result["percentiles"] = statistics.quantiles(values, n=100)
+    return result
+
+
+def run() -> None:
+    """Запустить бенчмарк."""
+    date_to = DATE_FROM + timedelta(days=ROWS_COUNT - 1)
+    rates = get_filter_by_code_and_period_rates(
+        "USD", DATE_FROM, date_to, "date"
+    )
+    results = {}
+    with benchmark_database():
+        create_rates(ROWS_COUNT)
+        results["python loop"] = measure(
+            lambda: get_python_statistics(
+                list(rates.values_list("date", "value"))
+            ),
+            repeat=REPEAT,
+        )
+        results["numpy"] = measure(
+            lambda: get_rates_statistics(rates, WINDOWS), repeat=REPEAT
+        )
+
+    print_results(
+        f"statistics over {ROWS_COUNT} rows, windows {WINDOWS}, "
+        f"percentiles {PERCENTILES}",
+        results,
+    )
+    if results["numpy"]["seconds"] > LATENCY_BUDGET:
+        sys.exit(f"statistics exceed latency budget {LATENCY_BUDGET} s")
+
+
+if __name__ == "__main__":
+    run()
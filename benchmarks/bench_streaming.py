@@ -0,0 +1,88 @@
+"""Бенчмарк пикового потребления памяти аналитикой за большой период.
+
+Сравнивает ответ, собранный целиком в памяти, с потоковым ответом.
+"""
+import tracemalloc
+from datetime import timedelta
+from typing import Callable
+
+from django.http import JsonResponse
+from django.test import Client
+from django.urls import reverse
+
+from api.analytics import annotate_analytics
+from api.models import Currency
+from api.repository import get_filter_by_code_and_period_rates
+from benchmarks.base import (
+    DATE_FROM,
+    benchmark_database,
+    create_rates,
+    print_results,
+)
+
+ROWS_COUNTS = (1_000, 10_000, 50_000)
+
+
+def measure_peak_memory(get_response: Callable) -> dict:
+    """Замерить пиковое потребление памяти при формировании ответа."""
+    tracemalloc.start()
+    response = get_response()
+    size = 0
+    if response.streaming:
+        for chunk in response.streaming_content:
+            size += len(chunk)
+    else:
+        size = len(response.content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"peak_kb": peak // 1024, "body_kb": size // 1024}
+
+
+def get_in_memory_response(rows_count: int) -> JsonResponse:
+    """Ответ аналитики, собранный целиком в памяти."""
+    rates = list(
+        annotate_analytics(
+            get_filter_by_code_and_period_rates(
+                "USD",
+                DATE_FROM,
+                DATE_FROM + timedelta(days=rows_count),
+                "value",
+            ),
+            100,
+        )
+    )
+    return JsonResponse({"rates": rates})
+
+
+def run() -> None:
+    """Запустить бенчмарк."""
+    results = {}
+    with benchmark_database():
+        currency = Currency.objects.create(charcode="USD")
+        client = Client()
+        for rows_count in ROWS_COUNTS:
+            create_rates(rows_count)
+            results[f"in memory: {rows_count} rows"] = measure_peak_memory(
+                lambda rows_count=rows_count: get_in_memory_response(
+                    rows_count
+                )
+            )
+            results[f"stream: {rows_count} rows"] = measure_peak_memory(
+                lambda rows_count=rows_count: client.get(
+                    reverse("analitics", kwargs={"id": currency.id}),
+                    data={
+                        "threshold": 100,
+                        "date_from": DATE_FROM.isoformat(),
+                        "date_to": (
+                            DATE_FROM + timedelta(days=rows_count)
+                        ).isoformat(),
+                        "stream": "true",
+                    },
+                )
+            )
+
+    print_results("analytics response peak memory", results)
+
+
+if __name__ == "__main__":
+    run()
@@ -29,7 +29,7 @@ SECRET_KEY = (
 )
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = config("DEBUG", False, cast=bool)
 
 ALLOWED_HOSTS = ["*"]
 
@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.MetricsMiddleware",
+    "api.middleware.QueriesMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -124,12 +126,11 @@ REST_FRAMEWORK = {
         "django_filters.rest_framework.DjangoFilterBackend"
     ],
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
+        "api.renderers.ORJSONRenderer",
+        "api.renderers.MessagePackRenderer",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination."
-    "LimitOffsetPagination",
-    "PAGE_SIZE": 10,
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPagination",
+    "PAGE_SIZE": 100,
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
@@ -170,7 +171,8 @@ CACHES = {
         "LOCATION": f"redis://{config('REDIS_HOST')}:{config('REDIS_PORT')}/0",
     }
 }
-CACHE_TIMEOUT = int(config("CACHE_TIMEOUT", 0))
+ASYNC_VIEWS = config("ASYNC_VIEWS", False, cast=bool)
+CACHE_TIMEOUT = int(config("CACHE_TIMEOUT", 0)) or None  # 0 - бессрочно
 
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
@@ -195,14 +197,42 @@ HOUR_TO_RUN_PERIODIC_TASK = (
 )
 MINUTE_TO_RUN_PERIODIC_TASK = int(config("MINUTE_TO_RUN_PERIODIC_TASK"))
 MAX_CURRENCY_CHARCODE = 5
+MAX_PHONE = 20
 CURRENCY_KEY_IN_API = "Valute"
 MAX_DIGITS = 20
 DECIMAL_PLACES = 10
+# ЦБ РФ публикует котировки с 4 знаками после запятой
+RATE_MAX_DIGITS = 12
+RATE_DECIMAL_PLACES = 4
+# курсы ЦБ РФ установлены к рублю
+BASE_CURRENCY = "RUB"
+CROSS_RATE_DECIMAL_PLACES = 6
 DAYS_TO_LOAD_RATES = 30
+BACKFILL_CHUNK_DAYS = int(config("BACKFILL_CHUNK_DAYS", 30))
+# секции котировок создаются заранее на столько лет вперед
+RATES_PARTITIONS_AHEAD = int(config("RATES_PARTITIONS_AHEAD", 1))
 URL_DAILY_RATES = "https://www.cbr-xml-daily.ru/daily_json.js"
 URL_ARCHIVE_RATES_BASE = "https://www.cbr-xml-daily.ru/archive"
 URL_ARCHIVE_RATES_SUFFIX = "daily_json.js"
 API_REQUEST_TIMEOUT = 10
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 2000
+API_FETCH_CONCURRENCY = int(config("API_FETCH_CONCURRENCY", 8))
+API_REQUEST_RETRIES = int(config("API_REQUEST_RETRIES", 3))
+API_RETRY_BACKOFF = float(config("API_RETRY_BACKOFF", 0.5))
+API_RETRY_STATUSES = (429, 500, 502, 503, 504)
+NOTIFICATION_BACKEND = config(
+    "NOTIFICATION_BACKEND", "api.notifications.TwilioSender"
+)
+NOTIFICATION_BATCH_SIZE = int(config("NOTIFICATION_BATCH_SIZE", 100))
+TWILIO_ACCOUNT_SID = config("TWILIO_ACCOUNT_SID", "")
+TWILIO_AUTH_TOKEN = config("TWILIO_AUTH_TOKEN", "")
+TWILIO_FROM_NUMBER = config("TWILIO_FROM_NUMBER", "")
+INGEST_TRACEMALLOC = config("INGEST_TRACEMALLOC", False, cast=bool)
+INGEST_CPROFILE_DIR = config("INGEST_CPROFILE_DIR", "")
+SLOW_REQUEST_MS = int(config("SLOW_REQUEST_MS", 500))
+SLOW_QUERIES_TO_LOG = 3
+REPEATED_QUERY_THRESHOLD = int(config("REPEATED_QUERY_THRESHOLD", 5))
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
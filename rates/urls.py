@@ -7,9 +7,12 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from api.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls, name="Admin site"),
     path("api/v1/", include("api.urls"), name="Root url"),
+    path("metrics", metrics_view, name="metrics"),
     path("api/v1/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/v1/docs/",
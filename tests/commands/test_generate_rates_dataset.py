@@ -0,0 +1,39 @@
+"""Модуль с тестами генерации синтетического набора котировок."""
+import io
+from datetime import date
+from typing import Callable
+
+import pytest
+from django.core.management import call_command
+
+from api.models import LatestRate, Rates, RatesRollup, UserCurrency
+
+
+@pytest.mark.django_db()
+def test_generate_rates_dataset(currency_factory: Callable) -> None:
+    """Тест генерации котировок по рабочим дням и отслеживаемых валют."""
+    currency_factory(charcode="USD")
+    currency_factory(charcode="EUR")
+    call_command(
+        "generate_rates_dataset",
+        years=1,
+        date_to=date(2024, 5, 31),
+        users=3,
+        currencies_per_user=2,
+        stdout=io.StringIO(),
+    )
+
+    assert Rates.objects.filter(currency__charcode="USD").count() == 262
+    assert not Rates.objects.filter(date__week_day__in=[1, 7]).exists()
+    assert LatestRate.objects.count() == 2
+    assert RatesRollup.objects.filter(granularity="year").count() == 4
+    assert UserCurrency.objects.count() == 6
+
+    call_command(
+        "generate_rates_dataset",
+        years=1,
+        date_to=date(2024, 5, 31),
+        users=1,
+        stdout=io.StringIO(),
+    )
+    assert Rates.objects.count() == 2 * 262
@@ -0,0 +1,118 @@
+"""Модуль с тестами импорта исторических котировок."""
+import gzip
+import io
+import json
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from api.models import LatestRate, Rates, RatesRollup
+from tests.fixtures.cbr import rates_payload
+
+
+def import_rates(*paths: Path, **options: dict) -> str:
+    """Запустить импорт котировок и вернуть вывод команды."""
+    stdout = io.StringIO()
+    call_command("import_rates", *map(str, paths), stdout=stdout, **options)
+    return stdout.getvalue()
+
+
+@pytest.mark.django_db()
+def test_import_csv_rates(tmp_path: Path, rates_factory: Callable) -> None:
+    """Тест импорта CSV без повторов и перезаписи котировок."""
+    rates_factory(charcode="USD", value=90, date=date(2024, 5, 1))
+    path = tmp_path / "rates.csv"
+    path.write_text(
+        "charcode,date,value\n"
+        "USD,2024-05-01,91.5\n"
+        "USD,2024-05-02,92.5\n"
+        "USD,2024-05-02,92.5\n"
+        "EUR,2024-05-02,99.1\n"
+    )
+
+    output = import_rates(path)
+
+    assert "read 4 rates, created 2, skipped 2 duplicates" in output
+    assert "rows/s" in output
+    assert Rates.objects.get(
+        currency__charcode="USD", date=date(2024, 5, 1)
+    ).value == Decimal(90)
+    assert LatestRate.objects.get(currency__charcode="USD").value == Decimal(
+        "92.5"
+    )
+
+
+@pytest.mark.django_db()
+def test_import_older_rates_rollups(
+    tmp_path: Path, rates_factory: Callable
+) -> None:
+    """Тест агрегатов после импорта котировок старше загруженных."""
+    rates_factory(charcode="USD", value=95, date=date(2024, 5, 31))
+    path = tmp_path / "rates.csv"
+    path.write_text("charcode,date,value\nUSD,2024-05-02,92.5\n")
+
+    import_rates(path)
+
+    rollup = RatesRollup.objects.get(
+        charcode="USD", granularity=RatesRollup.Granularity.MONTH
+    )
+    assert rollup.count == 2
+    assert rollup.close == 95
+
+
+@pytest.mark.django_db()
+def test_import_jsonl_gzip_rates(tmp_path: Path) -> None:
+    """Тест импорта сжатого JSON Lines порциями."""
+    path = tmp_path / "rates.jsonl.gz"
+    with gzip.open(path, "wt") as file:
+        for day in range(1, 6):
+            row = {"charcode": "USD", "date": f"2023-12-2{day}", "value": 90}
+            file.write(json.dumps(row) + "\n")
+
+    output = import_rates(path, batch_size=2)
+
+    assert "created 5" in output
+    assert Rates.objects.count() == 5
+
+
+@pytest.mark.django_db()
+def test_import_cbr_rates(tmp_path: Path) -> None:
+    """Тест импорта ответов API ЦБ РФ из каталога.
+
+    Ответы записаны подряд: с отступами и по одному на строку.
+    """
+    (tmp_path / "2024-05.json").write_text(
+        json.dumps(
+            rates_payload(date(2024, 5, 1), {"USD": 90.5, "EUR": 98.1}),
+            indent=4,
+        )
+        + json.dumps(rates_payload(date(2024, 5, 2), {"USD": 91.5}))
+    )
+    (tmp_path / "2024-06.json").write_text(
+        json.dumps(rates_payload(date(2024, 6, 1), {"USD": 92.5}))
+        + "\n"
+        + json.dumps(rates_payload(date(2024, 6, 1), {"USD": 92.5}))
+        + "\n"
+    )
+
+    output = import_rates(tmp_path, batch_size=2)
+
+    assert "read 5 rates, created 4" in output
+    assert Rates.objects.get(
+        currency__charcode="USD", date=date(2024, 5, 2)
+    ).value == Decimal("91.5")
+
+
+@pytest.mark.django_db()
+def test_import_invalid_rates(tmp_path: Path) -> None:
+    """Тест ошибки импорта строки без значения котировки."""
+    path = tmp_path / "rates.csv"
+    path.write_text("charcode,date\nUSD,2024-05-01\n")
+
+    with pytest.raises(CommandError, match="invalid rate at line 2"):
+        import_rates(path)
+    assert not Rates.objects.exists()
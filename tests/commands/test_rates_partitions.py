@@ -0,0 +1,99 @@
+"""Модуль с тестами секций котировок."""
+import io
+from datetime import date
+from decimal import Decimal
+from typing import Callable
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import partitions
+from api.models import Rates
+from api.partitions import get_rates_partitions
+from api.repository import (
+    copy_rates,
+    get_filter_by_code_and_period_rates,
+    upsert_rates,
+)
+
+
+@pytest.mark.django_db()
+def test_create_upcoming_rates_partitions() -> None:
+    """Тест создания секций котировок на годы вперед."""
+    call_command("rates_partitions", years_ahead=3, stdout=io.StringIO())
+
+    current_year = date.today().year
+    assert set(range(current_year, current_year + 4)) <= set(
+        get_rates_partitions()
+    )
+
+
+@pytest.mark.django_db()
+def test_copy_rates_creates_partitions() -> None:
+    """Тест создания секций за годы загружаемых котировок."""
+    copy_rates([("USD", "1995-05-01", "5.0"), ("USD", "1996-05-01", "5.1")])
+
+    assert {1995, 1996} <= set(get_rates_partitions())
+    assert Rates.objects.filter(date__year=1995).count() == 1
+
+
+@pytest.mark.django_db()
+def test_upsert_rates_known_partitions(
+    monkeypatch: pytest.MonkeyPatch,
+    django_capture_on_commit_callbacks: Callable,
+) -> None:
+    """Тест проверки секций котировок только для новых лет."""
+    monkeypatch.setattr(partitions, "known_partition_years", set())
+    with django_capture_on_commit_callbacks(execute=True):
+        upsert_rates(date(2024, 5, 1), {"USD": Decimal("90.1")})
+
+    with CaptureQueriesContext(connection) as queries:
+        upsert_rates(date(2024, 5, 2), {"USD": Decimal("90.2")})
+
+    assert not any("pg_inherits" in query["sql"] for query in queries)
+    assert Rates.objects.filter(date__year=2024).count() == 2
+
+
+@pytest.mark.django_db()
+def test_period_rates_prune_partitions(rates_factory: Callable) -> None:
+    """Тест чтения котировок за период только из секций его лет."""
+    rates_factory(charcode="USD", value=90, date=date(2023, 5, 1))
+    rates_factory(charcode="USD", value=91, date=date(2024, 5, 1))
+
+    plan = get_filter_by_code_and_period_rates(
+        "USD", date(2024, 1, 1), date(2024, 12, 31), "date"
+    ).explain()
+
+    assert "api_rates_2024" in plan
+    assert "api_rates_2023" not in plan
+
+
+@pytest.mark.django_db(transaction=True)
+def test_detach_rates_partition(rates_factory: Callable) -> None:
+    """Тест отсоединения секции прошедшего года для архивирования."""
+    rates_factory(charcode="USD", value=5, date=date(1999, 5, 1))
+    rates_factory(charcode="USD", value=90, date=date(2024, 5, 1))
+    try:
+        call_command("rates_partitions", detach=1999, stdout=io.StringIO())
+
+        assert 1999 not in get_rates_partitions()
+        assert list(Rates.objects.values_list("value", flat=True)) == [90]
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM api_rates_1999")
+            assert cursor.fetchone() == (1,)
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS api_rates_1999")
+
+
+@pytest.mark.django_db()
+def test_detach_current_rates_partition() -> None:
+    """Тест запрета отсоединения секции текущего года."""
+    with pytest.raises(CommandError, match="only past years"):
+        call_command(
+            "rates_partitions",
+            detach=date.today().year,
+            stdout=io.StringIO(),
+        )
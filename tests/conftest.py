@@ -1,7 +1,12 @@
 """Конфигурация для тестов."""
 
 pytest_plugins = [
+    "tests.fixtures.cache",
+    "tests.fixtures.cbr",
+    "tests.fixtures.notifications",
+    "tests.fixtures.queries",
     "tests.fixtures.registration",
     "tests.fixtures.rates",
     "tests.fixtures.users",
+    "tests.fixtures.tasks",
 ]
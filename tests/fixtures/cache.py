@@ -0,0 +1,17 @@
+"""Фикстуры для тестов кэширования."""
+from typing import Iterator
+
+import pytest
+from django.core.cache import cache
+
+from api.catalog import currency_catalog
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache() -> Iterator[None]:
+    """Очищать кэш и справочник валют между тестами."""
+    cache.clear()
+    currency_catalog.invalidate()
+    yield
+    cache.clear()
+    currency_catalog.invalidate()
@@ -0,0 +1,102 @@
+"""Фикстуры локального сервера-заглушки API ЦБ РФ."""
+import json
+import threading
+from collections import Counter
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import pytest
+
+from rates.settings import CURRENCY_KEY_IN_API
+
+
+class CbrStub:
+    """Сервер-заглушка API ЦБ РФ с настраиваемыми ответами."""
+
+    def __init__(self) -> None:
+        """Инициализация заглушки."""
+        self.responses: dict[str, list[tuple[int, dict]]] = {}
+        self.requests: Counter = Counter()
+        self.clients: set = set()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+
+    @property
+    def url(self) -> str:
+        """Адрес сервера."""
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def add_rates(
+        self, path: str, target_date: date, values: dict[str, float]
+    ) -> None:
+        """Добавить ответ с котировками за дату."""
+        self.add_response(
+            path, HTTPStatus.OK, rates_payload(target_date, values)
+        )
+
+    def add_response(self, path: str, status: int, body: dict) -> None:
+        """Добавить ответ на запрос по пути (отдаются по очереди)."""
+        self.responses.setdefault(path, []).append((status, body))
+
+    def next_response(self, path: str) -> tuple[int, dict]:
+        """Следующий ответ по пути, последний ответ повторяется."""
+        queue = self.responses.get(path)
+        if not queue:
+            return HTTPStatus.NOT_FOUND, {}
+        return queue.pop(0) if len(queue) > 1 else queue[0]
+
+    def handler(self) -> type[BaseHTTPRequestHandler]:
+        """Класс обработчика запросов заглушки."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Обработчик запросов с поддержкой keep-alive."""
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # noqa N802
+                """Ответить на GET запрос."""
+                stub.requests[self.path] += 1
+                stub.clients.add(self.client_address)
+                status, body = stub.next_response(self.path)
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args: tuple) -> None:
+                """Не выводить лог запросов."""
+
+        return Handler
+
+
+def rates_payload(target_date: date, values: dict[str, float]) -> dict:
+    """Ответ API ЦБ РФ с котировками за дату."""
+    return {
+        "Date": f"{target_date.isoformat()}T11:30:00+03:00",
+        CURRENCY_KEY_IN_API: {
+            charcode: {"CharCode": charcode, "Nominal": 1, "Value": value}
+            for charcode, value in values.items()
+        },
+    }
+
+
+@pytest.fixture()
+def cbr_stub(monkeypatch: pytest.MonkeyPatch) -> Iterator[CbrStub]:
+    """Локальный сервер-заглушка API ЦБ РФ."""
+    stub = CbrStub()
+    thread = threading.Thread(target=stub.server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        "api.client.URL_DAILY_RATES", f"{stub.url}/daily_json.js"
+    )
+    monkeypatch.setattr(
+        "api.client.URL_ARCHIVE_RATES_BASE", f"{stub.url}/archive"
+    )
+    monkeypatch.setattr("api.client.API_RETRY_BACKOFF", 0)
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
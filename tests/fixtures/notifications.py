@@ -0,0 +1,29 @@
+"""Фикстуры для тестов уведомлений."""
+from typing import Iterator
+
+import pytest
+
+from api.notifications import BaseSender, Notification
+
+
+class LocmemSender(BaseSender):
+    """Сохранение уведомлений в памяти процесса вместо отправки."""
+
+    outbox: list[Notification] = []
+
+    def send_messages(self, notifications: list[Notification]) -> int:
+        """Добавить пачку уведомлений в outbox."""
+        self.outbox.extend(notifications)
+        return len(notifications)
+
+
+@pytest.fixture(autouse=True)
+def outbox(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[Notification]]:
+    """Сохранять уведомления в памяти вместо отправки."""
+    monkeypatch.setattr(
+        "api.notifications.NOTIFICATION_BACKEND",
+        "tests.fixtures.notifications.LocmemSender",
+    )
+    LocmemSender.outbox.clear()
+    yield LocmemSender.outbox
+    LocmemSender.outbox.clear()
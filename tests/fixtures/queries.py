@@ -0,0 +1,35 @@
+"""Фикстуры проверки бюджета запросов к базе данных."""
+from typing import Any
+
+import pytest
+from django.http import HttpResponseBase
+from django.test import Client
+
+from api.instrumentation import collect_queries
+from api.middleware import get_query_budget
+
+
+class QueryBudgetClient(Client):
+    """Тестовый клиент, проверяющий бюджет запросов обработчика.
+
+    Тест падает, если обработчик выполнил больше запросов к базе данных,
+    чем объявлено в его атрибуте query_budget.
+    """
+
+    def request(self, **request: Any) -> HttpResponseBase:
+        """Выполнить запрос и проверить количество запросов к базе."""
+        with collect_queries() as stats:
+            response = super().request(**request)
+        budget = get_query_budget(response.wsgi_request)
+        assert budget is None or stats.count <= budget, (
+            f"{response.wsgi_request.method} {response.wsgi_request.path}: "
+            f"{stats.count} queries exceed budget {budget}:\n"
+            + "\n".join(stats.statements)
+        )
+        return response
+
+
+@pytest.fixture()
+def client() -> Client:
+    """Тестовый клиент с проверкой бюджета запросов обработчиков."""
+    return QueryBudgetClient()
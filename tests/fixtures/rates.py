@@ -6,7 +6,10 @@ import pytest
 from django_fakery import factory
 from mimesis import Numeric
 
+from api.catalog import currency_catalog
 from api.models import AppUser, Currency, Rates, UserCurrency
+from api.partitions import create_rates_partitions
+from api.repository import refresh_latest_rates
 
 
 class RatesData(TypedDict, total=False):
@@ -33,20 +36,51 @@ def rates_data_factory() -> Callable[[int | None, int | None], RatesData]:
 
 @pytest.fixture()
 def currency_factory() -> Callable[[], Currency]:
-    """Фабрика валют."""
+    """Фабрика валют.
+
+    Как и при изменении валют, сбрасывает справочник валют.
+    """
 
     def _factory(**fields: dict) -> Currency:
-        return factory.make(Currency, fields={**fields})
+        currency = factory.make(Currency, fields={**fields})
+        currency_catalog.invalidate()
+        return currency  # noqa R504
 
     return _factory
 
 
+def get_currency_fields(fields: dict) -> dict:
+    """Поля модели со ссылкой на валюту вместо кода charcode.
+
+    Как и при загрузке котировок, отсутствующая валюта создается.
+    """
+    if charcode := fields.pop("charcode", None):
+        fields["currency"], created = Currency.objects.get_or_create(
+            charcode=charcode
+        )
+        if created:
+            currency_catalog.invalidate()
+    return fields
+
+
 @pytest.fixture()
 def rates_factory() -> Callable[[], Currency]:
-    """Фабрика котировок валют."""
+    """Фабрика котировок валют.
+
+    Как и при загрузке котировок, создает секцию за год котировки и
+    обновляет последние котировки валюты.
+    """
 
     def _factory(**fields: dict) -> Currency:
-        return factory.make(Rates, fields={**fields})
+        fields = get_currency_fields(fields)
+        if "currency" not in fields:
+            fields["currency"] = factory.make(Currency)
+            currency_catalog.invalidate()
+        rate = factory.build(Rates, fields=fields)
+        create_rates_partitions([rate.date.year])
+        rate.save()
+        refresh_latest_rates([rate.currency.charcode])
+        return rate
 
     return _factory
 
@@ -56,7 +90,7 @@ def user_currency_factory() -> Callable[[], Currency]:
     """Фабрика котировок валют отслеживаемых пользователем."""
 
     def _factory(**fields: dict) -> Currency:
-        return factory.make(UserCurrency, fields={**fields})
+        return factory.make(UserCurrency, fields=get_currency_fields(fields))
 
     return _factory
 
@@ -69,7 +103,9 @@ def assert_correct_add_rate() -> RatesAssertion:
     """Проверка корректного добавления валюты в список отслеживаемых."""
 
     def _check(charcode: str, user: AppUser, rates_data: RatesData) -> None:
-        user_currency = UserCurrency.objects.filter(charcode=charcode).first()
+        user_currency = UserCurrency.objects.filter(
+            currency__charcode=charcode
+        ).first()
         assert user_currency
         assert user_currency.user == user
         assert user_currency.threshold == rates_data["threshold"]
@@ -0,0 +1,13 @@
+"""Фикстуры для тестов задач планировщика."""
+from typing import Iterator
+
+import pytest
+from celery import current_app
+
+
+@pytest.fixture()
+def _celery_eager() -> Iterator[None]:
+    """Выполнять задачи celery синхронно в процессе теста."""
+    current_app.conf.task_always_eager = True
+    yield
+    current_app.conf.task_always_eager = False
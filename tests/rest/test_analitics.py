@@ -1,11 +1,18 @@
 """Модуль с тестами аналитики валют."""
+import json
+from datetime import date
+from decimal import Decimal
 from http import HTTPStatus
 from typing import Callable
 
+import msgpack
 import pytest
 from django.test import Client
 from django.urls import reverse
 
+from api.cache import bump_data_versions, get_cache_stats
+from api.repository import refresh_rates_rollups
+from api.views import ANALYTICS_CACHE_SCOPE, BATCH_ANALYTICS_CACHE_SCOPE
 from tests.fixtures.rates import RatesQueryAssertion
 
 
@@ -47,3 +54,353 @@ def test_get_analitics(
     assert_correct_rates(
         response.json()["rates"], currency.charcode, rate_1, rate_2
     )
+
+
+@pytest.mark.django_db()
+def test_get_analitics_msgpack(
+    client: Client,
+    rates_query_factory: Callable,
+) -> None:
+    """Тест получения аналитики в MessagePack по заголовку Accept."""
+    currency, _, _ = rates_query_factory()
+    url = reverse("analitics", kwargs={"id": currency.id})
+    data = {
+        "threshold": 150,
+        "date_from": "2024-05-01",
+        "date_to": "2024-05-08",
+    }
+    response = client.get(
+        url, data=data, headers={"Accept": "application/msgpack"}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "application/msgpack"
+    rates = msgpack.unpackb(response.content)["rates"]
+    assert rates == client.get(url, data=data).json()["rates"]
+    assert [rate["value"] for rate in rates] == [
+        "100.0000",
+        "200.0000",
+    ]
+
+
+@pytest.mark.django_db()
+def test_get_analitics_pages(
+    client: Client,
+    rates_query_factory: Callable,
+) -> None:
+    """Тест признаков минимума и максимума при постраничном получении."""
+    currency, _, _ = rates_query_factory()
+    data = {
+        "threshold": 150,
+        "date_from": "2024-05-01",
+        "date_to": "2024-05-08",
+        "limit": 1,
+    }
+    first_page = client.get(
+        reverse("analitics", kwargs={"id": currency.id}), data=data
+    ).json()
+    last_page = client.get(
+        reverse("analitics", kwargs={"id": currency.id}),
+        data={**data, "cursor": first_page["next"]},
+    ).json()
+
+    assert first_page["rates"][0]["is_min_value"]
+    assert not first_page["rates"][0]["is_max_value"]
+    assert not last_page["rates"][0]["is_min_value"]
+    assert last_page["rates"][0]["is_max_value"]
+    assert not last_page["next"]
+
+
+@pytest.mark.django_db()
+def test_get_analitics_stream(
+    client: Client,
+    rates_query_factory: Callable,
+    assert_correct_rates: RatesQueryAssertion,
+) -> None:
+    """Тест потокового получения аналитических данных по валюте."""
+    currency, rate_1, rate_2 = rates_query_factory()
+    response = client.get(
+        reverse("analitics", kwargs={"id": currency.id}),
+        data={
+            "threshold": 150,
+            "date_from": "2024-05-01",
+            "date_to": "2024-05-08",
+            "stream": "true",
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming
+    rates = json.loads(b"".join(response.streaming_content))["rates"]
+    assert len(rates) == 2
+    assert_correct_rates(rates, currency.charcode, rate_1, rate_2)
+
+
+@pytest.mark.django_db()
+def test_get_analitics_numeric(
+    client: Client,
+    rates_query_factory: Callable,
+) -> None:
+    """Тест получения процента от порога числом."""
+    currency, _, _ = rates_query_factory()
+    response = client.get(
+        reverse("analitics", kwargs={"id": currency.id}),
+        data={
+            "threshold": 150,
+            "date_from": "2024-05-01",
+            "date_to": "2024-05-08",
+            "order_by": "-value",
+            "numeric": "true",
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+    rates = response.json()["rates"]
+    assert [rate["percentage_ratio"] for rate in rates] == [133.33, 66.67]
+    assert [rate["is_max_value"] for rate in rates] == [True, False]
+    assert [rate["is_min_value"] for rate in rates] == [False, True]
+
+
+@pytest.mark.django_db()
+def test_get_analitics_granularity(
+    client: Client,
+    rates_query_factory: Callable,
+) -> None:
+    """Тест получения аналитики по агрегатам котировок за месяц."""
+    currency, _, _ = rates_query_factory()
+    refresh_rates_rollups(["USD"], date(2024, 5, 1), date(2024, 5, 31))
+    response = client.get(
+        reverse("analitics", kwargs={"id": currency.id}),
+        data={
+            "threshold": 150,
+            "date_from": "2024-05-01",
+            "date_to": "2024-05-31",
+            "granularity": "month",
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+    [rate] = response.json()["rates"]
+    assert rate["date"] == "2024-05-01"
+    assert Decimal(rate["open"]) == 100
+    assert Decimal(rate["high"]) == Decimal(rate["close"]) == 300
+    assert Decimal(rate["low"]) == 100
+    assert Decimal(rate["avg"]) == 200
+    assert rate["threshold_match_type"] == "exceeded"
+
+    response = client.get(
+        reverse("analitics", kwargs={"id": currency.id}),
+        data={
+            "threshold": 150,
+            "date_from": "2024-05-01",
+            "date_to": "2024-05-31",
+            "granularity": "quarter",
+        },
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db()
+def test_get_analitics_cache(
+    client: Client,
+    rates_query_factory: Callable,
+    rates_factory: Callable,
+) -> None:
+    """Тест кэширования аналитики до загрузки новых котировок валюты."""
+    currency, _, _ = rates_query_factory()
+    data = {
+        "threshold": 150,
+        "date_from": "2024-05-01",
+        "date_to": "2024-05-08",
+    }
+    url = reverse("analitics", kwargs={"id": currency.id})
+    assert len(client.get(url, data=data).json()["rates"]) == 2
+
+    rates_factory(charcode="USD", value=150, date=date(2024, 5, 3))
+    assert len(client.get(url, data=data).json()["rates"]) == 2
+
+    bump_data_versions(["USD"])
+    assert len(client.get(url, data=data).json()["rates"]) == 3
+    assert get_cache_stats(ANALYTICS_CACHE_SCOPE) == {"hits": 1, "misses": 2}
+
+
+@pytest.mark.django_db()
+def test_get_batch_analitics(
+    client: Client,
+    rates_query_factory: Callable,
+    currency_factory: Callable,
+    assert_correct_rates: RatesQueryAssertion,
+) -> None:
+    """Тест аналитики нескольких валют с порогом каждой валюты."""
+    eur = currency_factory(charcode="EUR")
+    gbp = currency_factory(charcode="GBP")
+    currency, rate_1, rate_2 = rates_query_factory()
+    response = client.get(
+        reverse("batch_analitics"),
+        data={
+            "currencies": f"{currency.id}:150,{eur.id}:500,{gbp.id}:1",
+            "date_from": "2024-05-01",
+            "date_to": "2024-05-08",
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    eur_analytics, gbp_analytics, usd = response.json()["currencies"]
+    assert [eur_analytics["charcode"], eur_analytics["threshold"]] == [
+        "EUR",
+        500,
+    ]
+    [eur_rate] = eur_analytics["rates"]
+    assert eur_rate["percentage_ratio"] == "80.00%"
+    assert eur_rate["threshold_match_type"] == "less"
+    assert eur_rate["is_min_value"]
+    assert eur_rate["is_max_value"]
+    assert gbp_analytics == {
+        "id": gbp.id,
+        "charcode": "GBP",
+        "threshold": 1,
+        "rates": [],
+    }
+    assert [usd["id"], usd["threshold"]] == [currency.id, 150]
+    assert_correct_rates(usd["rates"], "USD", rate_1, rate_2)
+
+
+@pytest.mark.django_db()
+def test_get_batch_analitics_bad_request(
+    client: Client, currency_factory: Callable
+) -> None:
+    """Тест аналитики нескольких валют с неверными параметрами запроса."""
+    currency = currency_factory()
+    period = {"date_from": "2024-05-01", "date_to": "2024-05-08"}
+    for data, error in (
+        (period, "'currencies' required in query params"),
+        (
+            {"currencies": f"{currency.id}", **period},
+            "please check query params",
+        ),
+        (
+            {"currencies": f"{currency.id + 1}:10", **period},
+            f"unknown currencies {currency.id + 1}",
+        ),
+    ):
+        response = client.get(reverse("batch_analitics"), data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json()["errors"].startswith(error)
+
+
+@pytest.mark.django_db()
+def test_get_batch_analitics_cache(
+    client: Client,
+    rates_query_factory: Callable,
+    rates_factory: Callable,
+) -> None:
+    """Тест кэширования аналитики валют до загрузки котировок любой из них."""
+    currency, _, _ = rates_query_factory()
+    data = {
+        "currencies": f"{currency.id}:150",
+        "date_from": "2024-05-01",
+        "date_to": "2024-05-08",
+    }
+    url = reverse("batch_analitics")
+
+    def get_rates_count() -> int:
+        [usd] = client.get(url, data=data).json()["currencies"]
+        return len(usd["rates"])
+
+    assert get_rates_count() == 2
+    rates_factory(charcode="USD", value=150, date=date(2024, 5, 3))
+    assert get_rates_count() == 2
+
+    bump_data_versions(["USD"])
+    assert get_rates_count() == 3
+    assert get_cache_stats(BATCH_ANALYTICS_CACHE_SCOPE) == {
+        "hits": 1,
+        "misses": 2,
+    }
+
+
+@pytest.mark.django_db()
+def test_get_analitics_statistics(
+    client: Client,
+    rates_query_factory: Callable,
+    rates_factory: Callable,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тест статистик котировок за весь период запроса."""
+    monkeypatch.setattr("api.rates_statistics.EMA_BLOCK_SIZE", 2)
+    currency, _, _ = rates_query_factory()
+    rates_factory(charcode="USD", value=150, date=date(2024, 5, 12))
+    response = client.get(
+        reverse("analitics", kwargs={"id": currency.id}),
+        data={
+            "threshold": 150,
+            "date_from": "2024-05-01",
+            "date_to": "2024-05-12",
+            "order_by": "-value",
+            "limit": 1,
+            "statistics": "true",
+            "windows": "2,3",
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()["rates"]) == 1
+    statistics = response.json()["statistics"]
+    assert statistics["dates"] == [
+        "2024-05-01",
+        "2024-05-07",
+        "2024-05-10",
+        "2024-05-12",
+    ]
+    assert statistics["log_return"] == pytest.approx(
+        [None, 0.693147, 0.405465, -0.693147]
+    )
+    assert statistics["sma"] == {
+        "2": [None, 150.0, 250.0, 225.0],
+        "3": [None, None, 200.0, 216.666667],
+    }
+    assert statistics["ema"]["2"] == [
+        100.0,
+        166.666667,
+        255.555556,
+        185.185185,
+    ]
+    assert statistics["volatility"] == {
+        "2": [None, None, 0.203422, 0.776836],
+        "3": [None, None, None, 0.73161],
+    }
+    assert statistics["drawdown"] == [0.0, 0.0, 0.0, -0.5]
+    assert statistics["max_drawdown"] == -0.5
+    assert statistics["percentiles"]["p50"] == 175.0
+
+    next_page = client.get(
+        reverse("analitics", kwargs={"id": currency.id}),
+        data={
+            "threshold": 150,
+            "date_from": "2024-05-01",
+            "date_to": "2024-05-12",
+            "order_by": "-value",
+            "limit": 1,
+            "statistics": "true",
+            "cursor": response.json()["next"],
+        },
+    ).json()
+    assert len(next_page["rates"]) == 1
+    assert "statistics" not in next_page
+
+
+@pytest.mark.django_db()
+def test_get_analitics_statistics_bad_windows(
+    client: Client, rates_query_factory: Callable
+) -> None:
+    """Тест статистик с неверными окнами."""
+    currency, _, _ = rates_query_factory()
+    data = {
+        "threshold": 150,
+        "date_from": "2024-05-01",
+        "date_to": "2024-05-08",
+        "statistics": "true",
+    }
+    for windows in ("1", "20,x", "2,3,4,5,6,7", "1000"):
+        response = client.get(
+            reverse("analitics", kwargs={"id": currency.id}),
+            data={**data, "windows": windows},
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,165 @@
+"""Модуль с тестами асинхронных обработчиков запросов на чтение."""
+import json
+from decimal import Decimal
+from http import HTTPStatus
+from typing import Any, Callable
+
+import msgpack
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpRequest, HttpResponseBase
+from django.test import AsyncRequestFactory
+
+from api.async_views import (
+    AsyncAnaliticsView,
+    AsyncCurrencyView,
+    AsyncRatesView,
+)
+from api.models import UserCurrency
+from tests.fixtures.rates import RatesQueryAssertion
+
+
+def call_view(
+    view: Callable, request: HttpRequest, **kwargs: Any
+) -> tuple[HttpResponseBase, Any]:
+    """Выполнить асинхронный обработчик и прочитать ответ целиком."""
+
+    async def _call() -> tuple[HttpResponseBase, bytes]:
+        response = await view(request, **kwargs)
+        if response.streaming:
+            content = b"".join(
+                [chunk async for chunk in response.streaming_content]
+            )
+        else:
+            content = response.content
+        return response, content
+
+    response, content = async_to_sync(_call)()
+    return response, json.loads(content)
+
+
+@pytest.mark.django_db()
+def test_async_get_currencies(currency_factory: Callable) -> None:
+    """Тест асинхронного получения всех валют."""
+    usd = currency_factory(charcode="USD")
+    response, data = call_view(
+        AsyncCurrencyView.as_view(), AsyncRequestFactory().get("/")
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert data == {"currencies": {str(usd.id): "USD"}}
+
+
+@pytest.mark.django_db()
+def test_async_get_currencies_msgpack(currency_factory: Callable) -> None:
+    """Тест асинхронного получения всех валют в MessagePack."""
+    usd = currency_factory(charcode="USD")
+    response = async_to_sync(AsyncCurrencyView.as_view())(
+        AsyncRequestFactory().get(
+            "/", headers={"Accept": "application/msgpack, */*"}
+        )
+    )
+    assert response["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == {
+        "currencies": {str(usd.id): "USD"}
+    }
+
+
+@pytest.mark.django_db()
+def test_async_get_rates(
+    user_token: Callable,
+    rates_query_factory: Callable,
+    user_currency_factory: Callable,
+) -> None:
+    """Тест асинхронного получения котировок с авторизацией и без."""
+    user, token = user_token()
+    rates_query_factory()
+    user_currency_factory(user=user, charcode="USD", threshold=150)
+    view = AsyncRatesView.as_view()
+
+    _, data = call_view(view, AsyncRequestFactory().get("/"))
+    assert [rate["charcode"] for rate in data["rates"]] == ["USD", "EUR"]
+
+    _, data = call_view(
+        view,
+        AsyncRequestFactory().get(
+            "/", headers={"Authorization": f"Bearer {token}"}
+        ),
+    )
+    [rate] = data["rates"]
+    assert Decimal(rate["value"]) == 300
+    assert rate["is_threshold_exceeded"]
+
+    response, _ = call_view(
+        view,
+        AsyncRequestFactory().get("/", headers={"Authorization": "Bearer 1"}),
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.django_db()
+def test_async_add_rates(
+    user_token: Callable, currency_factory: Callable
+) -> None:
+    """Тест добавления валюты в отслеживаемые через асинхронный обработчик."""
+    user, token = user_token()
+    currency = currency_factory(charcode="USD")
+    response = async_to_sync(AsyncRatesView.as_view())(
+        AsyncRequestFactory().post(
+            "/",
+            data={"currency": currency.id, "threshold": 150},
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert UserCurrency.objects.get(user=user).threshold == 150
+
+
+@pytest.mark.parametrize("stream", ["false", "true"])
+@pytest.mark.django_db()
+def test_async_get_analitics(
+    rates_query_factory: Callable,
+    assert_correct_rates: RatesQueryAssertion,
+    stream: str,
+) -> None:
+    """Тест асинхронного получения аналитики страницей и потоком."""
+    currency, rate_1, rate_2 = rates_query_factory()
+    response, data = call_view(
+        AsyncAnaliticsView.as_view(),
+        AsyncRequestFactory().get(
+            "/",
+            data={
+                "threshold": 150,
+                "date_from": "2024-05-01",
+                "date_to": "2024-05-08",
+                "stream": stream,
+            },
+        ),
+        id=currency.id,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert len(data["rates"]) == 2
+    assert_correct_rates(data["rates"], currency.charcode, rate_1, rate_2)
+
+
+@pytest.mark.django_db()
+def test_async_get_analitics_statistics(rates_query_factory: Callable) -> None:
+    """Тест асинхронного получения аналитики со статистиками за период."""
+    currency, _, _ = rates_query_factory()
+    response, data = call_view(
+        AsyncAnaliticsView.as_view(),
+        AsyncRequestFactory().get(
+            "/",
+            data={
+                "threshold": 150,
+                "date_from": "2024-05-01",
+                "date_to": "2024-05-08",
+                "statistics": "true",
+                "windows": "2",
+            },
+        ),
+        id=currency.id,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert data["statistics"]["dates"] == ["2024-05-01", "2024-05-07"]
+    assert data["statistics"]["sma"] == {"2": [None, 150.0]}
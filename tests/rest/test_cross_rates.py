@@ -0,0 +1,161 @@
+"""Модуль с тестами кросс-курсов валют."""
+from datetime import date
+from decimal import Decimal
+from http import HTTPStatus
+from typing import Callable
+
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client
+from django.urls import reverse
+
+from api.cache import bump_data_versions, get_cache_stats
+from api.partitions import create_rates_partitions
+from api.repository import (
+    get_cross_rates,
+    get_missing_rates_dates,
+    upsert_rates,
+)
+from api.views import CROSS_RATES_CACHE_SCOPE
+
+PERIOD = {"date_from": "2024-05-01", "date_to": "2024-05-08"}
+
+
+@pytest.fixture()
+def cross_rates_factory(rates_factory: Callable) -> Callable[[], None]:
+    """Фабрика котировок с разными номиналами и пропущенными днями."""
+
+    def _factory() -> None:
+        rates_factory(charcode="USD", value=90, date=date(2024, 5, 1))
+        rates_factory(charcode="USD", value=92, date=date(2024, 5, 2))
+        rates_factory(charcode="USD", value=93, date=date(2024, 5, 3))
+        rates_factory(
+            charcode="KZT", value=20, nominal=100, date=date(2024, 5, 1)
+        )
+        rates_factory(
+            charcode="KZT", value=23, nominal=100, date=date(2024, 5, 2)
+        )
+
+    return _factory
+
+
+@pytest.mark.django_db()
+def test_get_cross_rates(
+    client: Client, cross_rates_factory: Callable
+) -> None:
+    """Тест кросс-курса с учетом номиналов по общим дням котировок."""
+    cross_rates_factory()
+    response = client.get(
+        reverse("cross_rates"), data={"base": "usd", "quote": "KZT", **PERIOD}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        "base": "USD",
+        "quote": "KZT",
+        "rates": [
+            {"date": "2024-05-01", "value": "450.000000"},
+            {"date": "2024-05-02", "value": "400.000000"},
+        ],
+    }
+
+
+@pytest.mark.django_db()
+def test_get_cross_rates_to_rub(
+    client: Client, cross_rates_factory: Callable
+) -> None:
+    """Тест кросс-курса рубля, цена единицы рубля - 1."""
+    cross_rates_factory()
+    response = client.get(
+        reverse("cross_rates"), data={"base": "RUB", "quote": "KZT", **PERIOD}
+    )
+
+    assert [rate["value"] for rate in response.json()["rates"]] == [
+        "5.000000",
+        "4.347826",
+    ]
+
+
+@pytest.mark.django_db()
+def test_get_cross_rates_cache(
+    client: Client, cross_rates_factory: Callable, rates_factory: Callable
+) -> None:
+    """Тест кэширования кросс-курса до загрузки котировок валют пары."""
+    cross_rates_factory()
+    data = {"base": "USD", "quote": "KZT", **PERIOD}
+    assert (
+        len(client.get(reverse("cross_rates"), data=data).json()["rates"]) == 2
+    )
+
+    rates_factory(charcode="KZT", value=25, nominal=100, date=date(2024, 5, 3))
+    bump_data_versions(["EUR"])
+    assert (
+        len(client.get(reverse("cross_rates"), data=data).json()["rates"]) == 2
+    )
+
+    bump_data_versions(["KZT"])
+    assert (
+        len(client.get(reverse("cross_rates"), data=data).json()["rates"]) == 3
+    )
+    assert get_cache_stats(CROSS_RATES_CACHE_SCOPE) == {"hits": 1, "misses": 2}
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    ("params", "error"),
+    [
+        ({"base": "USD", **PERIOD}, "'quote' required"),
+        ({"base": "USD", "quote": "usd", **PERIOD}, "must differ"),
+        ({"base": "USD", "quote": "XXX", **PERIOD}, "unknown currencies XXX"),
+        (
+            {"base": "USD", "quote": "RUB", "date_from": "-", "date_to": "-"},
+            "check query params",
+        ),
+    ],
+)
+def test_get_cross_rates_bad_request(
+    client: Client, currency_factory: Callable, params: dict, error: str
+) -> None:
+    """Тест кросс-курса с неверными параметрами запроса."""
+    currency_factory(charcode="USD")
+    response = client.get(reverse("cross_rates"), data=params)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert error in response.json()["errors"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cross_rates_loaded_before_nominal() -> None:
+    """Тест кросс-курса по котировкам, загруженным до хранения номинала."""
+    rates_date = date(2024, 5, 2)
+    executor = MigrationExecutor(connection)
+    executor.migrate([("api", "0011_rates_partitions")])
+    create_rates_partitions([rates_date.year])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO api_currency (charcode) VALUES ('USD'), ('JPY') "
+            "ON CONFLICT (charcode) DO NOTHING"
+        )
+        cursor.execute(
+            "INSERT INTO api_rates (date, currency_id, value) "
+            "SELECT %s, id, CASE charcode WHEN 'USD' THEN 90 ELSE 60.5 END "
+            "FROM api_currency WHERE charcode IN ('USD', 'JPY')",
+            [rates_date],
+        )
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes("api"))
+
+    assert not get_cross_rates("JPY", "USD", rates_date, rates_date)
+    assert get_missing_rates_dates(rates_date, rates_date) == [rates_date]
+
+    upsert_rates(
+        rates_date,
+        {"USD": Decimal(90), "JPY": Decimal("60.5")},
+        {"JPY": 100},
+    )
+
+    assert list(get_cross_rates("JPY", "USD", rates_date, rates_date)) == [
+        {"date": rates_date, "value": Decimal("0.006722")}
+    ]
+    assert not get_missing_rates_dates(rates_date, rates_date)
@@ -0,0 +1,95 @@
+"""Модуль с тестами справочника валют."""
+import threading
+import time
+from http import HTTPStatus
+from typing import Callable
+
+import pytest
+import redis
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.catalog import (
+    CATALOG_CHANNEL,
+    CurrencyCatalog,
+    currency_catalog,
+    get_redis,
+)
+from api.repository import create_or_update_currency
+
+
+@pytest.mark.django_db()
+def test_get_currencies(client: Client, currency_factory: Callable) -> None:
+    """Тест получения всех валют без запросов к базе после загрузки."""
+    usd = currency_factory(charcode="USD")
+    eur = currency_factory(charcode="EUR")
+    client.get(reverse("currencies"))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("currencies"))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["currencies"] == {
+        str(usd.id): "USD",
+        str(eur.id): "EUR",
+    }
+    assert not queries.captured_queries
+
+
+@pytest.mark.django_db()
+def test_catalog_invalidation(currency_factory: Callable) -> None:
+    """Тест сброса справочника по сообщению другого процесса."""
+    usd = currency_factory(charcode="USD")
+    assert currency_catalog.get_id("USD") == usd.id
+
+    deadline = time.monotonic() + 5
+    while currency_catalog._data is not None:
+        assert time.monotonic() < deadline
+        get_redis().publish(CATALOG_CHANNEL, 0)
+        time.sleep(0.05)
+
+
+@pytest.mark.django_db()
+def test_catalog_change_before_subscription(
+    monkeypatch: pytest.MonkeyPatch, currency_factory: Callable
+) -> None:
+    """Тест сброса справочника, измененного до подписки на канал."""
+    subscribe = threading.Event()
+
+    def get_slow_redis() -> redis.Redis:
+        subscribe.wait()
+        return get_redis()
+
+    monkeypatch.setattr("api.catalog.get_redis", get_slow_redis)
+    catalog = CurrencyCatalog()
+    assert catalog.get_id("USD") is None
+
+    usd = currency_factory(charcode="USD")
+    get_redis().publish(CATALOG_CHANNEL, 0)
+    subscribe.set()
+
+    deadline = time.monotonic() + 5
+    while catalog.get_id("USD") != usd.id:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+@pytest.mark.django_db()
+def test_create_currency_publishes_change(
+    monkeypatch: pytest.MonkeyPatch,
+    django_capture_on_commit_callbacks: Callable,
+) -> None:
+    """Тест публикации изменения справочника при создании валюты."""
+    published = []
+    monkeypatch.setattr(
+        currency_catalog,
+        "publish_change",
+        lambda: published.append(True),
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        create_or_update_currency("USD")
+        create_or_update_currency("USD")
+
+    assert published == [True]
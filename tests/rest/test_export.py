@@ -0,0 +1,75 @@
+"""Модуль с тестами выгрузки истории котировок."""
+import gzip
+import json
+from http import HTTPStatus
+from typing import Callable
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+EXPORT_PERIOD = {"date_from": "2024-05-01", "date_to": "2024-05-08"}
+
+
+@pytest.mark.django_db()
+def test_export_rates_csv(
+    client: Client, rates_query_factory: Callable
+) -> None:
+    """Тест выгрузки котировок всех валют за период в CSV."""
+    rates_query_factory()
+    response = client.get(reverse("rates_export"), data=EXPORT_PERIOD)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming
+    assert response["Content-Type"] == "text/csv"
+    assert b"".join(response.streaming_content).decode().splitlines() == [
+        "charcode,date,value",
+        "EUR,2024-05-05,400.0000",
+        "USD,2024-05-01,100.0000",
+        "USD,2024-05-07,200.0000",
+    ]
+
+
+@pytest.mark.django_db()
+def test_export_rates_ndjson_gzip(
+    client: Client, rates_query_factory: Callable
+) -> None:
+    """Тест выгрузки котировок валюты в NDJSON со сжатием gzip."""
+    rates_query_factory()
+    response = client.get(
+        reverse("rates_export"),
+        data={**EXPORT_PERIOD, "charcode": "usd", "file_format": "ndjson"},
+        HTTP_ACCEPT_ENCODING="gzip",
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Encoding"] == "gzip"
+    content = gzip.decompress(b"".join(response.streaming_content))
+    assert [json.loads(line) for line in content.splitlines()] == [
+        {"charcode": "USD", "date": "2024-05-01", "value": "100.0000"},
+        {"charcode": "USD", "date": "2024-05-07", "value": "200.0000"},
+    ]
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    ("params", "error"),
+    [
+        ({"date_from": "2024-05-01"}, "'date_to' required"),
+        ({**EXPORT_PERIOD, "file_format": "xml"}, "unknown file_format"),
+        ({**EXPORT_PERIOD, "charcode": "USD,XXX"}, "unknown currencies XXX"),
+        ({**EXPORT_PERIOD, "date_to": "2024-13-01"}, "check query params"),
+    ],
+)
+def test_export_rates_bad_request(
+    client: Client,
+    currency_factory: Callable,
+    params: dict,
+    error: str,
+) -> None:
+    """Тест выгрузки котировок с неверными параметрами запроса."""
+    currency_factory(charcode="USD")
+    response = client.get(reverse("rates_export"), data=params)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert error in response.json()["errors"]
@@ -0,0 +1,72 @@
+"""Модуль с тестами метрик в формате Prometheus."""
+from http import HTTPStatus
+from typing import Callable
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+
+def get_sample(name: str, **labels: str) -> float:
+    """Текущее значение метрики процесса."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db()
+def test_metrics(client: Client, currency_factory: Callable) -> None:
+    """Тест метрик запросов к API и соединений с базой данных."""
+    currency_factory(charcode="USD")
+    labels = {"view": "CurrencyView", "method": "GET", "status": "200"}
+    requests_count = get_sample(
+        "rates_http_request_duration_seconds_count", **labels
+    )
+
+    client.get(reverse("currencies"))
+    response = client.get(reverse("metrics"))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"].startswith("text/plain")
+    assert (
+        get_sample("rates_http_request_duration_seconds_count", **labels)
+        == requests_count + 1
+    )
+    assert get_sample(
+        "rates_http_response_size_bytes_sum", view="CurrencyView"
+    )
+    content = response.content.decode()
+    assert "rates_http_request_duration_seconds_bucket{" in content
+    assert 'rates_db_connections{state="active"}' in content
+
+
+@pytest.mark.django_db()
+def test_cache_metrics(client: Client, user_token: Callable) -> None:
+    """Тест счетчиков попаданий и промахов кэша ответов."""
+    _, token = user_token()
+    hits = get_sample(
+        "rates_cache_requests_total", scope="tracked_rates", result="hits"
+    )
+    misses = get_sample(
+        "rates_cache_requests_total", scope="tracked_rates", result="misses"
+    )
+
+    for _ in range(2):
+        client.get(
+            reverse("user_currency"),
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    assert (
+        get_sample(
+            "rates_cache_requests_total", scope="tracked_rates", result="hits"
+        )
+        == hits + 1
+    )
+    assert (
+        get_sample(
+            "rates_cache_requests_total",
+            scope="tracked_rates",
+            result="misses",
+        )
+        == misses + 1
+    )
@@ -0,0 +1,81 @@
+"""Модуль с тестами учета запросов к базе данных."""
+from typing import Callable, Iterator
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpRequest, HttpResponse
+from django.test import Client, RequestFactory
+from django.urls import reverse
+from loguru import logger
+
+from api import middleware
+from api.middleware import QueriesMiddleware
+from api.models import Currency
+from api.views import CurrencyView
+
+
+@pytest.fixture()
+def log_messages() -> Iterator[list[str]]:
+    """Сообщения, записанные в лог во время теста."""
+    messages: list[str] = []
+    handler_id = logger.add(messages.append, format="{message}")
+    yield messages
+    logger.remove(handler_id)
+
+
+def get_currencies_count(request: HttpRequest) -> HttpResponse:
+    """Обработчик, выполняющий запрос к базе данных в цикле (N+1)."""
+    for _ in range(5):
+        Currency.objects.count()
+    return HttpResponse()
+
+
+@pytest.mark.django_db()
+def test_server_timing_header(client: Client) -> None:
+    """Тест заголовка Server-Timing с количеством запросов к базе."""
+    response = client.get(reverse("currencies"))
+    db_timing, total_timing = response["Server-Timing"].split(", ")
+    assert db_timing.startswith("db;dur=")
+    assert db_timing.endswith(';desc="1 queries"')
+    assert total_timing.startswith("total;dur=")
+
+
+@pytest.mark.django_db()
+def test_repeated_and_slow_queries_logged(
+    log_messages: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест записи в лог повторяющихся запросов и медленного запроса."""
+    monkeypatch.setattr(middleware, "SLOW_REQUEST_MS", 0)
+    QueriesMiddleware(get_currencies_count)(RequestFactory().get("/"))
+
+    repeated, slow = log_messages
+    assert "query repeated 5 times" in repeated
+    assert 'FROM "api_currency"' in repeated
+    assert "slow request" in slow
+    assert "5 queries" in slow
+
+
+@pytest.mark.django_db()
+def test_async_queries_counted() -> None:
+    """Тест учета запросов асинхронного обработчика из sync_to_async."""
+
+    async def get_response(request: HttpRequest) -> HttpResponse:
+        return await sync_to_async(get_currencies_count)(request)
+
+    response = async_to_sync(QueriesMiddleware(get_response))(
+        RequestFactory().get("/")
+    )
+    assert 'desc="5 queries"' in response["Server-Timing"]
+
+
+@pytest.mark.django_db()
+def test_query_budget_exceeded(
+    client: Client,
+    currency_factory: Callable,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тест падения при превышении бюджета запросов обработчика."""
+    currency_factory(charcode="USD")
+    monkeypatch.setattr(CurrencyView, "query_budget", 0)
+    with pytest.raises(AssertionError, match="1 queries exceed budget 0"):
+        client.get(reverse("currencies"))
@@ -1,13 +1,17 @@
 """Модуль с тестами котировок валют."""
+import base64
+import json
 from decimal import Decimal
 from http import HTTPStatus
-from typing import Callable, Optional
+from typing import Callable, Iterable, Optional
 
 import pytest
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from tests.fixtures.rates import RatesAssertion, RatesData, RatesQueryAssertion
+from tests.fixtures.rates import RatesAssertion, RatesData
 
 
 @pytest.mark.django_db()
@@ -54,7 +58,7 @@ def test_get_rates_unauthorized(
     response = client.get(reverse("rates"))
     assert response.status_code == HTTPStatus.OK
     assert response.json()["rates"][0]["id"] == rate.id
-    assert response.json()["rates"][0]["charcode"] == rate.charcode
+    assert response.json()["rates"][0]["charcode"] == rate.currency.charcode
     assert Decimal(response.json()["rates"][0]["value"]) == rate.value
 
 
@@ -74,38 +78,155 @@ def test_sort_rate(
     assert Decimal(response.json()["rates"][0]["value"]) == value
 
 
+@pytest.mark.django_db()
+def test_get_latest_rates(
+    client: Client,
+    rates_query_factory: Callable,
+) -> None:
+    """Тест получения только последних котировок каждой валюты."""
+    rates_query_factory()
+    response = client.get(reverse("rates"))
+    assert response.status_code == HTTPStatus.OK
+    assert [
+        (rate["charcode"], Decimal(rate["value"]))
+        for rate in response.json()["rates"]
+    ] == [("USD", 300), ("EUR", 400)]
+
+
 @pytest.mark.django_db()
 def test_get_rates_authorized(
     client: Client,
     user_token: Callable,
     rates_query_factory: Callable,
     user_currency_factory: Callable,
-    assert_correct_rates: RatesQueryAssertion,
 ) -> None:
     """Тест получения списка котировок валют авторизованным пользователем."""
     user, token = user_token()
     rates_query_factory()
-    user_currency = user_currency_factory(
-        user=user, charcode="USD", threshold=150
-    )
+    user_currency_factory(user=user, charcode="USD", threshold=150)
+    user_currency_factory(user=user, charcode="EUR", threshold=500)
     response = client.get(
         reverse("rates"), headers={"Authorization": f"Bearer {token}"}
     )
     assert response.status_code == HTTPStatus.OK
-    assert len(response.json()["rates"]) == 3
-    assert_correct_rates(response.json()["rates"], user_currency.charcode)
+    rates = response.json()["rates"]
+    assert [rate["charcode"] for rate in rates] == ["USD", "EUR"]
+    assert rates[0]["is_threshold_exceeded"]
+    assert not rates[1]["is_threshold_exceeded"]
 
 
 @pytest.mark.django_db()
-def test_get_currencies(
+def test_get_rates_authorized_cache(
     client: Client,
-    currency_factory: Callable,
+    user_token: Callable,
+    rates_query_factory: Callable,
+    user_currency_factory: Callable,
 ) -> None:
-    """Тест получения всех валют."""
-    currency = currency_factory()
-    for _ in range(3):
-        currency_factory()
-    response = client.get(reverse("currencies"))
+    """Тест кэширования котировок пользователя одним запросом к базе."""
+    user, token = user_token()
+    currency, _, _ = rates_query_factory()
+    user_currency_factory(user=user, charcode="USD", threshold=500)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("rates"), headers=headers)
+        client.get(reverse("rates"), headers=headers)
+    assert not response.json()["rates"][0]["is_threshold_exceeded"]
+    rates_queries = [
+        query["sql"]
+        for query in queries.captured_queries
+        if "api_latestrate" in query["sql"]
+        or "api_usercurrency" in query["sql"]
+    ]
+    assert len(rates_queries) == 1
+
+    client.post(
+        reverse("rates"),
+        data={"currency": currency.id, "threshold": 150},
+        headers=headers,
+    )
+    response = client.get(reverse("rates"), headers=headers)
+    assert response.json()["rates"][0]["is_threshold_exceeded"]
+
+
+@pytest.mark.django_db()
+def test_get_rates_history(
+    client: Client,
+    rates_query_factory: Callable,
+) -> None:
+    """Тест постраничного получения истории котировок валюты."""
+    rates_query_factory()
+    response = client.get(
+        reverse("rates_history"), data={"charcode": "USD", "limit": 2}
+    )
     assert response.status_code == HTTPStatus.OK
-    assert len(response.json()["currencies"]) == 4
-    assert response.json()["currencies"][str(currency.id)] == currency.charcode
+    assert get_values(response.json()["rates"]) == [100, 200]
+    assert not response.json()["previous"]
+
+    response = client.get(
+        reverse("rates_history"),
+        data={"charcode": "USD", "cursor": response.json()["next"]},
+    )
+    assert get_values(response.json()["rates"]) == [300]
+    assert not response.json()["next"]
+
+    response = client.get(
+        reverse("rates_history"),
+        data={
+            "charcode": "USD",
+            "limit": 2,
+            "cursor": response.json()["previous"],
+        },
+    )
+    assert get_values(response.json()["rates"]) == [100, 200]
+
+
+@pytest.mark.parametrize(
+    ("order_by", "values"),
+    [("", [100, 100, 200, 300]), ("-value", [300, 200, 100, 100])],
+)
+@pytest.mark.django_db()
+def test_rates_keyset_pagination(
+    client: Client,
+    rates_factory: Callable,
+    order_by: str,
+    values: list[int],
+) -> None:
+    """Тест постраничного обхода котировок с одинаковыми значениями."""
+    for value in (100, 100, 200, 300):
+        rates_factory(value=value)
+
+    response = client.get(
+        reverse("rates"), data={"order_by": order_by, "limit": 1}
+    )
+    pages = [response.json()["rates"]]
+    while cursor := response.json()["next"]:
+        response = client.get(
+            reverse("rates"),
+            data={"order_by": order_by, "limit": 1, "cursor": cursor},
+        )
+        pages.append(response.json()["rates"])
+
+    assert get_values(rate for page in pages for rate in page) == values
+    assert len({page[0]["id"] for page in pages}) == len(values)
+
+
+@pytest.mark.django_db()
+def test_rates_invalid_cursor(client: Client) -> None:
+    """Тест запроса страницы с неверным курсором."""
+    response = client.get(reverse("rates"), data={"cursor": "invalid"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    for position in (["abc", 1], [None, 1], ["90.5", [1]]):
+        cursor = base64.urlsafe_b64encode(
+            json.dumps([position, False]).encode()
+        ).decode()
+        response = client.get(
+            reverse("rates"), data={"cursor": cursor, "order_by": "value"}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def get_values(rates: Iterable[dict]) -> list[Decimal]:
+    """Значения котировок из ответа."""
+    return [Decimal(rate["value"]) for rate in rates]
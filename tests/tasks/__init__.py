@@ -0,0 +1 @@
+"""Тесты задач планировщика."""
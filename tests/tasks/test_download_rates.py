@@ -0,0 +1,265 @@
+"""Модуль с тестами загрузки котировок из API ЦБ РФ."""
+import pstats
+from datetime import date, datetime, timedelta
+from http import HTTPStatus
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from django.db import connection
+from prometheus_client import REGISTRY
+
+from api.client import fetch_contents, parse_rates
+from api.models import (
+    Currency,
+    LatestRate,
+    Rates,
+    RatesBackfill,
+    RatesDownload,
+    RatesIngestRun,
+    RatesRollup,
+)
+from api.tasks import (
+    backfill_rates,
+    download_rates,
+    retry_failed_rates,
+    start_backfill,
+)
+from rates.settings import DAYS_TO_LOAD_RATES
+from tests.fixtures.cbr import CbrStub, rates_payload
+
+METRICS_SAMPLES = (
+    ("rates_download_duration_seconds_count", {}),
+    ("rates_fetch_duration_seconds_count", {"source": "archive"}),
+    ("rates_ingest_rows_total", {}),
+    ("rates_ingest_failures_total", {}),
+)
+
+
+def archive_path(target_date: date) -> str:
+    """Путь к архивным котировкам за дату."""
+    return f"/archive/{target_date:%Y/%m/%d}/daily_json.js"
+
+
+@pytest.mark.django_db()
+def test_download_rates(cbr_stub: CbrStub) -> None:
+    """Тест загрузки котировок за текущий и архивные дни."""
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    cbr_stub.add_rates("/daily_json.js", today, {"USD": 90, "EUR": 98})
+    cbr_stub.add_rates(
+        archive_path(yesterday), yesterday, {"USD": 89, "EUR": 97}
+    )
+
+    download_rates()
+
+    assert set(Currency.objects.values_list("charcode", flat=True)) == {
+        "USD",
+        "EUR",
+    }
+    assert Rates.objects.count() == 4
+    assert (
+        Rates.objects.get(currency__charcode="USD", date=yesterday).value == 89
+    )
+    assert LatestRate.objects.get(currency__charcode="USD").value == 90
+    assert (
+        RatesRollup.objects.get(
+            charcode="USD",
+            granularity="year",
+            period_start=today.replace(day=1, month=1),
+        ).close
+        == 90
+    )
+
+
+@pytest.mark.django_db()
+def test_download_only_missing_rates(
+    cbr_stub: CbrStub, rates_factory: Callable
+) -> None:
+    """Тест загрузки архивных котировок только за отсутствующие дни."""
+    today = date.today()
+    missing_date = today - timedelta(days=3)
+    for num_day in range(1, DAYS_TO_LOAD_RATES):
+        target_date = today - timedelta(days=num_day)
+        if target_date != missing_date:
+            rates_factory(
+                charcode="USD",
+                date=datetime.fromisoformat(
+                    f"{target_date.isoformat()}T11:30:00+03:00"
+                ),
+            )
+    cbr_stub.add_rates("/daily_json.js", today, {"USD": 90})
+
+    download_rates()
+    download_rates()
+
+    assert cbr_stub.requests["/daily_json.js"] == 2
+    assert set(cbr_stub.requests) == {
+        "/daily_json.js",
+        archive_path(missing_date),
+    }
+    # архив вернул 404: курсы на дату не устанавливались
+    assert cbr_stub.requests[archive_path(missing_date)] == 1
+    assert RatesDownload.objects.get(date=missing_date).status == "empty"
+
+
+@pytest.mark.django_db()
+def test_retry_failed_rates(
+    cbr_stub: CbrStub, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест фиксации и повторной загрузки дней с ошибками."""
+    monkeypatch.setattr("api.client.API_REQUEST_RETRIES", 0)
+    failed_date = date.today() - timedelta(days=1)
+    cbr_stub.add_response(
+        archive_path(failed_date), HTTPStatus.INTERNAL_SERVER_ERROR, {}
+    )
+    cbr_stub.add_rates(archive_path(failed_date), failed_date, {"USD": 90})
+
+    download_rates()
+
+    failed = RatesDownload.objects.get(date=failed_date)
+    assert failed.status == "failed"
+    assert failed.attempts == 1
+
+    retry_failed_rates()
+
+    assert not RatesDownload.objects.filter(date=failed_date).exists()
+    assert Rates.objects.filter(date=failed_date).count() == 1
+
+
+@pytest.mark.django_db()
+@pytest.mark.usefixtures("_celery_eager")
+def test_backfill_rates(
+    cbr_stub: CbrStub, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест исторической загрузки котировок порциями."""
+    monkeypatch.setattr("api.tasks.BACKFILL_CHUNK_DAYS", 2)
+    date_from = date(2024, 5, 1)
+    for num_day in range(5):
+        target_date = date_from + timedelta(days=num_day)
+        cbr_stub.add_rates(archive_path(target_date), target_date, {"USD": 90})
+
+    start_backfill(date_from, date(2024, 5, 5))
+
+    backfill = RatesBackfill.objects.get()
+    assert backfill.checkpoint == date(2024, 5, 5)
+    assert backfill.finished_at
+    assert Rates.objects.count() == 5
+
+
+@pytest.mark.django_db()
+def test_backfill_rates_fetch_without_lock(
+    cbr_stub: CbrStub, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест запросов к API вне транзакции с блокировкой загрузки.
+
+    Порция, контрольную точку которой продвинул другой воркер за время
+    запросов, не сохраняется повторно.
+    """
+    target_date = date(2024, 5, 1)
+    cbr_stub.add_rates(archive_path(target_date), target_date, {"USD": 90})
+    backfill = RatesBackfill.objects.create(
+        date_from=target_date, date_to=date(2024, 5, 5)
+    )
+    test_atomic_depth = len(connection.atomic_blocks)
+    atomic_depths = []
+
+    def _fetch_contents(dates: list[date]) -> tuple:
+        atomic_depths.append(len(connection.atomic_blocks))
+        RatesBackfill.objects.filter(id=backfill.id).update(
+            checkpoint=date(2024, 5, 5)
+        )
+        return fetch_contents(dates)
+
+    monkeypatch.setattr("api.tasks.fetch_contents", _fetch_contents)
+    backfill_rates(backfill.id)
+
+    assert atomic_depths == [test_atomic_depth]
+    assert not Rates.objects.exists()
+
+
+def test_fetch_contents_retry(cbr_stub: CbrStub) -> None:
+    """Тест повторного запроса при ошибке сервера."""
+    today = date.today()
+    cbr_stub.add_response("/daily_json.js", HTTPStatus.SERVICE_UNAVAILABLE, {})
+    cbr_stub.add_rates("/daily_json.js", today, {"USD": 90})
+
+    contents, errors, _ = fetch_contents([today])
+
+    assert cbr_stub.requests["/daily_json.js"] == 2
+    assert parse_rates(contents[today]) == rates_payload(today, {"USD": 90})
+    assert not errors
+
+
+def test_fetch_contents_concurrency(cbr_stub: CbrStub) -> None:
+    """Тест переиспользования соединений пула при параллельной загрузке."""
+    today = date.today()
+    dates = [today - timedelta(days=num_day) for num_day in range(30)]
+    for target_date in dates[1:]:
+        cbr_stub.add_rates(archive_path(target_date), target_date, {"USD": 90})
+
+    contents, _, _ = fetch_contents(dates, concurrency=4)
+
+    assert list(contents) == dates
+    assert contents[today] is None
+    assert parse_rates(contents[dates[-1]]) == rates_payload(
+        dates[-1], {"USD": 90}
+    )
+    assert len(cbr_stub.clients) <= 4
+
+
+@pytest.mark.django_db()
+def test_download_rates_metrics(
+    cbr_stub: CbrStub, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Тест метрик загрузки: время, запросы к API, строки и ошибки."""
+    monkeypatch.setattr("api.client.API_REQUEST_RETRIES", 0)
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    cbr_stub.add_rates("/daily_json.js", today, {"USD": 90, "EUR": 98})
+    cbr_stub.add_response(
+        archive_path(yesterday), HTTPStatus.INTERNAL_SERVER_ERROR, {}
+    )
+    before = {
+        name: REGISTRY.get_sample_value(name, labels) or 0
+        for name, labels in METRICS_SAMPLES
+    }
+
+    download_rates()
+
+    assert {
+        name: REGISTRY.get_sample_value(name, labels) - before[name]
+        for name, labels in METRICS_SAMPLES
+    } == {
+        "rates_download_duration_seconds_count": 1,
+        "rates_fetch_duration_seconds_count": DAYS_TO_LOAD_RATES - 1,
+        "rates_ingest_rows_total": 2,
+        "rates_ingest_failures_total": 1,
+    }
+
+
+@pytest.mark.django_db()
+def test_download_rates_profile(
+    cbr_stub: CbrStub, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Тест итогов запуска загрузки по этапам, датам и дампа cProfile."""
+    monkeypatch.setattr("api.profiling.INGEST_TRACEMALLOC", True)
+    monkeypatch.setattr("api.profiling.INGEST_CPROFILE_DIR", str(tmp_path))
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    cbr_stub.add_rates("/daily_json.js", today, {"USD": 90, "EUR": 98})
+    cbr_stub.add_rates(
+        archive_path(yesterday), yesterday, {"USD": 89, "EUR": 97}
+    )
+
+    download_rates()
+
+    run = RatesIngestRun.objects.get()
+    assert run.task == "download_rates"
+    assert run.rows == 4
+    assert run.failed_dates == 0
+    assert set(run.stages) == {"fetch", "parse", "persist", "refresh"}
+    assert all(stage["peak_kb"] > 0 for stage in run.stages.values())
+    assert len(run.dates) == DAYS_TO_LOAD_RATES
+    assert set(run.dates[today.isoformat()]) == {"fetch", "parse", "persist"}
+    assert pstats.Stats(run.cprofile_path).total_calls
@@ -0,0 +1,71 @@
+"""Модуль с тестами сохранения котировок валют."""
+from datetime import date
+from decimal import Decimal
+from typing import Callable
+
+import pytest
+
+from api.models import Rates, RatesRollup
+from api.repository import copy_rates, refresh_rates_rollups
+from api.tasks import save_rates
+from rates.settings import CURRENCY_KEY_IN_API
+
+
+@pytest.mark.django_db()
+def test_save_rates_upsert() -> None:
+    """Тест повторного сохранения котировок за ту же дату."""
+    rates = {
+        "Date": "2024-05-01T11:30:00+03:00",
+        CURRENCY_KEY_IN_API: {
+            "USD": {"Value": 90.5},
+            "KZT": {"Value": 20.1, "Nominal": 100},
+        },
+    }
+    save_rates(rates)
+    rates[CURRENCY_KEY_IN_API]["USD"]["Value"] = 91.5
+    save_rates(rates)
+
+    assert Rates.objects.count() == 2
+    assert Rates.objects.get(currency__charcode="USD").value == Decimal("91.5")
+    assert Rates.objects.get(currency__charcode="KZT").nominal == 100
+
+
+@pytest.mark.django_db()
+def test_copy_rates_skips_duplicates() -> None:
+    """Тест загрузки котировок через COPY без повторов и перезаписи."""
+    save_rates(
+        {
+            "Date": "2024-05-01T11:30:00+03:00",
+            CURRENCY_KEY_IN_API: {"USD": {"Value": 90.5}},
+        }
+    )
+    created = copy_rates(
+        [
+            ("USD", "2024-05-01T11:30:00+03:00", "91.5"),
+            ("USD", "2024-05-02T11:30:00+03:00", "92.5"),
+            ("USD", "2024-05-02T11:30:00+03:00", "92.5"),
+            ("EUR", "2024-05-02T11:30:00+03:00", "99.1"),
+        ]
+    )
+
+    assert created == 2
+    assert Rates.objects.count() == 3
+    assert Rates.objects.get(
+        currency__charcode="USD", date="2024-05-01"
+    ).value == Decimal("90.5")
+
+
+@pytest.mark.django_db()
+def test_refresh_rates_rollups_before_latest_day(
+    rates_factory: Callable,
+) -> None:
+    """Тест пересчета агрегатов за день раньше последнего загруженного."""
+    for day, value in enumerate((10, 20, 25, 30, 40), start=4):
+        rates_factory(charcode="USD", value=value, date=date(2024, 3, day))
+    refresh_rates_rollups(["USD"], date(2024, 3, 4), date(2024, 3, 8))
+    refresh_rates_rollups(["USD"], date(2024, 3, 6), date(2024, 3, 6))
+
+    for rollup in RatesRollup.objects.filter(charcode="USD"):
+        assert rollup.count == 5
+        assert rollup.open == 10
+        assert rollup.close == 40
@@ -0,0 +1,70 @@
+"""Модуль с тестами уведомлений о пересечении порогов котировками."""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable
+
+import pytest
+from django_fakery import factory
+
+from api.models import AppUser
+from api.notifications import Notification
+from api.tasks import download_rates, notify_threshold_crossings
+from tests.fixtures.cbr import CbrStub
+from tests.fixtures.notifications import LocmemSender
+
+
+@pytest.mark.django_db()
+def test_threshold_crossing_alerts(
+    cbr_stub: CbrStub,
+    rates_factory: Callable,
+    user_currency_factory: Callable,
+    outbox: list[Notification],
+) -> None:
+    """Тест уведомления только пользователей с пересеченным порогом."""
+    today = date.today()
+    rates_factory(charcode="USD", value=90, date=today - timedelta(days=1))
+    crossed = factory.make(AppUser, fields={"phone": "+70000000001"})
+    user_currency_factory(user=crossed, charcode="USD", threshold=95)
+    for charcode, threshold in (("USD", 80), ("USD", 97), ("EUR", 95)):
+        user_currency_factory(
+            user=factory.make(AppUser), charcode=charcode, threshold=threshold
+        )
+    cbr_stub.add_rates("/daily_json.js", today, {"USD": 97, "EUR": 99})
+
+    download_rates()
+
+    assert outbox == [
+        Notification(
+            email=crossed.email,
+            phone="+70000000001",
+            text="USD rate 97.0000 exceeded your threshold 95",
+        )
+    ]
+
+
+@pytest.mark.django_db()
+def test_threshold_crossing_alerts_batches(
+    user_currency_factory: Callable,
+    outbox: list[Notification],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Тест отправки уведомлений о падении котировки пачками."""
+    monkeypatch.setattr("api.notifications.NOTIFICATION_BATCH_SIZE", 2)
+    batches = []
+    monkeypatch.setattr(
+        LocmemSender,
+        "send_messages",
+        lambda _, notifications: batches.append(notifications)
+        or len(notifications),
+    )
+    for threshold in range(95, 100):
+        user_currency_factory(
+            user=factory.make(AppUser), charcode="USD", threshold=threshold
+        )
+
+    notify_threshold_crossings({"USD": Decimal(100)}, {"USD": Decimal(90)})
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert "USD rate 90 fell below your threshold 95" in [
+        notification.text for batch in batches for notification in batch
+    ]